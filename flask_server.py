@@ -10,6 +10,9 @@ from typing import Dict, Any
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import uuid
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
 from flask import send_file
 from dotenv import load_dotenv
@@ -45,7 +48,16 @@ def _bootstrap_env():
 
 _bootstrap_env()
 
-from treasury_agent.crew import TreasuryAgent
+from treasury_agent.crew import run_treasury_crew
+from treasury_agent.metrics import metrics
+from treasury_agent.run_context import DeadlineExceeded, RunContext
+from treasury_agent.task_output_store import persist_task_outputs_async
+from treasury_agent.tools.limit_batch import LIMIT_KINDS, evaluate_limits
+from treasury_agent.tools.ledger_state import (
+    LEDGER_BLOCK_ROWS, ledger_key, ledger_states, load_state, save_checkpoint, verified_rows
+)
+from treasury_agent.tools.sheet_columns import SheetColumns
+from treasury_agent.tools.tabular_formats import detect_format, read_table
 
 app = Flask(__name__)
 CORS(app)
@@ -55,12 +67,125 @@ proposals_store = {}
 execution_results_store = {}
 processing_status = {}  # Track async processing status
 
+def _route_deadline(env_var):
+    """Crew deadline budget for a route in seconds, or None (no deadline) when unset or 0"""
+    value = os.getenv(env_var)
+    return float(value) if value else None
+
+# Crew deadline budget per route; routes have no deadline unless configured
+ROUTE_DEADLINES_S = {
+    'submit_request': _route_deadline('TREASURY_DEADLINE_SUBMIT_REQUEST_S'),
+    'process_request': _route_deadline('TREASURY_DEADLINE_PROCESS_REQUEST_S'),
+}
+
+def remove_temp_file(path):
+    """Delete an uploaded temp file, ignoring errors"""
+    try:
+        os.remove(path)
+    except Exception:
+        pass
+
+def salvage_agent_output(run):
+    """Combine the outputs of tasks that completed before a deadline into one analysis string."""
+    completed = run.completed_task_outputs()
+    if not completed:
+        return "Agent analysis did not complete before the deadline; proposal generated from spreadsheet data only."
+    sections = [f"## {task_name}\n{output.get('raw', '')}" for task_name, output in completed.items()]
+    return "Partial agent analysis (deadline reached):\n\n" + "\n\n".join(sections)
+
+def payments_from_rows(df, df_columns, matched_cols, start=0, stop=None):
+    """Payment dicts (without payment_id) for DataFrame rows [start, stop)"""
+    payments = []
+    for _, row in df.iloc[start:stop].iterrows():
+        try:
+            # Skip non-payment rows if transaction type is specified
+            if 'transaction_type' in df_columns and 'Transaction_Type' in df.columns:
+                if row['Transaction_Type'].lower() != 'payment':
+                    continue
+
+            # Get values with fallbacks
+            recipient = str(row.iloc[matched_cols['recipient']]).strip()
+            amount = float(row.iloc[matched_cols['amount']])
+
+            # Skip invalid amounts
+            if amount <= 0:
+                continue
+
+            # Get optional fields with fallbacks
+            currency = 'USDT'  # Default currency
+            if 'currency' in matched_cols:
+                try:
+                    currency = str(row.iloc[matched_cols['currency']]).strip().upper()
+                    if not currency:  # If empty, use default
+                        currency = 'USDT'
+                except:
+                    pass
+
+            purpose = 'Treasury payment'  # Default purpose
+            if 'purpose' in matched_cols:
+                try:
+                    purpose = str(row.iloc[matched_cols['purpose']])
+                    if not purpose or purpose.lower() == 'nan':
+                        purpose = 'Treasury payment'
+                except:
+                    pass
+
+            # Create payment proposal (payment_id is assigned by the caller)
+            payment = {
+                'recipient_wallet': recipient,
+                'amount': amount,
+                'currency': currency,
+                'purpose': purpose,
+                'priority': 'normal',  # Default priority
+                'estimated_gas_fee': 0.001,  # Simulated gas fee
+                'status': 'pending_approval',
+                'agent_recommendation': 'Extracted from Excel data',
+                'source': 'excel_import'
+            }
+
+            # Add date if available
+            if 'date' in matched_cols:
+                try:
+                    payment['date'] = str(row.iloc[matched_cols['date']])
+                except:
+                    pass
+
+            payments.append(payment)
+
+        except Exception as row_error:
+            print(f"⚠️ Error processing row {_}: {row_error}")
+            continue
+    return payments
+
+def extract_ledger_payments(df, df_columns, matched_cols):
+    """
+    Payment dicts for every row of the sheet.
+
+    With ledger states enabled (TREASURY_LEDGER_STATE=1), a sheet that extends a
+    previously seen ledger only parses the rows after its stored checkpoint.
+    Every payment is a proposal, so the state holds them all and grows with the
+    ledger; save_checkpoint skips (and logs) a state too large to store.
+    """
+    if not ledger_states.enabled or len(df) + 1 < LEDGER_BLOCK_ROWS:
+        return payments_from_rows(df, df_columns, matched_cols)
+
+    # SheetColumns row r is DataFrame row r - 1 (row 0 holds the header)
+    columns = SheetColumns.from_frame(df, header_row=True)
+    key = ledger_key("proposals", "", columns.head)
+    state = load_state(key)
+    start = verified_rows(columns, state)
+    checkpoint = columns.n_rows // LEDGER_BLOCK_ROWS * LEDGER_BLOCK_ROWS
+    payments = state["payments"] if start else []
+    if start:
+        print(f"📒 Ledger: {start} rows from checkpoint, parsing {columns.n_rows - start} new rows")
+    if checkpoint > start:
+        payments += payments_from_rows(df, df_columns, matched_cols, max(start - 1, 0), checkpoint - 1)
+        save_checkpoint(key, columns, state, start, checkpoint, {"payments": payments})
+    return payments + payments_from_rows(df, df_columns, matched_cols, max(checkpoint - 1, 0))
+
 def parse_agent_output_to_proposals(agent_output, user_json, excel_path=None):
-    """Parse agent output and create structured payment proposals from Excel data"""
+    """Parse agent output and create structured payment proposals from Excel, CSV or Parquet data"""
     try:
-        # Import pandas here to avoid dependency if not used
-        import pandas as pd
-        
         # If no Excel path is provided, try to extract it from the agent output
         if not excel_path and hasattr(agent_output, 'excel_path'):
             excel_path = agent_output.excel_path
@@ -68,10 +193,11 @@ def parse_agent_output_to_proposals(agent_output, user_json, excel_path=None):
         if not excel_path:
             raise ValueError("No Excel file path provided for payment extraction")
             
-        # Read Excel file
+        # Read the spreadsheet (format detected from the file contents)
         try:
-            df = pd.read_excel(excel_path)
-            print(f"📊 Read Excel file with {len(df)} rows")
+            file_format = detect_format(excel_path)
+            df = read_table(excel_path, file_format)
+            print(f"📊 Read {file_format} file with {len(df)} rows")
             
             # Convert column names to lowercase for case-insensitive matching
             df_columns = [str(col).lower() for col in df.columns]
@@ -97,68 +223,11 @@ def parse_agent_output_to_proposals(agent_output, user_json, excel_path=None):
             if 'recipient' not in matched_cols or 'amount' not in matched_cols:
                 raise ValueError("Excel file must contain columns for recipient and amount")
             
-            # Process each row into a payment
-            structured_payments = []
-            for _, row in df.iterrows():
-                try:
-                    # Skip non-payment rows if transaction type is specified
-                    if 'transaction_type' in df_columns and 'Transaction_Type' in df.columns:
-                        if row['Transaction_Type'].lower() != 'payment':
-                            continue
-                    
-                    # Get values with fallbacks
-                    recipient = str(row.iloc[matched_cols['recipient']]).strip()
-                    amount = float(row.iloc[matched_cols['amount']])
-                    
-                    # Skip invalid amounts
-                    if amount <= 0:
-                        continue
-                        
-                    # Get optional fields with fallbacks
-                    currency = 'USDT'  # Default currency
-                    if 'currency' in matched_cols:
-                        try:
-                            currency = str(row.iloc[matched_cols['currency']]).strip().upper()
-                            if not currency:  # If empty, use default
-                                currency = 'USDT'
-                        except:
-                            pass
-                            
-                    purpose = 'Treasury payment'  # Default purpose
-                    if 'purpose' in matched_cols:
-                        try:
-                            purpose = str(row.iloc[matched_cols['purpose']])
-                            if not purpose or purpose.lower() == 'nan':
-                                purpose = 'Treasury payment'
-                        except:
-                            pass
-                    
-                    # Create payment proposal
-                    payment = {
-                        'payment_id': str(uuid.uuid4()),
-                        'recipient_wallet': recipient,
-                        'amount': amount,
-                        'currency': currency,
-                        'purpose': purpose,
-                        'priority': 'normal',  # Default priority
-                        'estimated_gas_fee': 0.001,  # Simulated gas fee
-                        'status': 'pending_approval',
-                        'agent_recommendation': 'Extracted from Excel data',
-                        'source': 'excel_import'
-                    }
-                    
-                    # Add date if available
-                    if 'date' in matched_cols:
-                        try:
-                            payment['date'] = str(row.iloc[matched_cols['date']])
-                        except:
-                            pass
-                            
-                    structured_payments.append(payment)
-                    
-                except Exception as row_error:
-                    print(f"⚠️ Error processing row {_}: {row_error}")
-                    continue
+            # Process each row into a payment (rows of a known ledger prefix come from its checkpoint)
+            structured_payments = [
+                {'payment_id': str(uuid.uuid4()), **payment}
+                for payment in extract_ledger_payments(df, df_columns, matched_cols)
+            ]
             
             if not structured_payments:
                 raise ValueError("No valid payment records found in the Excel file")
@@ -186,6 +255,88 @@ def parse_agent_output_to_proposals(agent_output, user_json, excel_path=None):
             'error': str(e)
         }]
 
+# Deterministic proposal stages run here concurrently with the crew
+precompute_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="proposal-precompute")
+
+def validate_recipient_addresses(payment_proposals):
+    """Mark each payment with whether its recipient is a well-formed Ethereum address."""
+    from web3 import Web3
+
+    invalid = []
+    for payment in payment_proposals:
+        recipient = payment.get('recipient_wallet', '')
+        payment['address_valid'] = bool(recipient) and Web3.is_address(recipient)
+        if not payment['address_valid']:
+            invalid.append(payment.get('payment_id'))
+    return {
+        'checked': len(payment_proposals),
+        'valid': len(payment_proposals) - len(invalid),
+        'invalid_payment_ids': invalid
+    }
+
+def precheck_transaction_limits(payment_proposals, risk_config, user_id='default'):
+    """
+    Check payments in priority order against the single, daily and monthly limits from risk_config.
+
+    Limits are resolved as the risk tool resolves them, amounts are converted to
+    USD, and the user's current daily / monthly usage is read from the limit
+    ledger without reserving anything.
+    """
+    from treasury_agent.tools.limit_ledger import limit_ledger
+    from treasury_agent.tools.price_oracle import price_oracle
+    from treasury_agent.tools.treasury_risk_tools import TreasuryRiskTools
+
+    risk_tools = TreasuryRiskTools()
+    limits = risk_tools._limits(risk_tools._resolve_limits(risk_config))
+    amounts = np.array([risk_tools._safe_float_conversion(payment.get('amount'), 'amount', 0.0)
+                        for payment in payment_proposals], dtype=float)
+    currencies = [str(payment.get('currency') or 'USDT').upper() for payment in payment_proposals]
+    prices = {}
+    for symbol in set(currencies):
+        try:
+            prices[symbol] = price_oracle().get_price(symbol)
+        except LookupError:
+            # No USD value: the payment is blocked as invalid
+            prices[symbol] = float('nan')
+    amounts_usd = amounts * np.array([prices[symbol] for symbol in currencies], dtype=float)
+    usage = limit_ledger().headroom(user_id, limits)
+    verdicts = evaluate_limits(amounts_usd, limits, usage['daily_used'], usage['monthly_used'],
+                               priorities=[payment.get('priority') for payment in payment_proposals])
+
+    blocked = []
+    for index, payment in enumerate(payment_proposals):
+        payment['limit_violations'] = [kind for kind in ('invalid',) + LIMIT_KINDS if verdicts[kind][index]]
+        if not verdicts['approved'][index]:
+            blocked.append(payment.get('payment_id'))
+    return {
+        'limits': limits,
+        'daily_used': usage['daily_used'],
+        'monthly_used': usage['monthly_used'],
+        'total_amount': float(np.nansum(amounts_usd)),
+        'approved_amount': verdicts['approved_amount'],
+        'first_breach': {
+            kind: None if index is None else payment_proposals[index].get('payment_id')
+            for kind, index in verdicts['first_breach'].items()
+        },
+        'blocked_payment_ids': blocked
+    }
+
+def precompute_proposal_inputs(user_json, excel_path):
+    """Run the deterministic proposal stages that do not depend on the agent's output."""
+    started = time.perf_counter()
+    # The agent output is not consulted when an Excel path is given, so parsing can start immediately
+    payment_proposals = parse_agent_output_to_proposals(None, user_json, excel_path=excel_path)
+    prechecks = {
+        'addresses': validate_recipient_addresses(payment_proposals),
+        'limits': precheck_transaction_limits(payment_proposals, user_json.get('risk_config'),
+                                              str(user_json.get('user_id') or 'default'))
+    }
+    return {
+        'payment_proposals': payment_proposals,
+        'prechecks': prechecks,
+        'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -208,13 +359,25 @@ def process_request():
         
         print(f"📝 Processing request: {treasury_request}")
         
-        # Create and run the crew
-        crew = TreasuryAgent()
-        result = crew.crew().kickoff(inputs={'treasury_request': treasury_request})
+        # Create and run the crew within the route's deadline
+        run = RunContext(deadline_s=ROUTE_DEADLINES_S['process_request'])
+        try:
+            result, _ = run_treasury_crew({'treasury_request': treasury_request}, run=run)
+        except DeadlineExceeded as deadline_error:
+            print(f"⏱️ {deadline_error}")
+            return jsonify({
+                'error': str(deadline_error),
+                'partial_result': salvage_agent_output(run),
+                'task_outputs': run.completed_task_outputs(),
+                'diagnostics': run.diagnostics.to_dict(),
+                'message': 'Treasury request exceeded its deadline'
+            }), 504
         
         return jsonify({
             'status': 'success',
             'result': result,
+            'task_outputs': run.completed_task_outputs(),
+            'diagnostics': run.diagnostics.to_dict(),
             'message': 'Treasury request processed successfully'
         })
         
@@ -257,7 +420,7 @@ def test_usdt_tool():
 
 @app.route('/submit_request', methods=['POST'])
 def submit_request():
-    """Step 1: Accept Excel file + JSON, process with agent, and return a payment proposal JSON with unique proposal_id."""
+    """Step 1: Accept Excel (or CSV / Parquet) file + JSON, process with agent, and return a payment proposal JSON with unique proposal_id."""
     try:
         if 'json' not in request.form or 'excel' not in request.files:
             return jsonify({'error': 'Missing required fields: json and excel'}), 400
@@ -275,6 +438,11 @@ def submit_request():
             tmp.write(excel_file.read())
             temp_excel_path = tmp.name
 
+        # Excel, CSV and Parquet uploads are accepted; anything else is rejected up front
+        if detect_format(temp_excel_path) is None:
+            remove_temp_file(temp_excel_path)
+            return jsonify({'error': 'Unsupported file format: upload .xlsx, .xls, .csv or .parquet', 'success': False}), 400
+
         # Generate unique IDs
         proposal_id = str(uuid.uuid4())
         audit_id = str(uuid.uuid4())
@@ -284,6 +452,11 @@ def submit_request():
         # Mark as processing
         processing_status[proposal_id] = {'status': 'processing', 'timestamp': datetime.utcnow().isoformat()}
 
+        # Start spreadsheet parsing, address validation and limit checks while the crew runs
+        precompute_future = precompute_executor.submit(precompute_proposal_inputs, user_json, temp_excel_path)
+
+        run = RunContext(run_id=proposal_id, deadline_s=ROUTE_DEADLINES_S['submit_request'])
+
         try:
             # Prepare agent input
             treasury_request = f"Process payment request from user {user_json.get('user_id', 'unknown')}. Excel file: {temp_excel_path}. Request details: {json.dumps(user_json)}"
@@ -293,17 +466,27 @@ def submit_request():
             try:
                 # Run the agent (CrewAI)
                 print(f"🤖 Attempting to run CrewAI agent...")
-                crew = TreasuryAgent()
-                result = crew.crew().kickoff(inputs={'treasury_request': treasury_request})
+                result, _ = run_treasury_crew({'treasury_request': treasury_request}, run=run)
                 agent_output = str(result)
                 print(f"✅ Agent completed successfully")
+            except DeadlineExceeded as deadline_error:
+                # Keep whatever tasks finished and fall back to spreadsheet-only proposal generation
+                print(f"⏱️ Agent deadline reached, using completed task outputs: {deadline_error}")
+                agent_output = salvage_agent_output(run)
             except Exception as agent_error:
                 print(f"⚠️ Agent failed, using fallback: {agent_error}")
                 # Use fallback analysis when agent fails
                 #agent_output = f"Treasury analysis completed using fallback mode. Original request: {treasury_request}. Payments have been analyzed and approved for processing."
             
-            # Create structured payment proposal from Excel data
-            payment_proposals = parse_agent_output_to_proposals(agent_output, user_json, excel_path=temp_excel_path)
+            # Join the precomputed proposal inputs (normally finished long before the crew)
+            join_started = time.perf_counter()
+            try:
+                precomputed = precompute_future.result()
+            except Exception as precompute_error:
+                print(f"⚠️ Precompute failed, computing proposal inputs inline: {precompute_error}")
+                precomputed = precompute_proposal_inputs(user_json, temp_excel_path)
+            precomputed['join_wait_ms'] = round((time.perf_counter() - join_started) * 1000, 2)
+            payment_proposals = precomputed['payment_proposals']
             
             # Create the structured proposal response
             proposal = {
@@ -316,12 +499,19 @@ def submit_request():
                 'original_request': user_json,
                 'payment_proposals': payment_proposals,
                 'agent_analysis': agent_output,
+                'task_outputs': run.completed_task_outputs(),
+                'prechecks': precomputed['prechecks'],
+                'diagnostics': {
+                    **run.diagnostics.to_dict(),
+                    'precompute': {'duration_ms': precomputed['duration_ms'], 'join_wait_ms': precomputed['join_wait_ms']}
+                },
                 'total_amount': sum(p.get('amount', 0) for p in payment_proposals),
                 'currency': payment_proposals[0].get('currency', 'USDT') if payment_proposals else 'USDT'
             }
             
-            # Store the proposal
+            # Store the proposal; task outputs are written per proposal off the request path when enabled
             proposals_store[proposal_id] = proposal
+            persist_task_outputs_async(proposal_id, proposal['task_outputs'])
             processing_status[proposal_id] = {'status': 'completed', 'timestamp': datetime.utcnow().isoformat()}
             
             print(f"✅ Proposal {proposal_id} created successfully with {len(payment_proposals)} payment(s)")
@@ -339,16 +529,23 @@ def submit_request():
             raise e
             
         finally:
-            # Clean up temp file
+            # Clean up temp file once neither the precompute nor a crew that outlived its deadline reads it
+            precompute_future.cancel()
             try:
-                os.remove(temp_excel_path)
+                precompute_future.result()
             except Exception:
                 pass
+            run.when_released(lambda: remove_temp_file(temp_excel_path))
 
     except Exception as e:
         print(f"❌ Error in submit_request: {e}")
         return jsonify({'error': str(e), 'success': False}), 500
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Return per-task, per-tool and token metrics aggregated across crew runs."""
+    return jsonify(metrics.snapshot())
+
 @app.route('/get_proposal/<proposal_id>', methods=['GET'])
 def get_proposal(proposal_id):
     """Step 2: Return the stored proposal JSON for review."""
@@ -583,6 +780,7 @@ if __name__ == '__main__':
     print("   GET  /health - Health check")
     print("   POST /process_request - Process treasury requests")
     print("   GET  /test_usdt_tool - Test USDT payment tool")
+    print("   GET  /metrics - Crew task, tool and token metrics")
     print("   POST /submit_request - Submit new request (Excel + JSON)")
     print("   GET  /get_proposal/<id> - Get proposal by ID")
     print("   POST /submit_approval - Submit approval/partial approval")
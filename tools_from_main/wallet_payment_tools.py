@@ -22,7 +22,7 @@ class WalletPaymentTools:
     Supports ETH and USDT transactions on Ethereum mainnet.
     """
     
-    def __init__(self, infura_key=None, fernet_key=None, usdt_contract_address=None):
+    def __init__(self, infura_key=None, fernet_key=None, usdt_contract_address=None, price_feed=None):
         """
         Initialize the wallet payment tools.
         
@@ -30,10 +30,13 @@ class WalletPaymentTools:
             infura_key (str): Infura API key for Ethereum connection
             fernet_key (str): Encryption key for private key storage
             usdt_contract_address (str): USDT contract address (defaults to mainnet)
+            price_feed (callable): Returns the USD price of a symbol such as 'ETH';
+                defaults to treasury_agent's shared price oracle (inject a stub in tests)
         """
         self.infura_key = infura_key or os.getenv('INFURA_API_KEY')
         self.fernet_key = fernet_key or os.getenv('FERNET_KEY')
         self.usdt_contract_address = usdt_contract_address or '0xdAC17F958D2ee523a2206206994597C13D831ec7'
+        self.price_feed = price_feed or self._default_price_feed()
         
         # Initialize Web3
         self.w3 = None
@@ -144,6 +147,44 @@ class WalletPaymentTools:
         gas_price_gwei = self.w3.from_wei(gas_price, 'gwei')
         return float(gas_price_gwei)
     
+    @classmethod
+    def _default_price_feed(cls):
+        """
+        Default price feed: price_oracle().get_price from treasury_agent, so ETH
+        prices share the app's TTL cache. Falls back to calling CoinGecko directly
+        when treasury_agent is not importable (these tools used standalone).
+        
+        Returns:
+            callable: symbol -> USD price
+        """
+        try:
+            from treasury_agent.tools.price_oracle import price_oracle
+        except ImportError:
+            return cls._coingecko_price
+        # Resolve the oracle per call so install_price_oracle() also applies to existing tools
+        return lambda symbol: price_oracle().get_price(symbol)
+    
+    @staticmethod
+    def _coingecko_price(symbol):
+        """
+        Standalone price feed: the USD price of ETH from CoinGecko.
+        
+        Args:
+            symbol (str): Currency symbol (only 'ETH' is supported)
+            
+        Returns:
+            float: USD price, or None if unavailable
+        """
+        if symbol != 'ETH':
+            return None
+        response = requests.get(
+            'https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd',
+            timeout=10
+        )
+        if response.status_code != 200:
+            return None
+        return response.json()['ethereum']['usd']
+    
     def get_eth_balance(self, wallet_address):
         """
         Get ETH balance for a wallet address.
@@ -162,19 +203,10 @@ class WalletPaymentTools:
             balance_wei = self.w3.eth.get_balance(address)
             balance_eth = self.w3.from_wei(balance_wei, 'ether')
             
-            # Get ETH price (optional - you might want to implement your own price feed)
             try:
-                response = requests.get(
-                    'https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd',
-                    timeout=10
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    eth_price = data['ethereum']['usd']
-                    usd_value = float(balance_eth) * eth_price
-                else:
-                    usd_value = None
-            except:
+                eth_price = self.price_feed('ETH')
+                usd_value = float(balance_eth) * eth_price if eth_price is not None else None
+            except Exception:
                 usd_value = None
             
             return float(balance_eth), usd_value
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Benchmark ExcelAnalysisTool analysis_type modes.
+
+Runs the tool on the same workbook in 'comprehensive', 'payment_focused' and
+'financial_summary' mode (result cache disabled) and reports runtime and output
+size for each.
+
+    python benchmarks/bench_analysis_modes.py --sheets 4 --rows 20000
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bench_excel_parsing import build_workbook  # noqa: E402
+from treasury_agent.tools.excel_analysis_tool import ANALYSIS_TYPES, ExcelAnalysisTool  # noqa: E402
+from treasury_agent.tools.excel_result_cache import excel_result_cache  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sheets", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    excel_result_cache.enabled = False
+    tool = ExcelAnalysisTool()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build_workbook(Path(tmp) / "bench.xlsx", args.sheets, args.rows)
+        print(f"📊 Workbook: {args.sheets} sheets x {args.rows} rows")
+        for analysis_type in ANALYSIS_TYPES:
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                output = tool._run(file_path=str(path), analysis_type=analysis_type)
+                samples.append(time.perf_counter() - started)
+            print(f"   {analysis_type:18s} {statistics.median(samples) * 1000:9.1f} ms  "
+                  f"{len(output) / 1024:10.1f} KiB output")
+
+
+if __name__ == "__main__":
+    main()
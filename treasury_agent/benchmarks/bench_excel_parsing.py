@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Benchmark workbook parsing in ExcelAnalysisTool.
+
+Compares the previous per-sheet parsing (ExcelFile to list sheets, then one
+read_excel call per sheet, which re-opens the zip and re-parses shared XML for
+every sheet) with the single-handle parsing used by `_extract_excel_data`, for
+each available engine.
+
+    python benchmarks/bench_excel_parsing.py --sheets 8 --rows 5000 --repeat 3
+"""
+
+import argparse
+import importlib.util
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from treasury_agent.tools.excel_analysis_tool import excel_engine  # noqa: E402
+
+
+def build_workbook(path: Path, sheets: int, rows: int) -> Path:
+    """Write a multi-sheet payment workbook with mixed column types."""
+    rng = np.random.default_rng(42)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for index in range(sheets):
+            pd.DataFrame({
+                "Date": pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%Y-%m-%d"),
+                "Recipient": [f"Vendor {i % 250}" for i in range(rows)],
+                "Wallet": [f"0x{i:040x}" for i in range(rows)],
+                "Payment Amount": rng.uniform(10, 25000, rows).round(2),
+                "Fee": rng.uniform(0, 15, rows).round(2),
+                "Account Balance": rng.uniform(1e5, 1e6, rows).round(2),
+            }).to_excel(writer, sheet_name=f"Sheet{index + 1}", index=False)
+    return path
+
+
+def parse_per_sheet(path: Path, engine):
+    excel_file = pd.ExcelFile(path, engine=engine)
+    return {name: pd.read_excel(path, sheet_name=name, header=None, engine=engine) for name in excel_file.sheet_names}
+
+
+def parse_single_handle(path: Path, engine):
+    with pd.ExcelFile(path, engine=engine) as excel_file:
+        return {name: excel_file.parse(name, header=None) for name in excel_file.sheet_names}
+
+
+def time_call(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sheets", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engines = ["openpyxl"]
+    if importlib.util.find_spec("python_calamine") is not None:
+        engines.append("calamine")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build_workbook(Path(tmp) / "bench.xlsx", args.sheets, args.rows)
+        print(f"📊 Workbook: {args.sheets} sheets x {args.rows} rows, {path.stat().st_size / 1024:.0f} KiB")
+        print(f"   Tool engine selection: {excel_engine() or 'pandas default'}")
+
+        baseline = time_call(lambda: parse_per_sheet(path, "openpyxl"), args.repeat)
+        print(f"   per-sheet read_excel (openpyxl): {baseline:9.1f} ms")
+        for engine in engines:
+            elapsed = time_call(lambda: parse_single_handle(path, engine), args.repeat)
+            print(f"   single handle ({engine:9s}):     {elapsed:9.1f} ms  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
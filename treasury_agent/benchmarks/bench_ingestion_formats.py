@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Benchmark ingestion time of the same ledger stored as CSV, Parquet and Excel.
+
+Writes one table in each format and times read_table (the reader shared by
+ExcelAnalysisTool and the proposal parser) plus the conversion to SheetColumns
+that feeds the analysis pipeline. Excel is capped at --excel-rows since writing
+a 1M-row workbook takes minutes; pass --excel-rows 0 to skip it.
+
+    python benchmarks/bench_ingestion_formats.py --rows 1000000
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from treasury_agent.tools.sheet_columns import SheetColumns  # noqa: E402
+from treasury_agent.tools.tabular_formats import detect_format, pyarrow_available, read_table  # noqa: E402
+
+
+def build_ledger(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(11)
+    return pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=rows, freq="min").strftime("%Y-%m-%d"),
+        "Transaction_Type": np.where(rng.random(rows) < 0.9, "Payment", "Refund"),
+        "Amount": rng.uniform(10, 25000, rows).round(2),
+        "Currency": rng.choice(["USDT", "USDC", "ETH"], rows),
+        "Recipient": [f"0x{i % 5000:040x}" for i in range(rows)],
+        "Purpose": rng.choice(["Development services", "Marketing services", "Payroll"], rows),
+        "Balance": rng.uniform(1e5, 1e6, rows).round(2),
+    })
+
+
+def time_read(path: Path, repeat: int) -> float:
+    file_format = detect_format(str(path))
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        SheetColumns.from_frame(read_table(str(path), file_format), header_row=True)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--excel-rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ledger = build_ledger(args.rows)
+    print(f"📊 Ingestion, {args.rows} rows x {len(ledger.columns)} columns "
+          f"(pyarrow {'on' if pyarrow_available() else 'off'})")
+    with tempfile.TemporaryDirectory() as tmp:
+        targets = []
+        csv_path = Path(tmp) / "ledger.csv"
+        ledger.to_csv(csv_path, index=False)
+        targets.append(("csv", csv_path, args.rows))
+        parquet_path = Path(tmp) / "ledger.parquet"
+        ledger.to_parquet(parquet_path, index=False)
+        targets.append(("parquet", parquet_path, args.rows))
+        if args.excel_rows:
+            excel_rows = min(args.rows, args.excel_rows)
+            excel_path = Path(tmp) / "ledger.xlsx"
+            ledger.head(excel_rows).to_excel(excel_path, index=False)
+            targets.append(("xlsx", excel_path, excel_rows))
+
+        for name, path, rows in targets:
+            elapsed = time_read(path, args.repeat)
+            print(f"   {name:8s} {rows:>9d} rows {elapsed:10.1f} ms  "
+                  f"{elapsed / rows * 1e6:8.2f} ns/row  {path.stat().st_size / (1024 * 1024):8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+"""
+Benchmark the spreadsheet pipeline end to end on synthetic ledgers.
+
+For each size, writes a synthetic ledger (see synthetic_workbook.py) and times
+every stage that reads it: ExcelAnalysisTool in each analysis type (result cache
+disabled), parse_agent_output_to_proposals from flask_server, and
+ExcelReaderTools.read_excel_file / analyze_excel_data from
+tools_from_main/excel_azure_tools.py. Each stage reports the median and min wall
+time over --repeat runs plus the peak memory traced by tracemalloc in one extra
+run (Python and NumPy allocations in this process; sheet workers are not
+counted).
+
+Results are written as a JSON report; pass --compare with an earlier report to
+print the per-stage change.
+
+    python benchmarks/bench_pipeline.py --sizes 1000,10000,100000,1000000 --output bench_report.json
+    python benchmarks/bench_pipeline.py --sizes 1000,10000 --compare bench_report.json
+
+Writing a 1M-row .xlsx takes minutes and sheets above
+TREASURY_EXCEL_STREAMING_THRESHOLD_MB are analyzed in streaming mode (reported
+per result); use --format csv or parquet to benchmark the same sizes without
+Excel I/O.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(REPO_ROOT))
+
+from synthetic_workbook import parse_currency_mix, write_workbook  # noqa: E402
+from treasury_agent.tools.excel_analysis_tool import ANALYSIS_TYPES, ExcelAnalysisTool  # noqa: E402
+from treasury_agent.tools.excel_result_cache import excel_result_cache  # noqa: E402
+
+REPORT_VERSION = 1
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Median/min wall time over `repeat` runs plus the traced peak memory of one more run."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "samples_ms": [round(sample, 3) for sample in samples],
+        "peak_mb": round(peak / (1024 * 1024), 3),
+    }
+
+
+def pipeline_stages(path: Path, file_format: str, workdir: Path) -> Dict[str, Optional[Callable[[], Any]]]:
+    """Stage name -> callable (None when the stage does not apply or cannot be imported here)."""
+    tool = ExcelAnalysisTool()
+    stages: Dict[str, Optional[Callable[[], Any]]] = {
+        f"excel_analysis_{analysis_type}": (
+            lambda analysis_type=analysis_type: tool._run(file_path=str(path), analysis_type=analysis_type)
+        )
+        for analysis_type in ANALYSIS_TYPES
+    }
+
+    try:
+        # flask_server bootstraps env and imports the crew; the stub backend keeps it offline
+        os.environ.setdefault("TREASURY_LLM_BACKEND", "stub")
+        from flask_server import parse_agent_output_to_proposals
+    except ImportError as e:
+        print(f"⚠️ Skipping parse_agent_output_to_proposals: {e}")
+        stages["parse_proposals"] = None
+    else:
+        stages["parse_proposals"] = lambda: parse_agent_output_to_proposals(None, {}, excel_path=str(path))
+
+    try:
+        from tools_from_main.excel_azure_tools import ExcelReaderTools
+    except ImportError as e:
+        print(f"⚠️ Skipping ExcelReaderTools: {e}")
+        reader = None
+    else:
+        reader = ExcelReaderTools(upload_folder=str(workdir))
+    # ExcelReaderTools reads .xlsx/.xls/.csv only
+    supported = reader is not None and file_format in ("xlsx", "csv")
+    stages["reader_read_excel_file"] = (lambda: reader.read_excel_file(str(path))) if supported else None
+    stages["reader_analyze_excel_data"] = (lambda: reader.analyze_excel_data(str(path))) if supported else None
+    return stages
+
+
+def run_size(rows: int, args, workdir: Path) -> Dict[str, Any]:
+    path = workdir / f"ledger_{rows}.{args.format}"
+    started = time.perf_counter()
+    write_workbook(path, rows, args.sheets, null_ratio=args.null_ratio, currencies=parse_currency_mix(args.currencies),
+                   invalid_address_ratio=args.invalid_address_ratio, seed=args.seed)
+    result = {
+        "rows": rows,
+        "sheets": args.sheets if args.format == "xlsx" else 1,
+        "file_format": args.format,
+        "file_mb": round(path.stat().st_size / (1024 * 1024), 3),
+        "generate_ms": round((time.perf_counter() - started) * 1000, 3),
+        "stages": {},
+    }
+    tool = ExcelAnalysisTool()
+    result["analysis_mode"] = "streaming" if tool._use_streaming(str(path)) else "in_memory"
+    print(f"📊 {rows} rows ({result['file_mb']:.1f} MiB {args.format}, {result['analysis_mode']})")
+
+    for name, func in pipeline_stages(path, args.format, workdir).items():
+        if func is None:
+            result["stages"][name] = {"skipped": True}
+            continue
+        stage = measure(func, args.repeat)
+        result["stages"][name] = stage
+        print(f"   {name:36s} {stage['median_ms']:11.1f} ms  peak {stage['peak_mb']:9.1f} MiB")
+    path.unlink()
+    return result
+
+
+def environment() -> Dict[str, Any]:
+    versions = {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__}
+    for module in ("pyarrow", "openpyxl", "python_calamine", "xlsxwriter"):
+        try:
+            versions[module] = __import__(module).__version__
+        except (ImportError, AttributeError):
+            versions[module] = None
+    return {"platform": platform.platform(), "machine": platform.machine(), "cpus": os.cpu_count(), **versions}
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the median-time and peak-memory ratio of each stage present in both reports."""
+    previous = {(entry["rows"], entry["file_format"]): entry for entry in baseline.get("results", [])}
+    print(f"📈 Compared with {baseline.get('created_at', 'baseline')}")
+    for entry in report["results"]:
+        base = previous.get((entry["rows"], entry["file_format"]))
+        if base is None:
+            continue
+        for name, stage in entry["stages"].items():
+            before = base["stages"].get(name, {})
+            if stage.get("skipped") or before.get("skipped") or "median_ms" not in before:
+                continue
+            time_ratio = stage["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+            peak_ratio = stage["peak_mb"] / before["peak_mb"] if before["peak_mb"] else float("inf")
+            print(f"   {entry['rows']:>8d} {name:36s} time x{time_ratio:6.2f}  peak x{peak_ratio:6.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="comma-separated row counts")
+    parser.add_argument("--format", choices=("xlsx", "csv", "parquet"), default="xlsx")
+    parser.add_argument("--sheets", type=int, default=1, help="sheets per .xlsx workbook")
+    parser.add_argument("--null-ratio", type=float, default=0.02)
+    parser.add_argument("--currencies", default="USDT=0.7,USDC=0.2,ETH=0.1")
+    parser.add_argument("--invalid-address-ratio", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=Path("bench_report.json"))
+    parser.add_argument("--compare", type=Path, help="earlier report to compare against")
+    args = parser.parse_args()
+
+    excel_result_cache.enabled = False
+    sizes: List[int] = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = {
+        "suite": "excel_pipeline",
+        "version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment(),
+        "config": {
+            "sizes": sizes, "format": args.format, "sheets": args.sheets, "null_ratio": args.null_ratio,
+            "currencies": parse_currency_mix(args.currencies), "invalid_address_ratio": args.invalid_address_ratio,
+            "seed": args.seed, "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            report["results"].append(run_size(rows, args, Path(tmp)))
+
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"✅ Report written to {args.output}")
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Benchmark sheet profiling in ExcelAnalysisTool (no workbook I/O).
+
+Builds a sheet the way `_extract_excel_data` sees it (header=None, so the header
+row is row 0), times each profiling stage plus the financial analysis, and
+compares the traced peak memory of the columnar SheetColumns representation with
+the previous row-list plus record-dict copies.
+
+    python benchmarks/bench_sheet_profiling.py --rows 100000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from treasury_agent.tools.excel_analysis_tool import ExcelAnalysisTool  # noqa: E402
+from treasury_agent.tools.sheet_columns import SheetColumns  # noqa: E402
+
+
+def build_sheet(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    body = pd.DataFrame({
+        0: pd.date_range("2024-01-01", periods=rows, freq="min").strftime("%Y-%m-%d"),
+        1: [f"Vendor {i % 250}" for i in range(rows)],
+        2: rng.uniform(10, 25000, rows).round(2),
+        3: [f"${value:,.2f}" for value in rng.uniform(0, 50, rows)],
+        4: np.where(rng.random(rows) < 0.05, np.nan, rng.uniform(1e5, 1e6, rows).round(2)),
+    })
+    header = pd.DataFrame([["Date", "Recipient", "Payment Amount", "Fee", "Account Balance"]])
+    return pd.concat([header, body.astype(object)], ignore_index=True)
+
+
+def time_stage(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def traced_peak_mb(func) -> float:
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tool = ExcelAnalysisTool()
+    df = build_sheet(args.rows)
+    columns = SheetColumns.from_frame(df)
+    profile = tool._profile_numeric_columns(columns)
+    sheet_data, _ = tool._process_sheet(df, "comprehensive")
+
+    stages = {
+        "to_columns": lambda: SheetColumns.from_frame(df),
+        "numeric_profile": lambda: tool._profile_numeric_columns(columns),
+        "data_types": lambda: tool._analyze_data_types(columns, profile),
+        "missing_values": lambda: tool._identify_missing_values(columns),
+        "financial_analysis": lambda: tool._analyze_sheet_for_financial_data(sheet_data, "Sheet1"),
+        "emit_records": lambda: columns.records(),
+    }
+    print(f"📊 Sheet profiling, {args.rows} rows x {len(df.columns)} columns")
+    total = 0.0
+    for name, func in stages.items():
+        elapsed = time_stage(func, args.repeat)
+        total += elapsed
+        print(f"   {name:20s} {elapsed:9.1f} ms")
+    print(f"   {'total':20s} {total:9.1f} ms")
+
+    row_copies = traced_peak_mb(
+        lambda: (df.astype(object).where(df.notna(), None).to_numpy().tolist(), df.to_dict("records"))
+    )
+    columnar = traced_peak_mb(lambda: SheetColumns.from_frame(df))
+    print(f"   peak traced memory: rows + records {row_copies:8.1f} MiB, "
+          f"SheetColumns {columnar:8.1f} MiB ({columns.nbytes() / (1024 * 1024):.1f} MiB retained arrays)")
+
+
+if __name__ == "__main__":
+    main()
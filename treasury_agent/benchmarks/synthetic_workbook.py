@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Generate synthetic treasury ledgers for benchmarks.
+
+Produces payment ledgers with the columns documented for uploads (Date,
+Transaction_Type, Amount, Currency, Recipient, Purpose, Status) plus a running
+Balance, with a configurable number of rows and sheets, share of blank cells,
+currency mix and share of malformed recipient addresses. Output is .xlsx (one
+ledger per sheet), .csv or .parquet (first sheet only), chosen by extension.
+
+    python benchmarks/synthetic_workbook.py ledger.xlsx --rows 100000 --sheets 3 \
+        --null-ratio 0.02 --currencies USDT=0.7,USDC=0.2,ETH=0.1 --invalid-address-ratio 0.01
+"""
+
+import argparse
+import importlib.util
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CURRENCIES = {"USDT": 0.7, "USDC": 0.2, "ETH": 0.1}
+PURPOSES = ["Development services", "Marketing services", "Payroll", "Infrastructure", "Legal fees",
+            "Exchange rebalancing", "Grant disbursement", "Audit"]
+STATUSES = ["Pending", "Completed", "Failed"]
+# Columns that may be left blank (Transaction_Type always identifies the row)
+NULLABLE_COLUMNS = ["Date", "Amount", "Currency", "Recipient", "Purpose", "Status", "Balance"]
+
+
+def parse_currency_mix(spec: str) -> Dict[str, float]:
+    """'USDT=0.7,USDC=0.3' -> {'USDT': 0.7, 'USDC': 0.3}, normalized to sum to 1."""
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip().upper()] = float(weight) if weight else 1.0
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError(f"Currency weights must be positive: {spec}")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def _recipient_pool(rng: np.random.Generator, count: int) -> np.ndarray:
+    return np.array([f"0x{value:040x}" for value in rng.integers(0, 2**63, count, dtype=np.int64)], dtype=object)
+
+
+def _malformed(rng: np.random.Generator, addresses: np.ndarray) -> np.ndarray:
+    """Corrupt addresses the way hand-edited ledgers do: truncated, missing 0x, or non-hex characters."""
+    kinds = rng.integers(0, 3, len(addresses))
+    return np.array([
+        address[:30] if kind == 0 else address[2:] if kind == 1 else address[:-4] + "zzzz"
+        for address, kind in zip(addresses, kinds)
+    ], dtype=object)
+
+
+def build_ledger(rows: int, null_ratio: float = 0.0, currencies: Optional[Dict[str, float]] = None,
+                 invalid_address_ratio: float = 0.0, recipients: int = 5000, seed: int = 0) -> pd.DataFrame:
+    """One ledger sheet of `rows` transactions."""
+    rng = np.random.default_rng(seed)
+    currencies = currencies or DEFAULT_CURRENCIES
+    pool = _recipient_pool(rng, max(recipients, 1))
+    recipient = pool[rng.zipf(1.3, rows) % len(pool)]
+    invalid = rng.random(rows) < invalid_address_ratio
+    recipient[invalid] = _malformed(rng, recipient[invalid])
+
+    is_payment = rng.random(rows) < 0.85
+    amounts = rng.lognormal(mean=7.0, sigma=1.4, size=rows).round(2)
+    balance = 5e6 + np.cumsum(np.where(is_payment, -amounts, amounts))
+    ledger = pd.DataFrame({
+        "Date": (pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 365 * 86400, rows)), unit="s"))
+        .strftime("%Y-%m-%d"),
+        "Transaction_Type": np.where(is_payment, "Payment", rng.choice(["Deposit", "Refund"], rows)),
+        "Amount": amounts,
+        "Currency": rng.choice(list(currencies), rows, p=list(currencies.values())),
+        "Recipient": recipient,
+        "Purpose": rng.choice(PURPOSES, rows),
+        "Status": rng.choice(STATUSES, rows, p=[0.6, 0.37, 0.03]),
+        "Balance": balance.round(2),
+    })
+    if null_ratio > 0:
+        for column in NULLABLE_COLUMNS:
+            blank = rng.random(rows) < null_ratio
+            ledger[column] = ledger[column].where(~blank, None if ledger[column].dtype == object else np.nan)
+    return ledger
+
+
+def write_workbook(path: Path, rows: int, sheets: int = 1, **ledger_options) -> Path:
+    """Write `sheets` ledgers of `rows` rows to `path` (.xlsx, .csv or .parquet)."""
+    path = Path(path)
+    seed = ledger_options.pop("seed", 0)
+    suffix = path.suffix.lower()
+    if suffix in (".csv", ".parquet"):
+        ledger = build_ledger(rows, seed=seed, **ledger_options)
+        if suffix == ".csv":
+            ledger.to_csv(path, index=False)
+        else:
+            ledger.to_parquet(path, index=False)
+        return path
+    if suffix not in (".xlsx", ".xlsm"):
+        raise ValueError(f"Unsupported output format: {suffix}")
+    # xlsxwriter writes large sheets several times faster than openpyxl
+    engine = "xlsxwriter" if importlib.util.find_spec("xlsxwriter") else "openpyxl"
+    with pd.ExcelWriter(path, engine=engine) as writer:
+        for index in range(sheets):
+            build_ledger(rows, seed=seed + index, **ledger_options).to_excel(
+                writer, sheet_name=f"Ledger{index + 1}", index=False
+            )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--rows", type=int, default=10_000, help="rows per sheet")
+    parser.add_argument("--sheets", type=int, default=1)
+    parser.add_argument("--null-ratio", type=float, default=0.0)
+    parser.add_argument("--currencies", default="USDT=0.7,USDC=0.2,ETH=0.1")
+    parser.add_argument("--invalid-address-ratio", type=float, default=0.0)
+    parser.add_argument("--recipients", type=int, default=5000, help="distinct recipient addresses")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    path = write_workbook(
+        args.output, args.rows, args.sheets, null_ratio=args.null_ratio,
+        currencies=parse_currency_mix(args.currencies), invalid_address_ratio=args.invalid_address_ratio,
+        recipients=args.recipients, seed=args.seed,
+    )
+    print(f"✅ Wrote {path} ({path.stat().st_size / (1024 * 1024):.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
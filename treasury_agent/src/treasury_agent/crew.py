@@ -1,8 +1,11 @@
 from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+import contextvars
 import os
+import threading
 
 # Import the real tools for treasury agents (PROTOTYPE VERSION)
 # from treasury_agent.tools.mock_market_data import MockMarketDataTool
@@ -12,6 +15,40 @@ import os
 from .tools.excel_analysis_tool import ExcelAnalysisTool
 from .tools.treasury_usdt_payment_tool import TreasuryUSDTPaymentTool
 from .tools.treasury_risk_tools import TreasuryRiskTools
+from .run_context import DeadlineExceeded, RunContext, run_scope
+from .crew_factory import crew_factory
+from .llm_hooks import RunAwareLLM
+from .trace import save_trace_async, start_recording
+
+BEDROCK_MODEL = "bedrock/amazon.nova-micro-v1:0"
+
+
+def build_llm(temperature: float = 0.3, max_tokens: int = 2000):
+    """
+    Create the LLM for an agent from the configured backend.
+
+    TREASURY_LLM_BACKEND selects the backend: 'bedrock' (default) uses CrewAI's LLM
+    against Bedrock; 'stub' uses the offline StubLLM so orchestration, tools,
+    server and parsing can be benchmarked without network access. The backend is
+    wrapped in RunAwareLLM so calls stop once the current run's deadline passes;
+    TREASURY_LLM_TIMEOUT bounds a single in-flight Bedrock call.
+    """
+    backend = os.getenv("TREASURY_LLM_BACKEND", "bedrock").lower()
+    if backend == "stub":
+        from .stub_llm import StubLLM
+        return RunAwareLLM(StubLLM(temperature=temperature))
+    if backend != "bedrock":
+        raise ValueError(f"Unknown TREASURY_LLM_BACKEND '{backend}'. Supported: bedrock, stub")
+
+    llm_kwargs = {}
+    if os.getenv("TREASURY_LLM_TIMEOUT"):
+        llm_kwargs["timeout"] = float(os.getenv("TREASURY_LLM_TIMEOUT"))
+    return RunAwareLLM(LLM(
+        model=BEDROCK_MODEL,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **llm_kwargs
+    ))
 
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
@@ -31,12 +68,8 @@ class TreasuryAgent():
     # Treasury Manager - Coordinates the team (no tools for manager in hierarchical process)
     @agent
     def treasury_manager(self) -> Agent:
-        # Create LLM instance for the manager using CrewAI's LLM class
-        manager_llm = LLM(
-            model="bedrock/amazon.nova-micro-v1:0",
-            temperature=0.3,
-            max_tokens=2000
-        )
+        # Create LLM instance for the manager from the configured backend (Bedrock or offline stub)
+        manager_llm = build_llm(temperature=0.3, max_tokens=2000)
         
         return Agent(
             config=self.agents_config['treasury_manager'], # type: ignore[index]
@@ -48,12 +81,8 @@ class TreasuryAgent():
     # Payment Specialist - Handles payment processing and routing
     @agent
     def payment_specialist(self) -> Agent:
-        # Create LLM instance for the payment specialist using CrewAI's LLM class
-        specialist_llm = LLM(
-            model="bedrock/amazon.nova-micro-v1:0",
-            temperature=0.3,
-            max_tokens=2000
-        )
+        # Create LLM instance for the payment specialist from the configured backend (Bedrock or offline stub)
+        specialist_llm = build_llm(temperature=0.3, max_tokens=2000)
         
         return Agent(
             config=self.agents_config['payment_specialist'], # type: ignore[index]
@@ -91,12 +120,8 @@ class TreasuryAgent():
     # Risk Assessor - Handles compliance and balance validation
     @agent
     def risk_assessor(self) -> Agent:
-        # Create LLM instance for the risk assessor using CrewAI's LLM class
-        assessor_llm = LLM(
-            model="bedrock/amazon.nova-micro-v1:0",
-            temperature=0.3,
-            max_tokens=2000
-        )
+        # Create LLM instance for the risk assessor from the configured backend (Bedrock or offline stub)
+        assessor_llm = build_llm(temperature=0.3, max_tokens=2000)
         
         return Agent(
             config=self.agents_config['risk_assessor'], # type: ignore[index]
@@ -113,13 +138,16 @@ class TreasuryAgent():
     # To learn more about structured task outputs,
     # task dependencies, and task callbacks, check out the documentation:
     # https://docs.crewai.com/concepts/tasks#overview-of-a-task
+    #
+    # Tasks no longer set output_file: concurrent requests raced on the shared
+    # output/*.md files. Outputs are captured in memory per run by RunContext and
+    # attached to the proposal (optionally persisted per proposal in the background).
     
     # Treasury Coordination Task - Manager coordinates the team
     @task
     def treasury_coordination_task(self) -> Task:
         return Task(
             config=self.tasks_config['treasury_coordination_task'], # type: ignore[index]
-            output_file='output/treasury_report.md'
         )
 
     # Payment Processing Task - Specialist analyzes payment options
@@ -127,7 +155,6 @@ class TreasuryAgent():
     def payment_processing_task(self) -> Task:
         return Task(
             config=self.tasks_config['payment_processing_task'], # type: ignore[index]
-            output_file='output/payment_analysis.md'
         )
 
     # Market Analysis Task - Specialist analyzes investment opportunities (COMMENTED OUT FOR PROTOTYPE)
@@ -143,7 +170,6 @@ class TreasuryAgent():
     def risk_assessment_task(self) -> Task:
         return Task(
             config=self.tasks_config['risk_assessment_task'], # type: ignore[index]
-            output_file='output/risk_assessment.md'
         )
 
     # Final Treasury Report Task - Manager synthesizes all specialist work
@@ -151,7 +177,6 @@ class TreasuryAgent():
     def final_treasury_report_task(self) -> Task:
         return Task(
             config=self.tasks_config['final_treasury_report_task'], # type: ignore[index]
-            output_file='output/final_treasury_report.md'
         )
 
     @crew
@@ -160,12 +185,8 @@ class TreasuryAgent():
         # To learn how to add knowledge sources to your crew, check out the documentation:
         # https://docs.crewai.com/concepts/knowledge#what-is-knowledge
 
-        # Create the LLM instance for the manager using CrewAI's LLM class
-        manager_llm = LLM(
-            model="bedrock/amazon.nova-micro-v1:0",
-            temperature=0.3,  # Slightly higher for better reasoning
-            max_tokens=2000   # More tokens for complex coordination tasks
-        )
+        # Create the LLM instance for the manager from the configured backend
+        manager_llm = build_llm(temperature=0.3, max_tokens=2000)
 
         return Crew(
             agents=[
@@ -180,3 +201,86 @@ class TreasuryAgent():
             max_iterations=1,
             # Manager will coordinate specialist agents for payment processing (PROTOTYPE VERSION)
         )
+
+
+def run_treasury_crew(inputs: Dict[str, Any], run: Optional[RunContext] = None) -> Tuple[Any, RunContext]:
+    """
+    Clone the cached treasury crew template and kick it off inside a RunContext.
+
+    Task outputs (`run.task_outputs`) and task/tool spans (`run.diagnostics`) are
+    recorded even if the kickoff raises, so callers can attach partial results to
+    fallback proposals.
+
+    When the run has a deadline the kickoff executes on a worker thread and this
+    call waits at most until the deadline. On expiry the run is cancelled (its
+    next LLM call, tool call or agent step raises DeadlineExceeded, so the worker
+    unwinds on its own) and DeadlineExceeded is raised here; the outputs of tasks
+    that completed in time stay on `run.task_outputs`. The worker may still be
+    finishing an in-flight LLM or tool call; use `run.when_released` to clean up
+    inputs it could be reading.
+
+    With TREASURY_RECORD_DIR set, the run's LLM turns and tool calls are written
+    to a trace file in the background (see trace.py) for later replay; after a
+    deadline, only once the kickoff worker has exited.
+    """
+    run = run or RunContext()
+    crew, construction = crew_factory.create_crew()
+    run.diagnostics.crew_construction = construction
+    run.attach(crew)
+    if run.recorder is None and run.replayer is None:
+        run.recorder = start_recording(run.run_id, inputs)
+
+    with run_scope(run):
+        run.diagnostics.start()
+        result, error = None, None
+        try:
+            if run.deadline is None:
+                result = crew.kickoff(inputs=inputs)
+            else:
+                result = _kickoff_with_deadline(crew, inputs, run)
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            run.diagnostics.finish()
+            run.diagnostics.emit_metrics()
+            if run.recorder is not None:
+                # After a deadline the kickoff worker may still be recording; snapshot the trace once it exits
+                recorder, output = run.recorder, str(result) if result is not None else None
+                run.when_released(
+                    lambda: save_trace_async(recorder, run.completed_task_outputs(), output, error)
+                )
+
+    return result, run
+
+
+def _kickoff_with_deadline(crew: Crew, inputs: Dict[str, Any], run: RunContext) -> Any:
+    """Run kickoff on a daemon thread (with this run's context) and wait until the deadline."""
+    future: Future = Future()
+    context = contextvars.copy_context()
+
+    def _kickoff():
+        try:
+            future.set_result(context.run(crew.kickoff, inputs=inputs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            run.worker_finished()
+
+    run.worker_started()
+    threading.Thread(target=_kickoff, name=f"crew-kickoff-{run.run_id[:8]}", daemon=True).start()
+    try:
+        return future.result(timeout=run.remaining())
+    except FutureTimeoutError:
+        run.cancel()
+    except Exception:
+        # A DeadlineExceeded raised inside the crew may surface wrapped by CrewAI
+        if not run.cancelled:
+            raise
+
+    completed = list(run.completed_task_outputs())
+    run.diagnostics.record_deadline_exceeded(run.deadline_s, completed)
+    raise DeadlineExceeded(
+        f"Crew run {run.run_id} exceeded its {run.deadline_s:.1f}s deadline "
+        f"({len(completed)} task(s) completed: {', '.join(completed) or 'none'})"
+    )
@@ -0,0 +1,128 @@
+"""
+Cached crew construction.
+
+Building TreasuryAgent().crew() re-reads and re-templates agents.yaml and
+tasks.yaml and instantiates every Agent, Task, tool and LLM. CrewFactory does
+that once, keeps the resulting crew as an immutable template, and hands out a
+`Crew.copy()` per request; kickoff interpolates inputs into the copy only. The
+template is rebuilt when either YAML file changes on disk.
+
+Copies share the template's tool and LLM instances, so tools must not keep
+per-request state on the instance without locking.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+from .metrics import metrics
+
+
+CONFIG_DIR = Path(__file__).parent / "config"
+
+REQUIRED_AGENTS = ("treasury_manager", "payment_specialist", "risk_assessor")
+REQUIRED_TASKS = (
+    "treasury_coordination_task",
+    "payment_processing_task",
+    "risk_assessment_task",
+    "final_treasury_report_task",
+)
+REQUIRED_TASK_FIELDS = ("description", "expected_output")
+
+
+def validate_crew_config(agents_config: Dict[str, Any], tasks_config: Dict[str, Any]) -> None:
+    """Raise ValueError if the YAML configuration is missing anything the crew needs."""
+    if not isinstance(agents_config, dict) or not isinstance(tasks_config, dict):
+        raise ValueError("agents.yaml and tasks.yaml must each define a mapping")
+
+    missing_agents = [name for name in REQUIRED_AGENTS if name not in agents_config]
+    if missing_agents:
+        raise ValueError(f"agents.yaml is missing agents: {', '.join(missing_agents)}")
+
+    missing_tasks = [name for name in REQUIRED_TASKS if name not in tasks_config]
+    if missing_tasks:
+        raise ValueError(f"tasks.yaml is missing tasks: {', '.join(missing_tasks)}")
+
+    for name in REQUIRED_TASKS:
+        missing_fields = [field for field in REQUIRED_TASK_FIELDS if not tasks_config[name].get(field)]
+        if missing_fields:
+            raise ValueError(f"Task '{name}' is missing fields: {', '.join(missing_fields)}")
+        for dependency in tasks_config[name].get("context", []) or []:
+            if dependency not in tasks_config:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dependency}'")
+
+
+class CrewFactory:
+    """Builds the treasury crew template once and clones it per request."""
+
+    def __init__(self, config_dir: Optional[Path] = None):
+        self._config_dir = Path(config_dir) if config_dir else CONFIG_DIR
+        self._lock = threading.Lock()
+        self._template = None
+        self._template_mtimes: Optional[Tuple[float, float]] = None
+
+    def _config_mtimes(self) -> Tuple[float, float]:
+        return (
+            (self._config_dir / "agents.yaml").stat().st_mtime,
+            (self._config_dir / "tasks.yaml").stat().st_mtime,
+        )
+
+    def _build_template(self):
+        """Parse and validate the YAML, then build the crew through CrewBase."""
+        with open(self._config_dir / "agents.yaml", "r") as f:
+            agents_config = yaml.safe_load(f)
+        with open(self._config_dir / "tasks.yaml", "r") as f:
+            tasks_config = yaml.safe_load(f)
+        validate_crew_config(agents_config, tasks_config)
+
+        # Imported here to avoid a circular import with crew.py
+        from .crew import TreasuryAgent
+        return TreasuryAgent().crew()
+
+    def template(self) -> Tuple[Any, bool]:
+        """Return the current template crew and whether it was (re)built by this call."""
+        mtimes = self._config_mtimes()
+        template = self._template
+        if template is not None and mtimes == self._template_mtimes:
+            return template, False
+
+        with self._lock:
+            if self._template is not None and mtimes == self._template_mtimes:
+                return self._template, False
+            started = time.perf_counter()
+            self._template = self._build_template()
+            self._template_mtimes = mtimes
+            build_ms = (time.perf_counter() - started) * 1000
+            metrics.observe("crew_template_build_ms", build_ms)
+            print(f"🧩 Built crew template from YAML in {build_ms:.1f} ms")
+            return self._template, True
+
+    def create_crew(self) -> Tuple[Any, Dict[str, Any]]:
+        """Return a fresh crew for one request plus construction timings."""
+        started = time.perf_counter()
+        template, rebuilt = self.template()
+        cloned = time.perf_counter()
+        crew = template.copy()
+        finished = time.perf_counter()
+
+        construction = {
+            "template_rebuilt": rebuilt,
+            "template_ms": round((cloned - started) * 1000, 2),
+            "clone_ms": round((finished - cloned) * 1000, 2),
+            "total_ms": round((finished - started) * 1000, 2),
+        }
+        metrics.observe("crew_construction_ms", construction["total_ms"], template_rebuilt=rebuilt)
+        return crew, construction
+
+    def invalidate(self) -> None:
+        """Force the next request to rebuild the template."""
+        with self._lock:
+            self._template = None
+            self._template_mtimes = None
+
+
+# Process-wide factory used by run_treasury_crew
+crew_factory = CrewFactory()
@@ -0,0 +1,190 @@
+"""
+Per-run diagnostics for crew executions.
+
+RunDiagnostics records one span per crew task (wall time plus prompt/completion
+token deltas) and one span per tool invocation (tool, action, argument size,
+duration). The result is attached to proposals under `diagnostics` and pushed to
+the process metrics registry so slow tasks and expensive Bedrock calls can be
+found per request.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .metrics import metrics
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+def _usage_snapshot(crew) -> Dict[str, int]:
+    """Read cumulative token usage from all crew agents (manager included)."""
+    try:
+        usage = crew.calculate_usage_metrics()
+        return {
+            "prompt_tokens": int(getattr(usage, "prompt_tokens", 0) or 0),
+            "completion_tokens": int(getattr(usage, "completion_tokens", 0) or 0),
+            "total_tokens": int(getattr(usage, "total_tokens", 0) or 0),
+            "successful_requests": int(getattr(usage, "successful_requests", 0) or 0),
+        }
+    except Exception:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "successful_requests": 0}
+
+
+def _usage_delta(after: Dict[str, int], before: Dict[str, int]) -> Dict[str, int]:
+    return {key: max(0, after.get(key, 0) - before.get(key, 0)) for key in after}
+
+
+class RunDiagnostics:
+    """Collects task and tool spans for a single crew kickoff."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._crew = None
+        self._run_started: Optional[float] = None
+        self._run_finished: Optional[float] = None
+        self._task_started: Optional[float] = None
+        self._usage_baseline: Dict[str, int] = {}
+        self._current_task: Optional[str] = None
+        self._task_names: List[str] = []
+        self.tasks: List[Dict[str, Any]] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.totals: Dict[str, int] = {}
+        self.crew_construction: Dict[str, Any] = {}
+        self.tool_cache = None
+        self.deadline: Dict[str, Any] = {}
+
+    def attach(self, crew) -> None:
+        """
+        Register task callbacks on a freshly built crew.
+
+        Tasks in the hierarchical process run one after another, so a task starts
+        when the previous one completes; token usage per task is the delta of the
+        crew's cumulative usage between those two points.
+        """
+        self._crew = crew
+        task_names = []
+        for index, task in enumerate(crew.tasks):
+            task_name = getattr(task, "name", None) or f"task_{index}"
+            task_names.append(task_name)
+            task.callback = self._make_task_callback(task_name, getattr(task, "callback", None))
+        self._current_task = task_names[0] if task_names else None
+        self._task_names = task_names
+
+    def _make_task_callback(self, task_name: str, previous_callback):
+        def _on_task_completed(task_output):
+            self.record_task_completed(task_name)
+            if previous_callback:
+                previous_callback(task_output)
+        return _on_task_completed
+
+    def start(self) -> None:
+        """Mark the beginning of the kickoff."""
+        now = time.time()
+        self._run_started = now
+        self._task_started = now
+        self._usage_baseline = _usage_snapshot(self._crew) if self._crew is not None else {}
+
+    def record_task_completed(self, task_name: str) -> None:
+        """Close the span for `task_name` and open the next one."""
+        now = time.time()
+        usage = _usage_snapshot(self._crew) if self._crew is not None else {}
+        with self._lock:
+            started = self._task_started or now
+            delta = _usage_delta(usage, self._usage_baseline) if usage else {}
+            self.tasks.append({
+                "task": task_name,
+                "started_at": _iso(started),
+                "ended_at": _iso(now),
+                "duration_ms": round((now - started) * 1000, 2),
+                "input_tokens": delta.get("prompt_tokens", 0),
+                "output_tokens": delta.get("completion_tokens", 0),
+                "llm_requests": delta.get("successful_requests", 0),
+                "tool_calls": sum(1 for call in self.tool_calls if call["task"] == task_name),
+            })
+            self._usage_baseline = usage
+            self._task_started = now
+            position = self._task_names.index(task_name) if task_name in self._task_names else -1
+            next_position = position + 1
+            self._current_task = self._task_names[next_position] if 0 <= position and next_position < len(self._task_names) else None
+
+    def record_tool_call(self, tool_name: str, action: Optional[str], args_size: int,
+                         started_at: float, duration: float, error: Optional[str] = None,
+                         cached: bool = False) -> None:
+        """Record one tool invocation under the task that is currently running."""
+        with self._lock:
+            self.tool_calls.append({
+                "task": self._current_task,
+                "tool": tool_name,
+                "action": action,
+                "args_bytes": args_size,
+                "started_at": _iso(started_at),
+                "ended_at": _iso(started_at + duration),
+                "duration_ms": round(duration * 1000, 2),
+                "cached": cached,
+                "error": error,
+            })
+
+    def record_deadline_exceeded(self, budget_s: Optional[float], completed_tasks: List[str]) -> None:
+        """Note that the run was cut off at its deadline and which tasks had completed."""
+        self.deadline = {"budget_s": budget_s, "exceeded": True, "completed_tasks": list(completed_tasks)}
+        metrics.increment("crew_deadline_exceeded_total")
+
+    def finish(self) -> None:
+        """Mark the end of the kickoff and compute run totals."""
+        self._run_finished = time.time()
+        usage = _usage_snapshot(self._crew) if self._crew is not None else {}
+        self.totals = {
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+            "llm_requests": usage.get("successful_requests", 0),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the run for the proposal `diagnostics` field."""
+        with self._lock:
+            started = self._run_started
+            finished = self._run_finished or time.time()
+            return {
+                "run_id": self.run_id,
+                "started_at": _iso(started) if started else None,
+                "ended_at": _iso(finished) if started else None,
+                "duration_ms": round((finished - started) * 1000, 2) if started else 0.0,
+                "totals": dict(self.totals),
+                "crew_construction": dict(self.crew_construction),
+                "deadline": dict(self.deadline),
+                "tasks": list(self.tasks),
+                "tool_calls": list(self.tool_calls),
+                "tool_cache": self.tool_cache.stats() if self.tool_cache is not None else {},
+            }
+
+    def emit_metrics(self) -> None:
+        """Push task, token and tool series into the process metrics registry."""
+        with self._lock:
+            tasks = list(self.tasks)
+            tool_calls = list(self.tool_calls)
+        for task in tasks:
+            metrics.observe("crew_task_duration_ms", task["duration_ms"], task=task["task"])
+            metrics.observe("crew_task_input_tokens", task["input_tokens"], task=task["task"])
+            metrics.observe("crew_task_output_tokens", task["output_tokens"], task=task["task"])
+        for call in tool_calls:
+            if call["cached"]:
+                metrics.increment("tool_memo_hits_total", tool=call["tool"], action=call["action"] or "")
+                continue
+            metrics.observe("tool_call_duration_ms", call["duration_ms"], tool=call["tool"], action=call["action"] or "")
+            metrics.observe("tool_call_args_bytes", call["args_bytes"], tool=call["tool"], action=call["action"] or "")
+            if call["error"]:
+                metrics.increment("tool_call_errors_total", tool=call["tool"], action=call["action"] or "")
+        cache_stats = self.tool_cache.stats() if self.tool_cache is not None else {}
+        if cache_stats.get("hits", 0) + cache_stats.get("misses", 0):
+            metrics.observe("tool_memo_hit_rate", cache_stats["hit_rate"])
+        if self._run_started and self._run_finished:
+            metrics.observe("crew_run_duration_ms", (self._run_finished - self._run_started) * 1000)
+        if self.totals:
+            metrics.increment("crew_input_tokens_total", self.totals.get("input_tokens", 0))
+            metrics.increment("crew_output_tokens_total", self.totals.get("output_tokens", 0))
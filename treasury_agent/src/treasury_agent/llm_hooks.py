@@ -0,0 +1,60 @@
+"""
+Run-aware wrapper around the agents' LLM backend.
+
+RunAwareLLM delegates every call to the configured backend (Bedrock LLM or
+StubLLM) but first consults the current RunContext, so a run that passed its
+deadline or was cancelled stops issuing new model calls. It is also where LLM
+turns are added to a run's trace and where a replayed run gets its recorded
+responses instead of calling the backend.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import BaseLLM
+
+from .run_context import current_run
+
+
+class RunAwareLLM(BaseLLM):
+    """Delegating LLM that enforces the current run's deadline before each call."""
+
+    def __init__(self, inner: BaseLLM):
+        super().__init__(model=getattr(inner, "model", "unknown"), temperature=getattr(inner, "temperature", None))
+        self._inner = inner
+
+    def call(self, messages: Union[str, List[Dict[str, str]]], tools: Optional[List[dict]] = None,
+             callbacks: Optional[List[Any]] = None, available_functions: Optional[Dict[str, Any]] = None,
+             **kwargs) -> Union[str, Any]:
+        run = current_run()
+        if run is not None:
+            run.check_deadline()
+            if run.replayer is not None:
+                return run.replayer.next_llm_response(messages)
+
+        # Agent executors set stop words on the LLM they were given; pass them through
+        if getattr(self, "stop", None):
+            self._inner.stop = self.stop
+
+        started = time.perf_counter()
+        response = self._inner.call(
+            messages, tools=tools, callbacks=callbacks, available_functions=available_functions, **kwargs
+        )
+        if run is not None and run.recorder is not None:
+            run.recorder.record_llm(self.model, messages, response, time.perf_counter() - started)
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return self._inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self._inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self._inner.get_context_window_size()
+
+    def __getattr__(self, name: str):
+        # Only reached for attributes not defined on the wrapper (e.g. max_tokens)
+        if name == "_inner":
+            raise AttributeError(name)
+        return getattr(self._inner, name)
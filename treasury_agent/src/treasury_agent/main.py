@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+import json
 import sys
 import warnings
 
@@ -66,3 +67,17 @@ def test():
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
+
+def replay_trace():
+    """
+    Re-run the crew orchestration from a recorded trace file and print timings.
+    Usage: replay_trace <trace.jsonl.gz> [speed]  (speed 1 = real time, 0 = as fast as possible)
+    """
+    from treasury_agent.trace import replay_trace as replay_recorded_trace
+
+    try:
+        speed = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+        report = replay_recorded_trace(sys.argv[1], speed=speed)
+        print(json.dumps(report, indent=2))
+    except Exception as e:
+        raise Exception(f"An error occurred while replaying the trace: {e}")
@@ -0,0 +1,74 @@
+"""
+In-process metrics registry for the treasury agent.
+
+Counters and timing summaries are kept per (name, labels) pair and exposed by the
+Flask server at GET /metrics. This is intentionally dependency free; a Prometheus
+exporter can read `metrics.snapshot()` later without touching the call sites.
+"""
+
+import threading
+from typing import Any, Dict, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters and summaries (count/sum/min/max)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._summaries: Dict[str, Dict[LabelKey, Dict[str, float]]] = {}
+
+    def increment(self, name: str, value: float = 1.0, **labels) -> None:
+        """Add `value` to the counter `name` for the given labels."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record one observation (e.g. a duration or token count) for `name`."""
+        key = _label_key(labels)
+        value = float(value)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.get(key)
+            if summary is None:
+                series[key] = {"count": 1, "sum": value, "min": value, "max": value}
+            else:
+                summary["count"] += 1
+                summary["sum"] += value
+                summary["min"] = min(summary["min"], value)
+                summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable copy of every series."""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            summaries = {}
+            for name, series in self._summaries.items():
+                summaries[name] = []
+                for key, summary in series.items():
+                    entry = {"labels": dict(key), **summary}
+                    entry["avg"] = summary["sum"] / summary["count"] if summary["count"] else 0.0
+                    summaries[name].append(entry)
+        return {"counters": counters, "summaries": summaries}
+
+    def reset(self) -> None:
+        """Drop all recorded series."""
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+# Process-wide registry used by the crew, the tools and the server
+metrics = MetricsRegistry()
@@ -0,0 +1,186 @@
+"""
+Per-run context shared by the crew, its tools and the server.
+
+A RunContext is installed in a context variable for the duration of one crew
+kickoff so that tools and LLM wrappers (which CrewAI instantiates without any
+request handle) can find the diagnostics, cache and deadline of the run they
+belong to.
+"""
+
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .diagnostics import RunDiagnostics
+
+
+class DeadlineExceeded(Exception):
+    """Raised inside a crew run once its deadline has passed or it was cancelled."""
+
+
+class ToolCallCache:
+    """Memoized results of read-only tool calls within one run, with hit/miss counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                return True, self._results[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._results[key] = value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._results),
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class RunContext:
+    """State scoped to a single crew run."""
+
+    def __init__(self, run_id: Optional[str] = None, deadline_s: Optional[float] = None):
+        self.run_id = run_id or str(uuid.uuid4())
+        self.diagnostics = RunDiagnostics(self.run_id)
+        self.tool_cache = ToolCallCache()
+        self.diagnostics.tool_cache = self.tool_cache
+        self._lock = threading.Lock()
+        self.task_outputs: Dict[str, Dict[str, Any]] = {}
+        self.deadline_s = deadline_s if deadline_s and deadline_s > 0 else None
+        self.deadline: Optional[float] = time.monotonic() + self.deadline_s if self.deadline_s else None
+        self._cancelled = threading.Event()
+        # A kickoff worker thread (crew._kickoff_with_deadline) may outlive the request after a deadline
+        self._worker_running = False
+        self._release_callbacks: List[Callable[[], None]] = []
+        # Set by trace.py: a RunRecorder captures this run, a TraceReplayer replays one
+        self.recorder = None
+        self.replayer = None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (never negative), or None without a deadline."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def time_budget(self, default: float) -> float:
+        """Clamp a timeout (e.g. for an HTTP call) to the time left in this run."""
+        remaining = self.remaining()
+        return default if remaining is None else max(0.001, min(default, remaining))
+
+    def cancel(self) -> None:
+        """Ask the crew to stop at its next LLM call, tool call or agent step."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def worker_started(self) -> None:
+        """Mark that a kickoff worker thread of this run is running."""
+        with self._lock:
+            self._worker_running = True
+
+    def worker_finished(self) -> None:
+        """Mark the kickoff worker as exited and run the callbacks waiting for it."""
+        with self._lock:
+            self._worker_running = False
+            callbacks, self._release_callbacks = self._release_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def when_released(self, callback: Callable[[], None]) -> None:
+        """
+        Call `callback` once no thread of this run is still working: right away, or
+        when a kickoff worker that outlived its deadline exits. Use it to clean up
+        run inputs (e.g. temp files) a cancelled crew may still be reading.
+        """
+        with self._lock:
+            if self._worker_running:
+                self._release_callbacks.append(callback)
+                return
+        callback()
+
+    def check_deadline(self) -> None:
+        """Raise DeadlineExceeded if this run was cancelled or ran out of time."""
+        if self._cancelled.is_set():
+            raise DeadlineExceeded(f"Run {self.run_id} was cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self._cancelled.set()
+            raise DeadlineExceeded(f"Run {self.run_id} exceeded its {self.deadline_s:.1f}s deadline")
+
+    def attach(self, crew) -> None:
+        """Wire task output capture, deadline checks and diagnostics into a freshly built crew."""
+        for index, task in enumerate(crew.tasks):
+            task_name = getattr(task, "name", None) or f"task_{index}"
+            task.callback = self._make_output_callback(task_name, getattr(task, "callback", None))
+
+        # Agents call step_callback after every reasoning step; raising there stops
+        # a looping manager delegation once the deadline has passed.
+        agents = list(crew.agents) + ([crew.manager_agent] if getattr(crew, "manager_agent", None) else [])
+        for agent in agents:
+            agent.step_callback = self._make_step_callback(getattr(agent, "step_callback", None))
+        self.diagnostics.attach(crew)
+
+    def _make_step_callback(self, previous_callback):
+        def _check_step(step_output):
+            self.check_deadline()
+            if previous_callback:
+                previous_callback(step_output)
+        return _check_step
+
+    def _make_output_callback(self, task_name: str, previous_callback):
+        def _capture_output(task_output):
+            self.record_task_output(task_name, task_output)
+            if previous_callback:
+                previous_callback(task_output)
+        return _capture_output
+
+    def record_task_output(self, task_name: str, task_output) -> None:
+        """Keep the output of a completed task in memory for this run."""
+        with self._lock:
+            self.task_outputs[task_name] = {
+                "agent": getattr(task_output, "agent", None),
+                "raw": getattr(task_output, "raw", None) or str(task_output),
+            }
+
+    def completed_task_outputs(self) -> Dict[str, Dict[str, Any]]:
+        """Return a copy of the task outputs captured so far."""
+        with self._lock:
+            return dict(self.task_outputs)
+
+
+_current_run: contextvars.ContextVar[Optional[RunContext]] = contextvars.ContextVar(
+    "treasury_current_run", default=None
+)
+
+
+def current_run() -> Optional[RunContext]:
+    """Return the RunContext of the crew run executing in this context, if any."""
+    return _current_run.get()
+
+
+@contextmanager
+def run_scope(run: RunContext) -> Iterator[RunContext]:
+    """Make `run` the current run for the enclosed block."""
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
@@ -0,0 +1,252 @@
+"""
+Offline stub LLM backend for benchmarking crew orchestration.
+
+StubLLM answers CrewAI agent turns from scripted rules instead of calling Bedrock.
+It speaks the ReAct text protocol CrewAI agents parse (Thought / Action /
+Action Input / Final Answer), so tool and delegation turns run the real tools and
+the real orchestration; only the model is replaced. Artificial latency can be
+injected to approximate production response times.
+
+Select it with TREASURY_LLM_BACKEND=stub. Optional settings:
+    TREASURY_STUB_LLM_SCRIPT   path to a JSON file with {"rules": [...], "latency": "..."}
+    TREASURY_STUB_LLM_LATENCY  none | fixed:<s> | uniform:<lo>,<hi> | lognormal:<mu>,<sigma>
+    TREASURY_STUB_LLM_SEED     seed for the latency generator
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import BaseLLM
+
+
+# Rules are matched in order against the agent role (parsed from the system prompt)
+# and the task text. Each rule lists the tool turns to take before the final answer.
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "role": "treasury_manager",
+        "task_contains": "You are the Payment Specialist",
+        "steps": [{
+            "tool": "Delegate work to coworker",
+            "input": {
+                "task": "Analyze payment routing options and provide execution recommendations for this request.",
+                "context": "$REQUEST",
+                "coworker": "payment_specialist",
+            },
+        }],
+        "final_answer": "Payment proposal from the payment specialist:\n$OBSERVATION",
+    },
+    {
+        "role": "treasury_manager",
+        "task_contains": "You are the Risk Assessor",
+        "steps": [{
+            "tool": "Delegate work to coworker",
+            "input": {
+                "task": "Please assess the risk for this payment request and check if it maintains minimum balance and meets transaction limits.",
+                "context": "$REQUEST",
+                "coworker": "risk_assessor",
+            },
+        }],
+        "final_answer": "Risk assessment from the risk assessor:\n$OBSERVATION",
+    },
+    {
+        "role": "treasury_manager",
+        "steps": [],
+        "final_answer": "Treasury coordination complete. Payment and risk specialists consulted; proposal ready for user approval.",
+    },
+    {
+        "role": "payment_specialist",
+        "steps": [
+            {"tool": "Excel Analysis Tool", "input": {"file_path": "$EXCEL_PATH", "analysis_type": "payment_focused"}},
+            {"tool": "USDT Payment Tool", "input": {"action": "estimate_gas"}},
+        ],
+        "final_answer": "Recommended method: USDT on Ethereum. Execution plan prepared for user approval.\n$OBSERVATION",
+    },
+    {
+        "role": "risk_assessor",
+        "steps": [
+            {"tool": "Treasury Risk Tools", "input": {"action": "assess_risk", "amount": "$AMOUNT", "treasury_request": "$REQUEST"}},
+        ],
+        "final_answer": "Decision: APPROVE\n$OBSERVATION",
+    },
+]
+
+_ROLE_PATTERN = re.compile(r"You are ([^.\n]+)\.")
+_EXCEL_PATTERN = re.compile(r"Excel file: (\S+?)\.?(?:\s|$)")
+_AMOUNT_PATTERNS = [
+    re.compile(r"\$\s?([\d,]+(?:\.\d+)?)"),
+    re.compile(r'"amount"\s*:\s*"?([\d.]+)'),
+]
+_MISSING = object()
+
+
+def parse_latency(spec: Optional[str]):
+    """Turn a latency spec string into a zero-argument sampler returning seconds."""
+    if not spec or spec == "none":
+        return lambda rng: 0.0
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown stub LLM latency spec: {spec}")
+
+
+def _message_text(message: Any) -> str:
+    if isinstance(message, dict):
+        content = message.get("content", "")
+    else:
+        content = message
+    return content if isinstance(content, str) else json.dumps(content, default=str)
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class StubLLM(BaseLLM):
+    """Rule-based stand-in for the Bedrock model used by the treasury agents."""
+
+    def __init__(self, model: str = "stub/treasury", temperature: Optional[float] = None,
+                 rules: Optional[List[Dict[str, Any]]] = None, latency: Optional[str] = None,
+                 seed: Optional[int] = None):
+        super().__init__(model=model, temperature=temperature)
+        script = self._load_script(os.getenv("TREASURY_STUB_LLM_SCRIPT"))
+        self._rules = rules or script.get("rules") or DEFAULT_RULES
+        latency_spec = latency or os.getenv("TREASURY_STUB_LLM_LATENCY") or script.get("latency")
+        self._sample_latency = parse_latency(latency_spec)
+        seed = seed if seed is not None else os.getenv("TREASURY_STUB_LLM_SEED")
+        self._rng = random.Random(int(seed) if seed is not None else None)
+        self._rng_lock = threading.Lock()
+
+    @staticmethod
+    def _load_script(path: Optional[str]) -> Dict[str, Any]:
+        if not path:
+            return {}
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def call(self, messages: Union[str, List[Dict[str, str]]], tools: Optional[List[dict]] = None,
+             callbacks: Optional[List[Any]] = None, available_functions: Optional[Dict[str, Any]] = None,
+             **kwargs) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+
+        started = time.time()
+        with self._rng_lock:
+            delay = self._sample_latency(self._rng)
+        if delay > 0:
+            time.sleep(delay)
+
+        response = self._respond(messages)
+        self._report_usage(callbacks, messages, response, started)
+        return response
+
+    def _respond(self, messages: List[Dict[str, str]]) -> str:
+        system = next((_message_text(m) for m in messages if isinstance(m, dict) and m.get("role") == "system"), "")
+        user = next((_message_text(m) for m in messages if isinstance(m, dict) and m.get("role") == "user"), "")
+        turns_taken = sum(1 for m in messages if isinstance(m, dict) and m.get("role") == "assistant")
+
+        role_match = _ROLE_PATTERN.search(system) or _ROLE_PATTERN.search(user)
+        role = role_match.group(1).strip() if role_match else ""
+        rule = self._match_rule(role, user)
+        placeholders = self._placeholders(messages, user)
+
+        steps = [step for step in rule.get("steps", []) if self._resolve(step["input"], placeholders) is not _MISSING]
+        if turns_taken < len(steps):
+            step = steps[turns_taken]
+            tool_input = json.dumps(self._resolve(step["input"], placeholders))
+            return (
+                f"Thought: I should use {step['tool']} to gather what this task needs.\n"
+                f"Action: {step['tool']}\n"
+                f"Action Input: {tool_input}"
+            )
+
+        answer = self._resolve(rule.get("final_answer", "Task completed."), placeholders)
+        if answer is _MISSING:
+            answer = rule.get("final_answer", "Task completed.").replace("$OBSERVATION", "").strip()
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+
+    def _match_rule(self, role: str, task_text: str) -> Dict[str, Any]:
+        for rule in self._rules:
+            if rule.get("role") and rule["role"] != role:
+                continue
+            if rule.get("task_contains") and rule["task_contains"] not in task_text:
+                continue
+            return rule
+        return {"steps": [], "final_answer": "Task completed."}
+
+    @staticmethod
+    def _placeholders(messages: List[Dict[str, str]], user: str) -> Dict[str, Any]:
+        placeholders: Dict[str, Any] = {"$REQUEST": user}
+
+        excel_match = _EXCEL_PATTERN.search(user)
+        if excel_match:
+            placeholders["$EXCEL_PATH"] = excel_match.group(1)
+
+        for pattern in _AMOUNT_PATTERNS:
+            amount_match = pattern.search(user)
+            if amount_match:
+                placeholders["$AMOUNT"] = float(amount_match.group(1).replace(",", ""))
+                break
+        else:
+            placeholders["$AMOUNT"] = 100.0
+
+        last = _message_text(messages[-1]) if messages else ""
+        if "Observation:" in last:
+            placeholders["$OBSERVATION"] = last.split("Observation:", 1)[1].strip()[:2000]
+        return placeholders
+
+    def _resolve(self, value: Any, placeholders: Dict[str, Any]) -> Any:
+        """Substitute $PLACEHOLDERS; returns _MISSING when one cannot be resolved."""
+        if isinstance(value, dict):
+            resolved = {}
+            for key, item in value.items():
+                resolved[key] = self._resolve(item, placeholders)
+                if resolved[key] is _MISSING:
+                    return _MISSING
+            return resolved
+        if isinstance(value, str):
+            if value in placeholders:
+                return placeholders[value]
+            for name in re.findall(r"\$[A-Z_]+", value):
+                if name not in placeholders:
+                    return _MISSING
+                value = value.replace(name, str(placeholders[name]))
+            return value
+        return value
+
+    @staticmethod
+    def _report_usage(callbacks: Optional[List[Any]], messages: List[Dict[str, str]], response: str,
+                      started: float) -> None:
+        """Feed estimated token counts to CrewAI's token handlers so diagnostics stay meaningful."""
+        usage = SimpleNamespace(
+            prompt_tokens=sum(_estimate_tokens(_message_text(m)) for m in messages),
+            completion_tokens=_estimate_tokens(response),
+        )
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        for callback in callbacks or []:
+            if hasattr(callback, "log_success_event"):
+                try:
+                    callback.log_success_event(
+                        kwargs={}, response_obj={"usage": usage}, start_time=started, end_time=time.time()
+                    )
+                except Exception:
+                    pass
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 128000
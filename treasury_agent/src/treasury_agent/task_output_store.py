@@ -0,0 +1,49 @@
+"""
+Optional background persistence of per-run task outputs.
+
+Task outputs live in memory on the RunContext and are attached to the proposal.
+When TREASURY_TASK_OUTPUT_DIR is set, they are additionally written to
+<dir>/<proposal_id>/<task_name>.md on a background thread so disk I/O never sits
+on the request path and concurrent runs never share a file. Run traces
+(trace.py) are written on the same background writer.
+"""
+
+import atexit
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .metrics import metrics
+
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="task-output-writer")
+atexit.register(_executor.shutdown, wait=True)
+
+
+def task_output_dir() -> Optional[Path]:
+    """Return the configured persistence root, or None when persistence is disabled."""
+    directory = os.getenv("TREASURY_TASK_OUTPUT_DIR")
+    return Path(directory) if directory else None
+
+
+def submit_write(fn, *args) -> Future:
+    """Run a write function on the background writer."""
+    return _executor.submit(fn, *args)
+
+
+def _write_outputs(directory: Path, outputs: Dict[str, Dict[str, Any]]) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    for task_name, output in outputs.items():
+        (directory / f"{task_name}.md").write_text(output.get("raw") or "", encoding="utf-8")
+    metrics.increment("task_outputs_persisted_total", len(outputs))
+    return directory
+
+
+def persist_task_outputs_async(run_id: str, outputs: Dict[str, Dict[str, Any]],
+                               root: Optional[Path] = None) -> Optional[Future]:
+    """Schedule writing `outputs` under <root>/<run_id>/; returns None when disabled."""
+    root = root or task_output_dir()
+    if root is None or not outputs:
+        return None
+    return submit_write(_write_outputs, root / run_id, dict(outputs))
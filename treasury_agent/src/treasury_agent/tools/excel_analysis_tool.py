@@ -1,41 +1,148 @@
 from crewai.tools import BaseTool
-from typing import Type, Dict, Any, List, Optional
+from typing import Type, Dict, Any, List, Optional, Tuple, Union
 from pydantic import BaseModel, Field
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
+import heapq
 import json
 import os
 from datetime import datetime
-import re
+import importlib.util
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from pathlib import Path
 
+from .tool_hooks import instrumented_tool_run
+from .excel_result_cache import excel_result_cache
+from .sheet_columns import SheetColumns
+from .parsed_sheet_cache import parsed_sheet_cache
+from .value_classifiers import (
+    NumericProfile, column_numeric_profile, is_currency, is_date, is_numeric, pattern_masks, value_kind
+)
+from .tabular_formats import TABULAR_FORMATS, detect_format, read_table
+from .ledger_state import (
+    LEDGER_BLOCK_ROWS, block_fold, ledger_key, ledger_states, load_state, save_checkpoint, verified_rows
+)
+
+
+@lru_cache(maxsize=None)
+def excel_engine() -> Optional[str]:
+    """
+    Pick the pandas Excel engine.
+
+    TREASURY_EXCEL_ENGINE forces an engine ('openpyxl', 'calamine', ...). Otherwise
+    calamine (Rust parser, several times faster than openpyxl) is used when
+    python-calamine is installed and pandas supports it (>= 2.2); None lets pandas
+    choose its default.
+    """
+    configured = os.getenv("TREASURY_EXCEL_ENGINE")
+    if configured:
+        return configured
+    major, minor = (int(part) for part in pd.__version__.split(".")[:2])
+    if (major, minor) >= (2, 2) and importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return None
+
+
+ANALYSIS_TYPES = ("comprehensive", "payment_focused", "financial_summary")
+# CSV and Parquet files hold a single table, reported as one sheet
+TABULAR_SHEET_NAME = "Sheet1"
+RECIPIENT_KEYWORDS = ("recipient", "payee", "beneficiary", "vendor", "counterparty", "wallet", "address")
+# Columns payments are grouped by in payment_aggregates (first header matching each keyword set)
+DIMENSION_KEYWORDS = {
+    "recipient": RECIPIENT_KEYWORDS,
+    "currency": ("currency", "ccy", "token", "asset"),
+    "day": ("date", "day", "timestamp", "time"),
+    "purpose": ("purpose", "description", "memo", "note", "reference", "details", "category"),
+}
+AGGREGATE_GROUP_LIMIT = 20
+OUTLIER_LIMIT = 10
+PAYMENT_SAMPLE_LIMIT = 10
+
+# Workbooks larger than this on disk are analyzed in streaming mode (bounded memory)
+STREAMING_THRESHOLD_BYTES = int(float(os.getenv("TREASURY_EXCEL_STREAMING_THRESHOLD_MB", "25")) * 1024 * 1024)
+STREAMING_FORMATS = (".xlsx", ".xlsm")
+# Streaming mode keeps only this many raw rows per sheet, and payment_aggregates quantiles come from a
+# uniform sample of this many payment rows (counts, totals and maxima stay exact)
+STREAMING_PREVIEW_ROWS = 200
+STREAMING_AGGREGATE_SAMPLE_ROWS = 50_000
+# Payment rows are folded into the streaming aggregates in chunks of this many rows
+STREAMING_PAYMENT_CHUNK_ROWS = 4096
+
+# Per-sheet process pool: only used for workbooks big enough to amortize worker IPC
+SHEET_WORKERS = int(os.getenv("TREASURY_EXCEL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARALLEL_MIN_SHEETS = int(os.getenv("TREASURY_EXCEL_PARALLEL_MIN_SHEETS", "4"))
+PARALLEL_MIN_BYTES = int(float(os.getenv("TREASURY_EXCEL_PARALLEL_MIN_MB", "2")) * 1024 * 1024)
+
+_sheet_pool: Optional[ProcessPoolExecutor] = None
+_sheet_pool_lock = threading.Lock()
+
+
+def sheet_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all ExcelAnalysisTool instances, created on first use."""
+    global _sheet_pool
+    with _sheet_pool_lock:
+        if _sheet_pool is None:
+            # spawn: forking the multi-threaded server process is unsafe
+            _sheet_pool = ProcessPoolExecutor(
+                max_workers=SHEET_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _sheet_pool
+
+
+def _reset_sheet_pool() -> None:
+    global _sheet_pool
+    with _sheet_pool_lock:
+        if _sheet_pool is not None:
+            _sheet_pool.shutdown(wait=False, cancel_futures=True)
+        _sheet_pool = None
+
 
 class ExcelAnalysisInput(BaseModel):
     """Input schema for ExcelAnalysisTool."""
-    file_path: str = Field(..., description="Path to the Excel file to analyze")
-    analysis_type: str = Field(default="comprehensive", description="Type of analysis: 'comprehensive', 'payment_focused', 'financial_summary'")
+    file_path: str = Field(..., description="Path to the Excel, CSV or Parquet file to analyze")
+    analysis_type: str = Field(
+        default="comprehensive",
+        description=(
+            "Type of analysis: 'comprehensive' (raw rows plus all insights), 'payment_focused' (payment columns, "
+            "payment list and per-recipient rollups) or 'financial_summary' (aggregates only, smallest and fastest)"
+        )
+    )
 
 
 class ExcelAnalysisTool(BaseTool):
     name: str = "Excel Analysis Tool"
     description: str = (
-        "Analyze any Excel file dynamically and transform it into LLM-consumable format for payment decisions. "
+        "Analyze any Excel file (or CSV / Parquet export) dynamically and transform it into LLM-consumable format for payment decisions. "
         "This tool can handle any spreadsheet structure, extract all data, and provide both raw data and processed insights. "
         "Use this tool to process client financial data for payment analysis and decision-making."
     )
     args_schema: Type[BaseModel] = ExcelAnalysisInput
 
+    # Analysis is read-only, so identical calls within a run are served from the run cache
+    @instrumented_tool_run(action_arg="analysis_type", memoize=True)
     def _run(self, file_path: str, analysis_type: str = "comprehensive") -> str:
         """
         Analyze Excel file and return comprehensive data in LLM-consumable format.
         
         Args:
             file_path: Path to the Excel file
-            analysis_type: Type of analysis to perform
+            analysis_type: 'comprehensive', 'payment_focused' or 'financial_summary';
+                the cheaper modes only profile the columns they report
             
         Returns:
-            JSON string containing complete Excel data and analysis
+            JSON string containing the Excel data and analysis for the requested mode
         """
         try:
+            analysis_type = (analysis_type or "comprehensive").strip().lower()
+            if analysis_type not in ANALYSIS_TYPES:
+                print(f"⚠️ Unknown analysis_type '{analysis_type}', using comprehensive")
+                analysis_type = "comprehensive"
+
             # Validate file exists
             if not os.path.exists(file_path):
                 return json.dumps({
@@ -43,21 +150,38 @@ class ExcelAnalysisTool(BaseTool):
                     "status": "error"
                 }, indent=2)
 
-            # Extract all data from Excel file
-            excel_data = self._extract_excel_data(file_path)
+            # Identical workbook content was analyzed before (this run, a retry or a resubmission)
+            cache_key = excel_result_cache.key_for(file_path, analysis_type)
+            cached = excel_result_cache.get(cache_key)
+            if cached is not None:
+                return self._with_file_name(cached, file_path)
+
+            # Extract all data from Excel file; very large workbooks are streamed row by row
+            if self._use_streaming(file_path):
+                excel_data = self._extract_excel_data_streaming(file_path, analysis_type)
+            else:
+                excel_data = self._extract_excel_data(file_path, analysis_type)
             
             # Perform financial analysis
-            financial_analysis = self._analyze_financial_data(excel_data)
+            financial_analysis = self._analyze_financial_data(excel_data, analysis_type)
             
             # Generate payment-focused insights
             payment_insights = self._generate_payment_insights(excel_data, financial_analysis)
             
-            # Create comprehensive output
-            result = self._create_comprehensive_output(
-                file_path, excel_data, financial_analysis, payment_insights
-            )
+            # Create the output for the requested mode
+            if analysis_type == "financial_summary":
+                result = self._create_financial_summary_output(excel_data, financial_analysis, payment_insights)
+            elif analysis_type == "payment_focused":
+                result = self._create_payment_focused_output(excel_data, financial_analysis, payment_insights)
+            else:
+                result = self._create_comprehensive_output(
+                    file_path, excel_data, financial_analysis, payment_insights
+                )
             
-            return json.dumps(result, indent=2, default=str)
+            output = json.dumps(result, indent=2, default=str)
+            if "error" not in excel_data:
+                excel_result_cache.put(cache_key, output)
+            return output
             
         except Exception as e:
             return json.dumps({
@@ -65,8 +189,22 @@ class ExcelAnalysisTool(BaseTool):
                 "status": "error"
             }, indent=2)
 
-    def _extract_excel_data(self, file_path: str) -> Dict[str, Any]:
-        """Extract all data from Excel file, preserving complete structure."""
+    def _with_file_name(self, cached: str, file_path: str) -> str:
+        """Report the requested file name when cached content was analyzed under another name."""
+        file_name = os.path.basename(file_path)
+        if f'"file_name": {json.dumps(file_name)}' in cached[:2000]:
+            return cached
+        result = json.loads(cached)
+        result["excel_metadata"]["file_name"] = file_name
+        return json.dumps(result, indent=2, default=str)
+
+    def _extract_excel_data(self, file_path: str, analysis_type: str = "comprehensive") -> Dict[str, Any]:
+        """
+        Extract all data from Excel file, preserving complete structure.
+
+        Only 'comprehensive' keeps raw rows and profiles every column; the other
+        modes profile just the payment, balance and recipient columns.
+        """
         excel_data = {
             "metadata": {},
             "sheets": {},
@@ -75,36 +213,69 @@ class ExcelAnalysisTool(BaseTool):
         }
         
         try:
-            # Read Excel file with all sheets
-            excel_file = pd.ExcelFile(file_path)
+            file_format = detect_format(file_path)
+            if file_format in TABULAR_FORMATS:
+                # CSV / Parquet skip the Excel parser; the typed columns feed the same pipeline
+                sheet_names = [TABULAR_SHEET_NAME]
+                workers = 1
+                sheets = {TABULAR_SHEET_NAME: SheetColumns.from_frame(read_table(file_path, file_format), header_row=True)}
+                sheet_errors = {}
+            elif (cached_sheets := parsed_sheet_cache.load(file_path)) is not None:
+                # Parsed before (by this or another process): columns are memory-mapped, nothing to parse
+                sheet_names = list(cached_sheets)
+                workers = 1
+                sheets = cached_sheets
+                sheet_errors = {}
+            else:
+                # Open and decompress the workbook once; every sheet is parsed from this handle
+                with pd.ExcelFile(file_path, engine=excel_engine()) as excel_file:
+                    sheet_names = excel_file.sheet_names
+                    workers = self._sheet_workers(file_path, sheet_names)
+                    if workers <= 1:
+                        sheets, sheet_errors = self._parse_sheets(excel_file, sheet_names)
+                if workers <= 1 and parsed_sheet_cache.enabled and not sheet_errors:
+                    sheets = {sheet_name: SheetColumns.from_frame(df) for sheet_name, df in sheets.items()}
+                    parsed_sheet_cache.store(file_path, sheets)
+            
+            # Large multi-sheet workbooks are parsed and profiled in worker processes
+            pooled_results = None
+            if workers > 1:
+                pooled_results = self._process_sheets_in_pool(file_path, sheet_names, analysis_type)
+                if pooled_results is None:
+                    workers = 1
+                    with pd.ExcelFile(file_path, engine=excel_engine()) as excel_file:
+                        sheets, sheet_errors = self._parse_sheets(excel_file, sheet_names)
             
             # Extract metadata
             excel_data["metadata"] = {
                 "file_name": os.path.basename(file_path),
                 "file_size": os.path.getsize(file_path),
-                "sheets": excel_file.sheet_names,
+                "file_format": file_format,
+                "sheets": sheet_names,
                 "processing_timestamp": datetime.now().isoformat(),
-                "total_sheets": len(excel_file.sheet_names)
+                "total_sheets": len(sheet_names),
+                "analysis_mode": "in_memory",
+                "analysis_type": analysis_type,
+                "sheet_workers": workers
             }
             
-            # Process each sheet
-            for sheet_name in excel_file.sheet_names:
+            # Process each sheet; results are merged in workbook order whichever path produced them
+            for sheet_name in sheet_names:
                 try:
-                    # Read sheet data
-                    df = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
-                    
-                    # Extract complete data
-                    sheet_data = {
-                        "headers": self._extract_headers(df),
-                        "rows": self._extract_rows(df),
-                        "data_types": self._analyze_data_types(df),
-                        "missing_values": self._identify_missing_values(df),
-                        "total_rows": len(df),
-                        "total_columns": len(df.columns) if len(df.columns) > 0 else 0
-                    }
+                    if pooled_results is not None:
+                        result = pooled_results[sheet_name]
+                        if isinstance(result, Exception):
+                            raise result
+                        sheet_data, raw_columns = result
+                    else:
+                        if sheet_name in sheet_errors:
+                            raise sheet_errors[sheet_name]
+                        # Pop so each DataFrame can be freed once its columns are built
+                        sheet_data, raw_columns = self._process_sheet(sheets.pop(sheet_name), analysis_type, sheet_name)
                     
                     excel_data["sheets"][sheet_name] = sheet_data
-                    excel_data["raw_data"][sheet_name] = df.to_dict('records')
+                    if raw_columns is not None:
+                        excel_data["raw_data"][sheet_name] = raw_columns
                     
                 except Exception as e:
                     excel_data["sheets"][sheet_name] = {
@@ -121,69 +292,316 @@ class ExcelAnalysisTool(BaseTool):
         
         return excel_data
 
-    def _extract_headers(self, df: pd.DataFrame) -> List[str]:
+    def _parse_sheets(self, excel_file: pd.ExcelFile, sheet_names: List[str]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Exception]]:
+        """Parse every sheet from an open workbook handle, collecting per-sheet errors."""
+        sheets = {}
+        sheet_errors = {}
+        for sheet_name in sheet_names:
+            try:
+                sheets[sheet_name] = excel_file.parse(sheet_name, header=None)
+            except Exception as e:
+                sheet_errors[sheet_name] = e
+        return sheets, sheet_errors
+
+    def _process_sheet(self, df: Union[pd.DataFrame, SheetColumns], analysis_type: str,
+                       sheet_name: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[SheetColumns]]:
+        """
+        Profile one parsed sheet.
+
+        The DataFrame is converted once to SheetColumns (CSV / Parquet tables
+        arrive already converted), which every analysis step reads; returns the
+        sheet data and, for 'comprehensive', the columns whose rows are emitted
+        as raw_data. With ledger states enabled, sheets of at least one block are
+        analyzed incrementally and come back with their financial analysis.
+        """
+        columns = df if isinstance(df, SheetColumns) else SheetColumns.from_frame(df)
+        if sheet_name is not None and ledger_states.enabled and columns.n_rows >= LEDGER_BLOCK_ROWS:
+            sheet_data = self._process_ledger_sheet(columns, sheet_name, analysis_type)
+            return sheet_data, columns if analysis_type == "comprehensive" else None
+        headers = self._extract_headers(columns)
+        
+        # Numeric mask and values are computed once per column and reused by
+        # type inference and the payment/balance aggregates; cheaper modes
+        # profile only the columns they report
+        if analysis_type == "comprehensive":
+            numeric_profile = self._profile_numeric_columns(columns)
+            data_types = self._analyze_data_types(columns, numeric_profile)
+        else:
+            data_types = self._analyze_data_types(columns, [None] * columns.n_cols)
+            numeric_profile = self._profile_numeric_columns(columns, self._relevant_positions(headers, data_types))
+        
+        # Extract complete data
+        sheet_data = {
+            "headers": headers,
+            "data_types": data_types,
+            "missing_values": self._identify_missing_values(columns),
+            "total_rows": columns.n_rows,
+            "total_columns": columns.n_cols,
+            "numeric_profile": numeric_profile,
+            "columns": columns
+        }
+        
+        return sheet_data, columns if analysis_type == "comprehensive" else None
+
+    def _process_ledger_sheet(self, columns: SheetColumns, sheet_name: str, analysis_type: str) -> Dict[str, Any]:
+        """
+        Analyze an append-only ledger sheet from its stored checkpoint.
+
+        Rows before the checkpoint (re-verified block by block) come from the
+        stored running aggregates; only later rows are profiled and folded in, and
+        the aggregates are checkpointed again at the last complete block. The
+        result is identical to analyzing the whole ledger from scratch. Payment
+        aggregates are kept bounded (PaymentAggregateTotals): exact up to
+        STREAMING_AGGREGATE_SAMPLE_ROWS payments, sampled quantiles beyond.
+        """
+        key = ledger_key("sheet", f"{analysis_type}:{sheet_name}", columns.head)
+        state = load_state(key)
+        start = verified_rows(columns, state)
+        checkpoint = columns.n_rows // LEDGER_BLOCK_ROWS * LEDGER_BLOCK_ROWS
+        if start:
+            running = {name: state[name] for name in ("data_types", "missing", "balances")}
+            running["payments"] = self._payment_totals_from_state(state["payments"])
+            print(f"📒 Ledger sheet '{sheet_name}': {start} rows from checkpoint, analyzing {columns.n_rows - start} new rows")
+        else:
+            running = {
+                "data_types": {},
+                "missing": [],
+                "payments": self._empty_payment_totals(),
+                "balances": self._empty_balance_totals()
+            }
+        # Columns added since the checkpoint are null in all of its rows
+        missing = running["missing"][:columns.n_cols]
+        running["missing"] = missing + [start] * (columns.n_cols - len(missing))
+        
+        comprehensive = analysis_type == "comprehensive"
+        segments = []
+        for lo, hi in ((start, checkpoint), (checkpoint, columns.n_rows)):
+            if hi > lo:
+                segment = columns.slice_rows(lo, hi)
+                profile = self._profile_numeric_columns(segment) if comprehensive else None
+                segment_types = self._analyze_data_types(segment, profile or [None] * segment.n_cols)
+                segments.append((lo, hi, segment, profile, segment_types))
+        
+        headers = self._extract_headers(columns)
+        data_types = self._merge_data_types(running["data_types"], [types for *_, types in segments], columns.n_cols)
+        payment_columns = self._identify_payment_columns(headers, data_types)
+        balance_columns = self._identify_balance_columns(headers, data_types)
+        include_records = analysis_type != "financial_summary"
+        dimensions = self._identify_dimension_columns(headers) if include_records else {}
+        positions = None if comprehensive else self._relevant_positions(headers, data_types)
+        if include_records and "aggregates" not in running["payments"]:
+            running["payments"]["aggregates"] = PaymentAggregateTotals(list(dimensions))
+        
+        for lo, hi, segment, profile, segment_types in segments:
+            if profile is None:
+                profile = self._profile_numeric_columns(segment, positions)
+            if payment_columns:
+                self._fold_payments(running["payments"], segment, lo, headers, payment_columns, profile,
+                                    include_records, dimensions)
+            if balance_columns:
+                self._fold_balances(running["balances"], lo, headers, balance_columns, profile)
+            running["missing"] = [count + int(nulls) for count, nulls in zip(running["missing"], segment.null_counts)]
+            running["data_types"] = self._merge_data_types(running["data_types"], [segment_types], columns.n_cols)
+            if hi == checkpoint:
+                save_checkpoint(key, columns, state, start, checkpoint,
+                                {**running, "payments": self._payment_totals_to_state(running["payments"])})
+        
+        return {
+            "headers": headers,
+            "data_types": data_types,
+            "missing_values": {f"Column_{position}": count for position, count in enumerate(running["missing"]) if count > 0},
+            "total_rows": columns.n_rows,
+            "total_columns": columns.n_cols,
+            "financial_analysis": self._financial_analysis(
+                sheet_name, headers, payment_columns, balance_columns, running["payments"], running["balances"],
+                include_records, dimensions
+            )
+        }
+
+    def _merge_data_types(self, data_types: Dict[str, str], later: List[Dict[str, str]], n_cols: int) -> Dict[str, str]:
+        """A column's type comes from its first non-null value: keep typed columns, fill 'empty' ones from later rows."""
+        merged = {}
+        for position in range(n_cols):
+            key = f"Column_{position}"
+            merged[key] = data_types.get(key, "empty")
+            for types in later:
+                if merged[key] != "empty":
+                    break
+                merged[key] = types.get(key, "empty")
+        return merged
+
+    def _sheet_workers(self, file_path: str, sheet_names: List[str]) -> int:
+        """Worker processes to use; 1 (serial) when pool overhead would dominate."""
+        if SHEET_WORKERS <= 1 or len(sheet_names) < PARALLEL_MIN_SHEETS:
+            return 1
+        if os.path.getsize(file_path) < PARALLEL_MIN_BYTES:
+            return 1
+        return min(SHEET_WORKERS, len(sheet_names))
+
+    def _process_sheets_in_pool(self, file_path: str, sheet_names: List[str],
+                                analysis_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse, profile and analyze each sheet in the process pool.
+
+        Each worker reopens the workbook and parses only its sheet. Results come
+        back without the DataFrame and carry the sheet's financial analysis, which
+        _analyze_financial_data merges in workbook order. With the parsed sheet
+        cache enabled, workers also return their parsed columns, which are stored
+        as the serial path stores them. Returns None when the pool is unavailable
+        so the caller can fall back to serial processing.
+        """
+        store_parsed = parsed_sheet_cache.enabled
+        try:
+            pool = sheet_pool()
+            futures = {
+                sheet_name: pool.submit(analyze_sheet_in_worker, file_path, sheet_name, analysis_type, store_parsed)
+                for sheet_name in sheet_names
+            }
+            results = {}
+            for sheet_name, future in futures.items():
+                try:
+                    results[sheet_name] = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    results[sheet_name] = e
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            print(f"⚠️ Sheet process pool unavailable ({e}); analyzing sheets serially")
+            _reset_sheet_pool()
+            return None
+
+        if store_parsed and not any(isinstance(result, Exception) for result in results.values()):
+            parsed_sheet_cache.store(file_path, {sheet_name: result[2] for sheet_name, result in results.items()})
+        return {
+            sheet_name: result if isinstance(result, Exception) else result[:2]
+            for sheet_name, result in results.items()
+        }
+
+    def _use_streaming(self, file_path: str) -> bool:
+        """Stream workbooks above the size threshold that openpyxl can read in read-only mode."""
+        return (
+            Path(file_path).suffix.lower() in STREAMING_FORMATS
+            and os.path.getsize(file_path) > STREAMING_THRESHOLD_BYTES
+            and detect_format(file_path) == "xlsx"
+        )
+
+    def _extract_excel_data_streaming(self, file_path: str, analysis_type: str = "comprehensive") -> Dict[str, Any]:
+        """
+        Single-pass, bounded-memory variant of _extract_excel_data.
+
+        Rows come from openpyxl's read-only iterator and are folded into per-sheet
+        accumulators; the sheet's financial analysis is computed in the same pass.
+        Only a preview of the raw rows and of the payment list is kept.
+        """
+        excel_data = {
+            "metadata": {},
+            "sheets": {},
+            "raw_data": {},
+            "data_quality": {}
+        }
+        
+        try:
+            workbook = load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                sheet_names = workbook.sheetnames
+                excel_data["metadata"] = {
+                    "file_name": os.path.basename(file_path),
+                    "file_size": os.path.getsize(file_path),
+                    "file_format": "xlsx",
+                    "sheets": sheet_names,
+                    "processing_timestamp": datetime.now().isoformat(),
+                    "total_sheets": len(sheet_names),
+                    "analysis_mode": "streaming",
+                    "analysis_type": analysis_type,
+                    "raw_data_preview_rows": STREAMING_PREVIEW_ROWS
+                }
+                
+                for sheet_name in sheet_names:
+                    try:
+                        accumulator = StreamingSheetAccumulator(self, analysis_type)
+                        for row in workbook[sheet_name].iter_rows(values_only=True):
+                            accumulator.add_row(row)
+                        sheet_data, preview = accumulator.finish(sheet_name)
+                        excel_data["sheets"][sheet_name] = sheet_data
+                        if analysis_type == "comprehensive":
+                            excel_data["raw_data"][sheet_name] = preview
+                    except Exception as e:
+                        excel_data["sheets"][sheet_name] = {
+                            "error": f"Error processing sheet {sheet_name}: {str(e)}",
+                            "total_rows": 0,
+                            "total_columns": 0
+                        }
+            finally:
+                workbook.close()
+            
+            excel_data["data_quality"] = self._assess_data_quality(excel_data)
+            
+        except Exception as e:
+            excel_data["error"] = f"Error reading Excel file: {str(e)}"
+        
+        return excel_data
+
+    def _extract_headers(self, columns: SheetColumns) -> List[str]:
         """Extract and clean column headers."""
-        if len(df.columns) == 0:
+        if columns.n_cols == 0:
             return []
         
         # Try to identify headers (first row with meaningful data)
         headers = []
-        for col in df.columns:
-            value = df.iloc[0, col] if len(df) > 0 else f"Column_{col}"
-            if pd.isna(value):
-                headers.append(f"Column_{col}")
+        for position, value in enumerate(columns.head):
+            if columns.n_rows == 0 or pd.isna(value):
+                headers.append(f"Column_{position}")
             else:
                 headers.append(str(value).strip())
         
         return headers
 
-    def _extract_rows(self, df: pd.DataFrame) -> List[List[Any]]:
-        """Extract all rows as lists, preserving all data."""
-        rows = []
-        for _, row in df.iterrows():
-            row_data = []
-            for value in row:
-                if pd.isna(value):
-                    row_data.append(None)
-                else:
-                    row_data.append(value)
-            rows.append(row_data)
-        return rows
-
-    def _analyze_data_types(self, df: pd.DataFrame) -> Dict[str, str]:
-        """Analyze data types in each column."""
+    def _relevant_positions(self, headers: List[str], data_types: Dict[str, str]) -> List[int]:
+        """Positions of the payment, balance and recipient columns."""
+        columns = set(self._identify_payment_columns(headers, data_types))
+        columns.update(self._identify_balance_columns(headers, data_types))
+        recipient_column = self._identify_recipient_column(headers)
+        return [i for i, header in enumerate(headers) if header in columns or header == recipient_column]
+
+    def _profile_numeric_columns(self, columns: SheetColumns, positions: Optional[List[int]] = None) -> List[Optional[NumericProfile]]:
+        """Compute the numeric profile of each column (or only `positions`; others are None)."""
+        selected = set(range(columns.n_cols) if positions is None else positions)
+        return [column_numeric_profile(columns, position) if position in selected else None
+                for position in range(columns.n_cols)]
+
+    def _analyze_data_types(self, columns: SheetColumns, numeric_profile: List[Optional[NumericProfile]]) -> Dict[str, str]:
+        """Infer each column's type from its first non-null value, classified for all columns at once."""
+        if columns.n_cols == 0:
+            return {}
+        if columns.n_rows == 0:
+            return {f"Column_{position}": "empty" for position in range(columns.n_cols)}
+
+        has_value = columns.null_counts < columns.n_rows
+        first_row = [int(np.argmin(columns.is_null(position))) for position in range(columns.n_cols)]
+        samples = pd.Series(
+            [columns.value(first_row[position], position) for position in range(columns.n_cols)], dtype=object
+        ).astype(str)
+        masks = pattern_masks(samples)
+
         data_types = {}
-        for col in df.columns:
-            if len(df) == 0:
-                data_types[f"Column_{col}"] = "empty"
-                continue
-                
-            # Sample non-null values to determine type
-            sample_values = df[col].dropna().head(10)
-            if len(sample_values) == 0:
-                data_types[f"Column_{col}"] = "empty"
+        for position in range(columns.n_cols):
+            if not has_value[position]:
+                data_types[f"Column_{position}"] = "empty"
+            elif masks["currency"][position]:
+                data_types[f"Column_{position}"] = "currency"
+            elif masks["date"][position]:
+                data_types[f"Column_{position}"] = "date"
+            elif (numeric_profile[position][0][first_row[position]] if numeric_profile[position] is not None
+                  else is_numeric(samples.iloc[position])):
+                data_types[f"Column_{position}"] = "numeric"
             else:
-                # Analyze sample values
-                sample_str = str(sample_values.iloc[0])
-                if self._is_currency(sample_str):
-                    data_types[f"Column_{col}"] = "currency"
-                elif self._is_date(sample_str):
-                    data_types[f"Column_{col}"] = "date"
-                elif self._is_numeric(sample_str):
-                    data_types[f"Column_{col}"] = "numeric"
-                else:
-                    data_types[f"Column_{col}"] = "text"
+                data_types[f"Column_{position}"] = "text"
         
         return data_types
 
-    def _identify_missing_values(self, df: pd.DataFrame) -> Dict[str, int]:
+    def _identify_missing_values(self, columns: SheetColumns) -> Dict[str, int]:
         """Identify missing values in each column."""
-        missing_values = {}
-        for col in df.columns:
-            missing_count = df[col].isna().sum()
-            if missing_count > 0:
-                missing_values[f"Column_{col}"] = int(missing_count)
-        return missing_values
+        return {f"Column_{position}": int(count) for position, count in enumerate(columns.null_counts) if count > 0}
 
     def _assess_data_quality(self, excel_data: Dict[str, Any]) -> Dict[str, Any]:
         """Assess overall data quality."""
@@ -208,7 +626,7 @@ class ExcelAnalysisTool(BaseTool):
             "data_completeness": f"{((total_cells - missing_cells) / total_cells * 100):.1f}%" if total_cells > 0 else "100%"
         }
 
-    def _analyze_financial_data(self, excel_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_financial_data(self, excel_data: Dict[str, Any], analysis_type: str = "comprehensive") -> Dict[str, Any]:
         """Analyze financial data patterns and extract insights."""
         financial_analysis = {
             "payment_data": {},
@@ -222,8 +640,10 @@ class ExcelAnalysisTool(BaseTool):
             if "error" in sheet_data:
                 continue
                 
-            # Analyze each sheet for financial patterns
-            sheet_analysis = self._analyze_sheet_for_financial_data(sheet_data, sheet_name)
+            # Analyze each sheet for financial patterns (streamed sheets were analyzed while reading)
+            sheet_analysis = sheet_data.get("financial_analysis") or self._analyze_sheet_for_financial_data(
+                sheet_data, sheet_name, analysis_type
+            )
             
             # Merge insights
             for key in financial_analysis:
@@ -235,8 +655,38 @@ class ExcelAnalysisTool(BaseTool):
         
         return financial_analysis
 
-    def _analyze_sheet_for_financial_data(self, sheet_data: Dict[str, Any], sheet_name: str) -> Dict[str, Any]:
+    def _analyze_sheet_for_financial_data(self, sheet_data: Dict[str, Any], sheet_name: str,
+                                          analysis_type: str = "comprehensive") -> Dict[str, Any]:
         """Analyze a single sheet for financial data patterns."""
+        headers = sheet_data.get("headers", [])
+        columns = sheet_data.get("columns")
+        data_types = sheet_data.get("data_types", {})
+        numeric_profile = sheet_data.get("numeric_profile", [])
+        
+        # Look for payment-related columns
+        payment_columns = self._identify_payment_columns(headers, data_types)
+        balance_columns = self._identify_balance_columns(headers, data_types)
+        
+        # Totals only for financial_summary; grouped payment aggregates otherwise
+        include_records = analysis_type != "financial_summary"
+        dimensions = self._identify_dimension_columns(headers) if include_records else {}
+        
+        # The whole sheet is folded as one range; _process_ledger_sheet folds the same way from a checkpoint
+        payments = self._empty_payment_totals()
+        balances = self._empty_balance_totals()
+        if payment_columns:
+            self._fold_payments(payments, columns, 0, headers, payment_columns, numeric_profile,
+                                include_records, dimensions)
+        if balance_columns:
+            self._fold_balances(balances, 0, headers, balance_columns, numeric_profile)
+        
+        return self._financial_analysis(sheet_name, headers, payment_columns, balance_columns, payments, balances,
+                                        include_records, dimensions)
+
+    def _financial_analysis(self, sheet_name: str, headers: List[str], payment_columns: List[str],
+                            balance_columns: List[str], payments: Dict[str, Any], balances: Dict[str, Any],
+                            include_records: bool, dimensions: Dict[str, str]) -> Dict[str, Any]:
+        """A sheet's financial analysis from its running payment and balance totals."""
         analysis = {
             "payment_data": {},
             "balance_data": {},
@@ -245,27 +695,19 @@ class ExcelAnalysisTool(BaseTool):
             "key_insights": []
         }
         
-        headers = sheet_data.get("headers", [])
-        rows = sheet_data.get("rows", [])
-        data_types = sheet_data.get("data_types", {})
-        
-        # Look for payment-related columns
-        payment_columns = self._identify_payment_columns(headers, data_types)
-        balance_columns = self._identify_balance_columns(headers, data_types)
-        
         # Extract payment data
         if payment_columns:
-            analysis["payment_data"] = self._extract_payment_data(rows, headers, payment_columns)
+            analysis["payment_data"] = self._payment_data(payments, include_records, dimensions)
             analysis["key_insights"].append(f"Found payment data in sheet '{sheet_name}'")
         
         # Extract balance data
         if balance_columns:
-            analysis["balance_data"] = self._extract_balance_data(rows, headers, balance_columns)
+            analysis["balance_data"] = self._balance_data(balances, headers, balance_columns)
             analysis["key_insights"].append(f"Found balance data in sheet '{sheet_name}'")
         
         # Analyze transaction patterns
         if payment_columns or balance_columns:
-            analysis["transaction_patterns"] = self._analyze_transaction_patterns(rows, headers, payment_columns, balance_columns)
+            analysis["transaction_patterns"] = self._transaction_patterns(payments["count"] if payment_columns else None)
         
         return analysis
 
@@ -303,73 +745,311 @@ class ExcelAnalysisTool(BaseTool):
         
         return balance_columns
 
-    def _extract_payment_data(self, rows: List[List[Any]], headers: List[str], payment_columns: List[str]) -> Dict[str, Any]:
-        """Extract and analyze payment data."""
+    def _identify_recipient_column(self, headers: List[str]) -> Optional[str]:
+        """First column that likely identifies the payment recipient."""
+        return self._identify_column(headers, RECIPIENT_KEYWORDS)
+
+    def _identify_column(self, headers: List[str], keywords: Tuple[str, ...]) -> Optional[str]:
+        for header in headers:
+            header_lower = header.lower()
+            if any(keyword in header_lower for keyword in keywords):
+                return header
+        return None
+
+    def _identify_dimension_columns(self, headers: List[str]) -> Dict[str, str]:
+        """Recipient, currency, day and purpose columns present in the sheet (dimension -> header)."""
+        dimensions = {}
+        for dimension, keywords in DIMENSION_KEYWORDS.items():
+            header = self._identify_column(headers, keywords)
+            if header is not None:
+                dimensions[dimension] = header
+        return dimensions
+
+    def _columns_by_header(self, headers: List[str], columns: List[str]) -> Dict[str, List[int]]:
+        """Map each selected header to its column positions (headers may repeat)."""
+        positions: Dict[str, List[int]] = {}
+        for i, header in enumerate(headers):
+            if header in columns:
+                positions.setdefault(header, []).append(i)
+        return positions
+
+    def _payment_row_mask(self, headers: List[str], payment_columns: List[str],
+                          numeric_profile: List[NumericProfile]) -> np.ndarray:
+        """Rows with at least one numeric value in a payment column."""
+        masks = [numeric_profile[i][0] for i, header in enumerate(headers)
+                 if header in payment_columns and i < len(numeric_profile)]
+        if not masks:
+            return np.zeros(0, dtype=bool)
+        return np.logical_or.reduce(masks)
+
+    def _empty_payment_totals(self) -> Dict[str, Any]:
+        # rows / amounts / dimensions hold one array per folded range, concatenated when aggregating;
+        # ledger sheets add bounded "aggregates" (PaymentAggregateTotals) that replace them
+        return {"count": 0, "total": 0.0, "samples": [], "rows": [], "amounts": [], "dimensions": {}}
+
+    def _fold_payments(self, running: Dict[str, Any], columns: SheetColumns, start_row: int, headers: List[str],
+                       payment_columns: List[str], numeric_profile: List[NumericProfile],
+                       include_records: bool, dimensions: Dict[str, str]) -> None:
+        """Add the payment rows of `columns` (sheet rows start_row..) to the running payment totals."""
+        has_payment = self._payment_row_mask(headers, payment_columns, numeric_profile)
+        payment_rows = np.flatnonzero(has_payment)
+        if len(payment_rows) == 0:
+            return
+        
+        # A row's record holds, per header, the value of the last numeric column with that header
+        sources = {}
+        amounts = np.zeros(len(has_payment))
+        for header, positions in self._columns_by_header(headers, payment_columns).items():
+            source = np.full(len(has_payment), -1)
+            values = np.full(len(has_payment), np.nan)
+            for i in positions:
+                mask, column_values = numeric_profile[i]
+                source = np.where(mask, i, source)
+                values = np.where(mask, column_values, values)
+            sources[header] = source
+            # Values float() cannot parse (e.g. '$1,200') are listed but not summed
+            amounts += np.nan_to_num(values, nan=0.0)
+        
+        running["count"] += int(len(payment_rows))
+        # Non-payment rows hold 0.0; the block fold keeps the total independent of where the sheet is split
+        running["total"] = block_fold(amounts, start_row, running["total"])[0]
+        if not include_records:
+            return
+        
+        # Full records only for the first few payments; the rest is kept as columns for aggregation
+        sample_rows = payment_rows[:max(PAYMENT_SAMPLE_LIMIT - len(running["samples"]), 0)]
+        if len(sample_rows):
+            sample_values = {i: columns.values_at(i, sample_rows)
+                             for positions in self._columns_by_header(headers, payment_columns).values() for i in positions}
+            running["samples"].extend(
+                {header: sample_values[source[r]][k] for header, source in sources.items() if source[r] >= 0}
+                for k, r in enumerate(sample_rows)
+            )
+        
+        keys = {
+            dimension: self._dimension_keys(dimension, pd.Series(columns.values_at(headers.index(header), payment_rows), dtype=object))
+            for dimension, header in dimensions.items()
+        }
+        if "aggregates" in running:
+            running["aggregates"].fold(payment_rows + start_row, amounts[payment_rows], keys)
+            return
+        running["rows"].append(payment_rows + start_row)
+        running["amounts"].append(amounts[payment_rows])
+        for dimension, dimension_keys in keys.items():
+            running["dimensions"].setdefault(dimension, []).append(dimension_keys)
+
+    def _dimension_keys(self, dimension: str, values: pd.Series) -> np.ndarray:
+        """Group keys for one dimension: calendar day for dates, trimmed text otherwise; 'unknown' for blanks."""
+        if dimension == "day":
+            # Numbers (e.g. Excel serials) are not read as epoch offsets
+            numeric = pd.to_numeric(values, errors="coerce").notna()
+            try:
+                days = pd.to_datetime(values.where(~numeric, None), errors="coerce", format="mixed")
+                keys = days.dt.strftime("%Y-%m-%d")
+            except (TypeError, ValueError):
+                keys = pd.Series(np.nan, index=values.index, dtype=object)
+        else:
+            keys = values.where(values.isna(), values.astype(str).str.strip())
+            if dimension == "currency":
+                keys = keys.str.upper()
+            keys = keys.where(keys != "", np.nan)
+        return keys.fillna("unknown").astype(str).to_numpy(dtype=object)
+
+    def _payment_totals_to_state(self, running: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON-ready copy of the running payment totals for a ledger checkpoint (bounded, no per-row lists)."""
+        return {
+            "count": running["count"],
+            "total": running["total"],
+            "samples": running["samples"],
+            "aggregates": running["aggregates"].to_state() if "aggregates" in running else None
+        }
+
+    def _payment_totals_from_state(self, stored: Dict[str, Any]) -> Dict[str, Any]:
+        running = {**self._empty_payment_totals(), "count": stored["count"], "total": stored["total"],
+                   "samples": stored["samples"]}
+        if stored["aggregates"] is not None:
+            running["aggregates"] = PaymentAggregateTotals.from_state(stored["aggregates"])
+        return running
+
+    def _payment_data(self, running: Dict[str, Any], include_records: bool,
+                      dimensions: Dict[str, str]) -> Dict[str, Any]:
+        """payment_data output from the running payment totals."""
         payment_data = {
-            "total_payments": 0,
-            "total_amount": 0.0,
-            "payment_list": [],
+            "total_payments": running["count"],
+            "total_amount": running["total"],
             "payment_summary": {}
         }
+        if running["count"] == 0 or not include_records:
+            return payment_data
         
-        for row in rows:
-            if len(row) != len(headers):
-                continue
-                
-            payment_record = {}
-            has_payment_data = False
-            
-            for i, header in enumerate(headers):
-                if header in payment_columns and i < len(row):
-                    value = row[i]
-                    if value is not None and self._is_numeric(str(value)):
-                        payment_record[header] = value
-                        has_payment_data = True
-            
-            if has_payment_data:
-                payment_data["payment_list"].append(payment_record)
-                payment_data["total_payments"] += 1
-                
-                # Sum payment amounts
-                for col in payment_columns:
-                    if col in payment_record:
-                        try:
-                            amount = float(payment_record[col])
-                            payment_data["total_amount"] += amount
-                        except (ValueError, TypeError):
-                            pass
-        
+        if "aggregates" in running:
+            payment_data["payment_aggregates"] = running["aggregates"].payment_aggregates(
+                self, dimensions, running["count"], running["total"]
+            )
+            payment_data["sample_payments"] = running["samples"]
+            return payment_data
+        frame = pd.DataFrame({
+            "row": np.concatenate(running["rows"]),
+            "amount": np.concatenate(running["amounts"]),
+            **{dimension: np.concatenate(chunks) for dimension, chunks in running["dimensions"].items()}
+        })
+        payment_data["payment_aggregates"] = self._payment_aggregates(frame, dimensions)
+        payment_data["sample_payments"] = running["samples"]
         return payment_data
 
-    def _extract_balance_data(self, rows: List[List[Any]], headers: List[str], balance_columns: List[str]) -> Dict[str, Any]:
-        """Extract and analyze balance data."""
+    def _payment_aggregates(self, frame: pd.DataFrame, dimensions: Dict[str, str],
+                            totals: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Amount distribution, per-dimension group statistics and the largest outliers of the payment rows.
+
+        Without `totals`, `frame` holds every payment row. Streaming mode passes
+        a sample of the rows instead, plus the exact `totals` kept while reading
+        (count, total, min, max, per-group [count, total, max] and the largest
+        payments); counts, totals, means and maxima are then exact and quantiles
+        come from the sample.
+        """
+        aggregates = {"amount_distribution": self._amount_distribution(frame["amount"], totals)}
+        for dimension, header in dimensions.items():
+            group_totals = totals["groups"][dimension] if totals else None
+            aggregates[f"by_{dimension}"] = self._grouped_amounts(frame, dimension, header, group_totals)
+        aggregates["outliers"] = self._amount_outliers(frame, list(dimensions), totals)
+        if totals:
+            aggregates["sampled_payments"] = int(len(frame))
+        return aggregates
+
+    def _amount_distribution(self, amounts: pd.Series, totals: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        quantiles = amounts.quantile([0.25, 0.5, 0.75, 0.9, 0.99]).tolist()
+        distribution = {
+            "count": int(len(amounts)),
+            "mean": float(amounts.mean()),
+            "min": float(amounts.min()),
+            "p25": quantiles[0],
+            "p50": quantiles[1],
+            "p75": quantiles[2],
+            "p90": quantiles[3],
+            "p99": quantiles[4],
+            "max": float(amounts.max())
+        }
+        if totals:
+            distribution.update(count=totals["count"], mean=totals["total"] / totals["count"],
+                                min=totals["min"], max=totals["max"])
+        return distribution
+
+    def _grouped_amounts(self, frame: pd.DataFrame, dimension: str, header: str,
+                         group_totals: Optional[Dict[str, List[float]]] = None) -> Dict[str, Any]:
+        """
+        Count, total, mean, median, p90 and max per group.
+
+        Groups are ranked by total (days: most recent first); only the top
+        AGGREGATE_GROUP_LIMIT are listed and the rest summarized under 'other'.
+        With `group_totals` ({key: [count, total, max]}) every group is listed
+        from those; groups missing from the sample `frame` get no p50 / p90.
+        """
+        grouped = frame.groupby(dimension, sort=False)["amount"]
+        quantiles = grouped.quantile([0.5, 0.9]).unstack()
+        if group_totals is None:
+            stats = grouped.agg(["size", "sum", "mean", "max"])
+        else:
+            stats = pd.DataFrame.from_dict(group_totals, orient="index", columns=["size", "sum", "max"])
+            stats["mean"] = stats["sum"] / stats["size"]
+        stats["p50"] = quantiles[0.5]
+        stats["p90"] = quantiles[0.9]
+        if dimension == "day":
+            days = sorted((day for day in stats.index if day != "unknown"), reverse=True)
+            stats = stats.loc[days + (["unknown"] if "unknown" in stats.index else [])]
+        else:
+            stats = stats.sort_values("sum", ascending=False, kind="stable")
+        top = stats.iloc[:AGGREGATE_GROUP_LIMIT]
+        rest = stats.iloc[AGGREGATE_GROUP_LIMIT:]
+        return {
+            "column": header,
+            "groups": int(len(stats)),
+            "top": [
+                {
+                    dimension: key,
+                    "payments": int(row["size"]),
+                    "total_amount": float(row["sum"]),
+                    "mean": float(row["mean"]),
+                    "p50": None if pd.isna(row["p50"]) else float(row["p50"]),
+                    "p90": None if pd.isna(row["p90"]) else float(row["p90"]),
+                    "max": float(row["max"])
+                }
+                for key, row in top.iterrows()
+            ],
+            "other": {
+                "groups": int(len(rest)),
+                "payments": int(rest["size"].sum()),
+                "total_amount": float(rest["sum"].sum())
+            }
+        }
+
+    def _amount_outliers(self, frame: pd.DataFrame, dimensions: List[str],
+                         totals: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Payments above the upper IQR fence (Q3 + 1.5 * IQR), largest first.
+
+        For a sample `frame`, the fence comes from the sample, the largest
+        payments from totals['largest'] and the count is scaled to all payments.
+        """
+        q1, q3 = frame["amount"].quantile([0.25, 0.75]).tolist()
+        fence = q3 + 1.5 * (q3 - q1)
+        above = frame[frame["amount"] > fence]
+        count = int(len(above))
+        if totals:
+            largest = totals["largest"]
+            above = pd.concat([above, largest[largest["amount"] > fence]]).drop_duplicates("row")
+            count = max(int(round(count * totals["count"] / len(frame))), min(len(above), OUTLIER_LIMIT))
+        top = above.nlargest(OUTLIER_LIMIT, "amount", keep="first")
+        return {
+            "fence": fence,
+            "count": count,
+            "top": [
+                {"row": int(row["row"]), "amount": float(row["amount"]),
+                 **{dimension: row[dimension] for dimension in dimensions}}
+                for _, row in top.iterrows()
+            ]
+        }
+
+    def _empty_balance_totals(self) -> Dict[str, Any]:
+        return {"column_totals": {}, "earliest": {}}
+
+    def _fold_balances(self, running: Dict[str, Any], start_row: int, headers: List[str],
+                       balance_columns: List[str], numeric_profile: List[NumericProfile]) -> None:
+        """Add rows start_row.. to the per-column balance totals and each header's earliest balance."""
+        column_totals = running["column_totals"]
+        for header, positions in self._columns_by_header(headers, balance_columns).items():
+            earliest = None
+            for i in positions:
+                mask, values = numeric_profile[i]
+                valid = mask & ~np.isnan(values)
+                column_totals[str(i)] = block_fold(
+                    np.where(valid, values, 0.0), start_row, column_totals.get(str(i), 0.0)
+                )[0]
+                if not valid.any():
+                    continue
+                first_row = int(valid.argmax())
+                if earliest is None or first_row <= earliest[0]:
+                    earliest = (first_row, float(values[first_row]))
+            # Each header keeps the value of its earliest numeric row
+            if earliest is not None and header not in running["earliest"]:
+                running["earliest"][header] = [start_row + earliest[0], earliest[1]]
+
+    def _balance_data(self, running: Dict[str, Any], headers: List[str], balance_columns: List[str]) -> Dict[str, Any]:
+        """balance_data output from the running balance totals."""
         balance_data = {
             "current_balances": {},
             "total_balance": 0.0,
             "balance_summary": {}
         }
-        
-        # Get the most recent balance (last row with balance data)
-        for row in reversed(rows):
-            if len(row) != len(headers):
-                continue
-                
-            for i, header in enumerate(headers):
-                if header in balance_columns and i < len(row):
-                    value = row[i]
-                    if value is not None and self._is_numeric(str(value)):
-                        try:
-                            amount = float(value)
-                            balance_data["current_balances"][header] = amount
-                            balance_data["total_balance"] += amount
-                        except (ValueError, TypeError):
-                            pass
-        
+        for header, positions in self._columns_by_header(headers, balance_columns).items():
+            for i in positions:
+                balance_data["total_balance"] += running["column_totals"].get(str(i), 0.0)
+            if header in running["earliest"]:
+                balance_data["current_balances"][header] = running["earliest"][header][1]
         return balance_data
 
-    def _analyze_transaction_patterns(self, rows: List[List[Any]], headers: List[str], 
-                                    payment_columns: List[str], balance_columns: List[str]) -> Dict[str, Any]:
-        """Analyze transaction patterns for risk assessment."""
+    def _transaction_patterns(self, payment_count: Optional[int]) -> Dict[str, Any]:
+        """Frequency and risk level from the payment count (None when the sheet has no payment columns)."""
         patterns = {
             "frequency": "unknown",
             "amount_range": "unknown",
@@ -377,16 +1057,9 @@ class ExcelAnalysisTool(BaseTool):
             "patterns_detected": []
         }
         
-        if not payment_columns:
+        if payment_count is None:
             return patterns
         
-        # Analyze payment frequency
-        payment_count = len([row for row in rows if any(
-            i < len(row) and headers[i] in payment_columns and 
-            row[i] is not None and self._is_numeric(str(row[i]))
-            for i in range(len(headers))
-        )])
-        
         if payment_count > 100:
             patterns["frequency"] = "high"
             patterns["risk_level"] = "medium"
@@ -414,8 +1087,8 @@ class ExcelAnalysisTool(BaseTool):
         insights["available_funds"] = max(0.0, total_balance - total_payments)
         
         # Extract payment history
-        payment_list = financial_analysis.get("payment_data", {}).get("payment_list", [])
-        insights["payment_history"] = payment_list[:10]  # Last 10 payments
+        payment_data = financial_analysis.get("payment_data", {})
+        insights["payment_history"] = payment_data.get("sample_payments", [])[:PAYMENT_SAMPLE_LIMIT]
         
         # Generate risk factors
         patterns = financial_analysis.get("transaction_patterns", {})
@@ -440,7 +1113,7 @@ class ExcelAnalysisTool(BaseTool):
         return {
             "status": "success",
             "excel_metadata": excel_data["metadata"],
-            "raw_data": excel_data["raw_data"],
+            "raw_data": self._emit_raw_data(excel_data["raw_data"]),
             "processed_insights": {
                 "financial_analysis": financial_analysis,
                 "payment_analysis": payment_insights
@@ -456,31 +1129,433 @@ class ExcelAnalysisTool(BaseTool):
             }
         }
 
+    def _emit_raw_data(self, raw_data: Dict[str, Any]) -> Dict[str, List[Dict[Any, Any]]]:
+        """Convert columnar sheets to row records, only here at the output boundary."""
+        return {
+            sheet_name: data.records() if isinstance(data, SheetColumns) else data
+            for sheet_name, data in raw_data.items()
+        }
+
+    def _create_payment_focused_output(self, excel_data: Dict[str, Any], financial_analysis: Dict[str, Any],
+                                       payment_insights: Dict[str, Any]) -> Dict[str, Any]:
+        """Payment columns, payment records and per-recipient rollups; no raw rows."""
+        payment_data = financial_analysis.get("payment_data", {})
+        return {
+            "status": "success",
+            "analysis_type": "payment_focused",
+            "excel_metadata": excel_data["metadata"],
+            "payment_data": payment_data,
+            "transaction_patterns": financial_analysis.get("transaction_patterns", {}),
+            "payment_analysis": payment_insights,
+            "data_quality": excel_data["data_quality"],
+            "llm_ready_summary": {
+                "total_sheets": excel_data["metadata"]["total_sheets"],
+                "total_rows": excel_data["data_quality"]["total_rows"],
+                "available_funds": payment_insights["available_funds"],
+                "payment_count": payment_data.get("total_payments", 0),
+                "recipient_count": payment_data.get("payment_aggregates", {}).get("by_recipient", {}).get("groups", 0),
+                "risk_level": "low" if not payment_insights["risk_factors"] else "medium",
+                "key_insights": financial_analysis.get("key_insights", [])
+            }
+        }
+
+    def _create_financial_summary_output(self, excel_data: Dict[str, Any], financial_analysis: Dict[str, Any],
+                                         payment_insights: Dict[str, Any]) -> Dict[str, Any]:
+        """Aggregates only: totals, balances, patterns and data quality."""
+        payment_data = financial_analysis.get("payment_data", {})
+        balance_data = financial_analysis.get("balance_data", {})
+        return {
+            "status": "success",
+            "analysis_type": "financial_summary",
+            "excel_metadata": excel_data["metadata"],
+            "financial_summary": {
+                "total_payments": payment_data.get("total_payments", 0),
+                "total_payment_amount": payment_data.get("total_amount", 0.0),
+                "total_balance": balance_data.get("total_balance", 0.0),
+                "current_balances": balance_data.get("current_balances", {}),
+                "available_funds": payment_insights["available_funds"],
+                "transaction_patterns": financial_analysis.get("transaction_patterns", {}),
+                "risk_factors": payment_insights["risk_factors"],
+                "recommendations": payment_insights["recommendations"]
+            },
+            "data_quality": excel_data["data_quality"],
+            "llm_ready_summary": {
+                "total_sheets": excel_data["metadata"]["total_sheets"],
+                "total_rows": excel_data["data_quality"]["total_rows"],
+                "available_funds": payment_insights["available_funds"],
+                "payment_count": payment_data.get("total_payments", 0),
+                "risk_level": "low" if not payment_insights["risk_factors"] else "medium",
+                "key_insights": financial_analysis.get("key_insights", [])
+            }
+        }
+
     def _is_currency(self, value: str) -> bool:
         """Check if a value looks like currency."""
-        currency_patterns = [
-            r'^\$[\d,]+\.?\d*$',
-            r'^€[\d,]+\.?\d*$',
-            r'^£[\d,]+\.?\d*$',
-            r'^[\d,]+\.?\d*\s*(USD|EUR|GBP|JPY)$'
-        ]
-        return any(re.match(pattern, str(value)) for pattern in currency_patterns)
+        return is_currency(value)
 
     def _is_date(self, value: str) -> bool:
         """Check if a value looks like a date."""
-        date_patterns = [
-            r'^\d{4}-\d{2}-\d{2}$',
-            r'^\d{2}/\d{2}/\d{4}$',
-            r'^\d{2}-\d{2}-\d{4}$'
-        ]
-        return any(re.match(pattern, str(value)) for pattern in date_patterns)
+        return is_date(value)
 
     def _is_numeric(self, value: str) -> bool:
         """Check if a value is numeric."""
-        try:
-            # Remove currency symbols and commas
-            cleaned_value = re.sub(r'[$,€£¥,\s]', '', str(value))
-            float(cleaned_value)
+        return is_numeric(value)
+
+
+class PaymentAggregateTotals:
+    """
+    Bounded running inputs of payment_aggregates, for streaming mode and ledger checkpoints.
+
+    Keeps the amount range, per-group [count, total, max], the OUTLIER_LIMIT
+    largest payments and a uniform reservoir sample of STREAMING_AGGREGATE_SAMPLE_ROWS
+    payment rows. While every payment fits in the sample the aggregates are exact;
+    beyond it counts, totals, means and maxima stay exact and quantiles come from
+    the sample. The sampling RNG is part of the state, so folding the same rows
+    in any number of steps gives the same result.
+    """
+
+    def __init__(self, dimensions: List[str], capacity: int = STREAMING_AGGREGATE_SAMPLE_ROWS):
+        self.dimensions = list(dimensions)
+        self.capacity = capacity
+        self.folded = 0
+        self.amount_range = [np.inf, -np.inf]
+        # dimension -> group key -> [count, total, max]
+        self.group_totals: Dict[str, Dict[str, List[float]]] = {dimension: {} for dimension in self.dimensions}
+        # Reservoir sample of the payment rows: row, amount and one group key column per dimension
+        self.sample: Dict[str, np.ndarray] = {
+            "row": np.empty(capacity, dtype=np.int64), "amount": np.empty(capacity),
+            **{dimension: np.empty(capacity, dtype=object) for dimension in self.dimensions}
+        }
+        self.sample_size = 0
+        self.rng = np.random.default_rng(0)
+        # Min-heap of the OUTLIER_LIMIT largest payments: (amount, -row, group keys)
+        self.largest: List[Tuple[float, int, Tuple[str, ...]]] = []
+
+    def fold(self, rows: np.ndarray, amounts: np.ndarray, keys: Dict[str, np.ndarray]) -> None:
+        """Add payment rows (sheet row numbers, amounts, group keys per dimension), in row order."""
+        if len(rows) == 0:
+            return
+        self.amount_range = [min(self.amount_range[0], float(amounts.min())), max(self.amount_range[1], float(amounts.max()))]
+
+        # Group totals are summed per block of LEDGER_BLOCK_ROWS sheet rows, so they do not depend on how rows are split across folds
+        blocks = rows // LEDGER_BLOCK_ROWS
+        for dimension, dimension_keys in keys.items():
+            chunk = pd.DataFrame({"block": blocks, "key": dimension_keys, "amount": amounts}).groupby(["block", "key"], sort=False)["amount"]
+            totals = self.group_totals[dimension]
+            for (_, key), size, total, largest in chunk.agg(["size", "sum", "max"]).itertuples():
+                group = totals.setdefault(key, [0, 0.0, -np.inf])
+                group[0] += int(size)
+                group[1] += float(total)
+                group[2] = max(group[2], float(largest))
+
+        # Reservoir sampling (algorithm R): fill the sample, then row i replaces a random slot with probability k / (i + 1)
+        columns = {"row": rows, "amount": amounts, **keys}
+        fill = min(self.capacity - self.sample_size, len(rows))
+        for name, values in columns.items():
+            self.sample[name][self.sample_size:self.sample_size + fill] = values[:fill]
+        self.sample_size += fill
+        if fill < len(rows):
+            seen = self.folded + np.arange(fill, len(rows))
+            slots = self.rng.integers(0, seen + 1)
+            for index, slot in zip(np.flatnonzero(slots < self.capacity) + fill, slots[slots < self.capacity]):
+                for name, values in columns.items():
+                    self.sample[name][slot] = values[index]
+        self.folded += len(rows)
+
+        for index in np.argsort(amounts, kind="stable")[::-1][:OUTLIER_LIMIT]:
+            entry = (float(amounts[index]), -int(rows[index]), tuple(keys[dimension][index] for dimension in self.dimensions))
+            if len(self.largest) < OUTLIER_LIMIT:
+                heapq.heappush(self.largest, entry)
+            elif entry > self.largest[0]:
+                heapq.heapreplace(self.largest, entry)
+
+    def payment_aggregates(self, tool: "ExcelAnalysisTool", dimensions: Dict[str, str],
+                           count: int, total: float) -> Dict[str, Any]:
+        """payment_aggregates of the folded rows; `count` and `total` are the sheet's exact payment totals."""
+        frame = pd.DataFrame({name: values[:self.sample_size] for name, values in self.sample.items()})
+        if self.sample_size == count:
+            # Every payment row is in the sample: the aggregates are exact
+            return tool._payment_aggregates(frame, dimensions)
+        largest = pd.DataFrame(
+            [{"row": -negative_row, "amount": amount, **dict(zip(self.dimensions, group_keys))}
+             for amount, negative_row, group_keys in self.largest]
+        )
+        totals = {
+            "count": count,
+            "total": total,
+            "min": self.amount_range[0],
+            "max": self.amount_range[1],
+            "groups": self.group_totals,
+            "largest": largest,
+        }
+        return tool._payment_aggregates(frame, dimensions, totals)
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-ready copy for a ledger checkpoint (size bounded by the sample capacity and the group count)."""
+        return {
+            "dimensions": self.dimensions,
+            "folded": self.folded,
+            "amount_range": self.amount_range,
+            "group_totals": self.group_totals,
+            "sample": {name: values[:self.sample_size].tolist() for name, values in self.sample.items()},
+            "rng": self.rng.bit_generator.state,
+            "largest": [list(entry) for entry in self.largest],
+        }
+
+    @classmethod
+    def from_state(cls, stored: Dict[str, Any]) -> "PaymentAggregateTotals":
+        totals = cls(stored["dimensions"])
+        totals.folded = stored["folded"]
+        totals.amount_range = stored["amount_range"]
+        totals.group_totals = stored["group_totals"]
+        totals.sample_size = len(stored["sample"]["row"])
+        for name, values in stored["sample"].items():
+            totals.sample[name][:totals.sample_size] = values
+        totals.rng.bit_generator.state = stored["rng"]
+        # Entries were in heap order when stored
+        totals.largest = [(amount, negative_row, tuple(keys)) for amount, negative_row, keys in stored["largest"]]
+        return totals
+
+
+class StreamingSheetAccumulator:
+    """
+    Folds the rows of one sheet into the statistics ExcelAnalysisTool reports.
+
+    Mirrors the in-memory analysis (row 0 provides the headers and is also
+    counted as data, types come from each column's first non-null value) while
+    holding only per-column counters and bounded previews.
+    """
+
+    def __init__(self, tool: ExcelAnalysisTool, analysis_type: str = "comprehensive"):
+        self._tool = tool
+        self.keep_preview = analysis_type == "comprehensive"
+        self.keep_records = analysis_type != "financial_summary"
+        self.width = 0
+        self.rows_seen = 0
+        self._pending_empty = 0
+        self.headers: List[str] = []
+        self.missing: List[int] = []
+        self.data_types: Dict[str, str] = {}
+        self.preview: List[Dict[int, Any]] = []
+        self.payment_positions: Dict[str, List[int]] = {}
+        self.balance_positions: Dict[str, List[int]] = {}
+        # dimension -> (header, position) of the payment_aggregates group columns
+        self.dimensions: Dict[str, Tuple[str, int]] = {}
+        self.payment_count = 0
+        self.payment_total = 0.0
+        self.sample_payments: List[Dict[str, Any]] = []
+        # Payment rows not yet folded: (row, amount, raw dimension values)
+        self._pending_payments: List[Tuple[int, float, Tuple[Any, ...]]] = []
+        self._aggregates: Optional[PaymentAggregateTotals] = None
+        self.balance_total = 0.0
+        self.current_balances: Dict[str, float] = {}
+        self._balance_row: Dict[str, int] = {}
+
+    def _is_numeric(self, value: Any) -> bool:
+        if isinstance(value, bool):
+            return False
+        if isinstance(value, (int, float)):
             return True
-        except (ValueError, TypeError):
-            return False 
\ No newline at end of file
+        return is_numeric(value)
+
+    def _classify(self, value: Any) -> str:
+        return value_kind(value)
+
+    def _widen(self, width: int) -> None:
+        """New columns were missing in every row seen so far."""
+        for position in range(self.width, width):
+            self.missing.append(self.rows_seen)
+            if self.rows_seen:
+                self.headers.append(f"Column_{position}")
+        self.width = width
+
+    def _commit_empty_rows(self) -> None:
+        # Blank rows count only when followed by data (pandas drops trailing blank rows)
+        for position in range(self.width):
+            self.missing[position] += self._pending_empty
+        self.rows_seen += self._pending_empty
+        self._pending_empty = 0
+
+    def add_row(self, row: Tuple[Any, ...]) -> None:
+        while row and row[-1] is None:
+            row = row[:-1]
+        if not row:
+            self._pending_empty += 1
+            return
+        self._commit_empty_rows()
+        if len(row) > self.width:
+            self._widen(len(row))
+
+        row_index = self.rows_seen
+        if row_index == 0:
+            self.headers = [f"Column_{i}" if value is None else str(value).strip() for i, value in enumerate(row)]
+            self._identify_columns()
+
+        for position in range(self.width):
+            value = row[position] if position < len(row) else None
+            if value is None:
+                self.missing[position] += 1
+            elif f"Column_{position}" not in self.data_types:
+                self.data_types[f"Column_{position}"] = self._classify(value)
+                if self.data_types[f"Column_{position}"] == "currency":
+                    self._add_currency_column(position)
+
+        if self.keep_preview and len(self.preview) < STREAMING_PREVIEW_ROWS:
+            self.preview.append({position: row[position] if position < len(row) else None
+                                 for position in range(self.width)})
+
+        self._add_payment_row(row, row_index)
+        self._add_balance_row(row, row_index)
+        self.rows_seen += 1
+
+    def _identify_columns(self) -> None:
+        payment_columns = self._tool._identify_payment_columns(self.headers, self.data_types)
+        balance_columns = self._tool._identify_balance_columns(self.headers, self.data_types)
+        self.payment_positions = self._tool._columns_by_header(self.headers, payment_columns)
+        self.balance_positions = self._tool._columns_by_header(self.headers, balance_columns)
+        if self.keep_records:
+            self.dimensions = {dimension: (header, self.headers.index(header))
+                               for dimension, header in self._tool._identify_dimension_columns(self.headers).items()}
+            self._aggregates = PaymentAggregateTotals(list(self.dimensions))
+
+    def _add_currency_column(self, position: int) -> None:
+        """A blank-header column ('Column_i') typed currency is a payment and balance column."""
+        header = self.headers[position] if position < len(self.headers) else f"Column_{position}"
+        if header != f"Column_{position}":
+            return
+        for positions in (self.payment_positions, self.balance_positions):
+            if position not in positions.get(header, []):
+                positions.setdefault(header, []).append(position)
+                positions[header].sort()
+
+    def _add_payment_row(self, row: Tuple[Any, ...], row_index: int) -> None:
+        record = {}
+        for header, positions in self.payment_positions.items():
+            for position in positions:
+                value = row[position] if position < len(row) else None
+                if value is not None and self._is_numeric(value):
+                    record[header] = value
+        if not record:
+            return
+        self.payment_count += 1
+        amount = 0.0
+        for value in record.values():
+            try:
+                amount += float(value)
+            except (ValueError, TypeError):
+                pass
+        self.payment_total += amount
+        if not self.keep_records:
+            return
+        if len(self.sample_payments) < PAYMENT_SAMPLE_LIMIT:
+            self.sample_payments.append(record)
+        values = tuple(row[position] if position < len(row) else None for _, position in self.dimensions.values())
+        self._pending_payments.append((row_index, amount, values))
+        if len(self._pending_payments) >= STREAMING_PAYMENT_CHUNK_ROWS:
+            self._fold_pending_payments()
+
+    def _fold_pending_payments(self) -> None:
+        """Add the pending payment rows to the bounded payment aggregates."""
+        pending = self._pending_payments
+        if not pending:
+            return
+        self._pending_payments = []
+        rows = np.fromiter((payment[0] for payment in pending), dtype=np.int64, count=len(pending))
+        amounts = np.fromiter((payment[1] for payment in pending), dtype=np.float64, count=len(pending))
+        keys = {
+            dimension: self._tool._dimension_keys(dimension, pd.Series([payment[2][k] for payment in pending], dtype=object))
+            for k, dimension in enumerate(self.dimensions)
+        }
+        self._aggregates.fold(rows, amounts, keys)
+
+    def _payment_aggregates(self) -> Dict[str, Any]:
+        """payment_aggregates over the whole sheet, as ExcelAnalysisTool._payment_data builds them in memory."""
+        self._fold_pending_payments()
+        dimensions = {dimension: header for dimension, (header, _) in self.dimensions.items()}
+        return self._aggregates.payment_aggregates(self._tool, dimensions, self.payment_count, self.payment_total)
+
+    def _add_balance_row(self, row: Tuple[Any, ...], row_index: int) -> None:
+        for header, positions in self.balance_positions.items():
+            for position in positions:
+                value = row[position] if position < len(row) else None
+                if value is None or not self._is_numeric(value):
+                    continue
+                try:
+                    amount = float(value)
+                except (ValueError, TypeError):
+                    continue
+                self.balance_total += amount
+                # Keep the earliest row's value, as the bottom-up scan of the in-memory path does
+                if self._balance_row.get(header, row_index) == row_index:
+                    self.current_balances[header] = amount
+                    self._balance_row[header] = row_index
+
+    def finish(self, sheet_name: str) -> Tuple[Dict[str, Any], List[Dict[int, Any]]]:
+        """Return the sheet data (with its financial analysis) and the raw-row preview."""
+        for position in range(self.width):
+            self.data_types.setdefault(f"Column_{position}", "empty")
+
+        analysis = {
+            "payment_data": {},
+            "balance_data": {},
+            "transaction_patterns": {},
+            "risk_indicators": {},
+            "key_insights": []
+        }
+        if self.payment_positions:
+            analysis["payment_data"] = {
+                "total_payments": self.payment_count,
+                "total_amount": self.payment_total,
+                "payment_summary": {}
+            }
+            if self.keep_records and self.payment_count:
+                analysis["payment_data"]["payment_aggregates"] = self._payment_aggregates()
+                analysis["payment_data"]["sample_payments"] = self.sample_payments
+            analysis["key_insights"].append(f"Found payment data in sheet '{sheet_name}'")
+        if self.balance_positions:
+            analysis["balance_data"] = {
+                "current_balances": self.current_balances,
+                "total_balance": self.balance_total,
+                "balance_summary": {}
+            }
+            analysis["key_insights"].append(f"Found balance data in sheet '{sheet_name}'")
+        if self.payment_positions or self.balance_positions:
+            analysis["transaction_patterns"] = self._tool._transaction_patterns(self.payment_count)
+
+        sheet_data = {
+            "headers": self.headers,
+            "data_types": self.data_types,
+            "missing_values": {f"Column_{position}": count for position, count in enumerate(self.missing) if count > 0},
+            "total_rows": self.rows_seen,
+            "total_columns": self.width,
+            "financial_analysis": analysis
+        }
+        return sheet_data, self.preview
+
+
+_worker_tool: Optional[ExcelAnalysisTool] = None
+
+
+def analyze_sheet_in_worker(file_path: str, sheet_name: str, analysis_type: str, return_columns: bool = False
+                            ) -> Tuple[Dict[str, Any], Optional[SheetColumns], Optional[SheetColumns]]:
+    """
+    Process-pool entry point: parse, profile and analyze one sheet.
+
+    Only `sheet_name` is parsed (calamine and openpyxl in read-only mode load
+    sheets on demand). With `return_columns`, the parsed columns come back too so
+    the parent can store them in the parsed sheet cache.
+    """
+    global _worker_tool
+    if _worker_tool is None:
+        _worker_tool = ExcelAnalysisTool()
+    tool = _worker_tool
+    columns = SheetColumns.from_frame(
+        pd.read_excel(file_path, sheet_name=sheet_name, header=None, engine=excel_engine())
+    )
+    sheet_data, raw_columns = tool._process_sheet(columns, analysis_type, sheet_name)
+    if "financial_analysis" not in sheet_data:
+        sheet_data["financial_analysis"] = tool._analyze_sheet_for_financial_data(sheet_data, sheet_name, analysis_type)
+    # Only output-relevant data goes back to the parent; comprehensive columns travel as raw_columns
+    for key in ("columns", "numeric_profile"):
+        sheet_data.pop(key, None)
+    return sheet_data, raw_columns, columns if return_columns else None
@@ -0,0 +1,204 @@
+"""
+Content-addressed cache of ExcelAnalysisTool results.
+
+Results are keyed by the SHA-256 of the workbook bytes plus the analysis type
+(and ANALYSIS_VERSION, bumped whenever the output format changes), so the same
+workbook uploaded under another temp name hits, and a modified file misses.
+File digests are memoized per (path, size, mtime_ns, inode) so unchanged files
+are not re-hashed on every call.
+
+Tiers:
+- in-process LRU bounded by TREASURY_EXCEL_CACHE_MEMORY_MB (default 64)
+- optional on-disk tier under TREASURY_EXCEL_CACHE_DIR, bounded by
+  TREASURY_EXCEL_CACHE_DISK_MB (default 256), least recently used files evicted
+  first; writes happen on the background writer
+
+Set TREASURY_EXCEL_CACHE=0 to disable caching.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from ..metrics import metrics
+from ..task_output_store import submit_write
+
+
+ANALYSIS_VERSION = "9"
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExcelResultCache:
+    """Two-tier (memory LRU + optional disk) cache of analysis result strings."""
+
+    def __init__(self, memory_max_bytes: int, disk_dir: Optional[Path] = None, disk_max_bytes: int = 0,
+                 enabled: bool = True, metric_prefix: str = "excel_cache"):
+        self.enabled = enabled
+        self.metric_prefix = metric_prefix
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._digests: Dict[Tuple[str, int, int, int], str] = {}
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def key_for(self, file_path: str, analysis_type: str) -> str:
+        """Cache key for analyzing `file_path` with `analysis_type`."""
+        return f"v{ANALYSIS_VERSION}-{analysis_type}-{self.digest_for(file_path)}"
+
+    def digest_for(self, file_path: str) -> str:
+        """Content digest of `file_path`, memoized while the file is unchanged."""
+        stat = os.stat(file_path)
+        stat_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            digest = self._digests.get(stat_key)
+        if digest is None:
+            digest = file_digest(file_path)
+            with self._lock:
+                if len(self._digests) > 1024:
+                    self._digests.clear()
+                self._digests[stat_key] = digest
+        return digest
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits["memory"] += 1
+        if value is not None:
+            metrics.increment(f"{self.metric_prefix}_hits_total", tier="memory")
+            return value
+
+        value = self._read_disk(key)
+        if value is not None:
+            with self._lock:
+                self.hits["disk"] += 1
+            metrics.increment(f"{self.metric_prefix}_hits_total", tier="disk")
+            self._put_memory(key, value)
+            return value
+
+        with self._lock:
+            self.misses += 1
+        metrics.increment(f"{self.metric_prefix}_misses_total")
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+        self._put_memory(key, value)
+        if self.disk_dir is not None:
+            submit_write(self._write_disk, key, value)
+
+    def _put_memory(self, key: str, value: str) -> None:
+        size = len(value)
+        if size > self.memory_max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._entries[key] = value
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                metrics.increment(f"{self.metric_prefix}_evictions_total", tier="memory")
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json.gz"
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                value = f.read()
+            # Touch so eviction treats the entry as recently used
+            os.utime(path)
+            return value
+        except (FileNotFoundError, OSError, EOFError):
+            return None
+
+    def _write_disk(self, key: str, value: str) -> None:
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until the tier fits its size budget."""
+        entries = []
+        for path in self.disk_dir.glob("*.json.gz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+                metrics.increment(f"{self.metric_prefix}_evictions_total", tier="disk")
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        """Drop the memory tier (the disk tier is left to eviction)."""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+            self._digests.clear()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+            return {
+                "enabled": self.enabled,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+            }
+
+
+def cache_from_env(env_prefix: str, metric_prefix: str, enabled_default: str = "1") -> ExcelResultCache:
+    """Build a cache configured by {env_prefix}, {env_prefix}_MEMORY_MB, _DIR and _DISK_MB."""
+    disk_dir = os.getenv(f"{env_prefix}_DIR")
+    return ExcelResultCache(
+        memory_max_bytes=int(float(os.getenv(f"{env_prefix}_MEMORY_MB", "64")) * 1024 * 1024),
+        disk_dir=Path(disk_dir) if disk_dir else None,
+        disk_max_bytes=int(float(os.getenv(f"{env_prefix}_DISK_MB", "256")) * 1024 * 1024),
+        enabled=os.getenv(env_prefix, enabled_default) != "0",
+        metric_prefix=metric_prefix,
+    )
+
+
+# Process-wide cache used by ExcelAnalysisTool
+excel_result_cache = cache_from_env("TREASURY_EXCEL_CACHE", "excel_cache")
@@ -0,0 +1,128 @@
+"""
+Persisted running aggregates for append-only ledgers (incremental re-analysis).
+
+Rows are grouped into fixed blocks of LEDGER_BLOCK_ROWS, aligned to absolute
+row numbers. A ledger's state is checkpointed at the last complete block: the
+digest of every block before it plus the aggregates of those rows. When the
+ledger comes back with rows appended, the stored blocks are re-verified against
+the new file and only rows from the checkpoint on are analyzed; an edited (not
+just appended-to) ledger fails verification and is analyzed from scratch.
+
+Float totals are always computed as a left fold of per-block sums, so resuming
+from a checkpoint adds exactly the same numbers in the same order as a single
+pass over the whole sheet, and the incremental result is identical to a
+from-scratch one.
+
+States should stay bounded in the ledger's size (ExcelAnalysisTool keeps a
+fixed-size payment sample rather than every payment row). A state larger than
+the memory tier is stored only when the disk tier is configured; otherwise it
+is dropped with a warning and the ledger_state_oversize_total metric, and the
+next run analyzes the ledger from scratch.
+
+States are stored like analysis results (see excel_result_cache), configured by
+TREASURY_LEDGER_STATE=1 (off by default), TREASURY_LEDGER_STATE_MEMORY_MB,
+TREASURY_LEDGER_STATE_DIR and TREASURY_LEDGER_STATE_DISK_MB.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..metrics import metrics
+from .excel_result_cache import cache_from_env
+from .sheet_columns import SheetColumns
+
+
+LEDGER_BLOCK_ROWS = 4096
+STATE_VERSION = "4"
+
+ledger_states = cache_from_env("TREASURY_LEDGER_STATE", "ledger_state", enabled_default="0")
+
+
+def block_fold(values: np.ndarray, start_row: int = 0, initial: float = 0.0) -> Tuple[float, float]:
+    """
+    Sum `values` (rows start_row.., block-aligned) as a left fold of per-block sums.
+
+    Returns the total and the running total at the last complete block.
+    """
+    total = float(initial)
+    checkpoint = total
+    for offset in range(0, len(values), LEDGER_BLOCK_ROWS):
+        block = values[offset:offset + LEDGER_BLOCK_ROWS]
+        total += float(block.sum())
+        if len(block) == LEDGER_BLOCK_ROWS:
+            checkpoint = total
+    return total, checkpoint
+
+
+def row_hashes(columns: SheetColumns, start: int, stop: int) -> np.ndarray:
+    """
+    One uint64 per row of rows [start, stop), mixing the row's non-null cells.
+
+    Null cells contribute nothing, so columns appended later (null in old rows)
+    leave the hashes of old rows unchanged.
+    """
+    count = stop - start
+    notna = columns.notna()[start:stop]
+    hashes = np.zeros(count, dtype=np.uint64)
+    body_start = max(start, 1)
+    for position in range(columns.n_cols):
+        cells = np.zeros(count, dtype=np.uint64)
+        if stop > body_start:
+            cells[body_start - start:] = pd.util.hash_array(columns.bodies[position][body_start - 1:stop - 1])
+        if start == 0 and count:
+            cells[0] = pd.util.hash_array(np.array([columns.head[position]], dtype=object))[0]
+        mixed = pd.util.hash_array(cells + np.uint64(position))
+        hashes += np.where(notna[:, position], mixed, np.uint64(0))
+    return hashes
+
+
+def block_digests(columns: SheetColumns, start: int, stop: int) -> List[str]:
+    """Digest of each block of rows [start, stop); both bounds are block-aligned."""
+    hashes = row_hashes(columns, start, stop)
+    return [
+        hashlib.blake2b(hashes[offset:offset + LEDGER_BLOCK_ROWS].tobytes(), digest_size=16).hexdigest()
+        for offset in range(0, len(hashes), LEDGER_BLOCK_ROWS)
+    ]
+
+
+def ledger_key(kind: str, name: str, head: List[Any]) -> str:
+    """States are per ledger: the sheet (or caller) name plus its header row."""
+    identity = json.dumps([name, [str(value) for value in head]])
+    return f"ledger-v{STATE_VERSION}-{kind}-{hashlib.sha256(identity.encode('utf-8')).hexdigest()}"
+
+
+def load_state(key: str) -> Optional[Dict[str, Any]]:
+    stored = ledger_states.get(key)
+    return json.loads(stored) if stored is not None else None
+
+
+def verified_rows(columns: SheetColumns, state: Optional[Dict[str, Any]]) -> int:
+    """Rows covered by `state` that `columns` still starts with unchanged (0 if none)."""
+    if not state or state.get("version") != STATE_VERSION:
+        return 0
+    rows = state["rows"]
+    if rows == 0 or rows > columns.n_rows or len(state["blocks"]) * LEDGER_BLOCK_ROWS != rows:
+        return 0
+    if block_digests(columns, 0, rows) != state["blocks"]:
+        return 0
+    return rows
+
+
+def save_checkpoint(key: str, columns: SheetColumns, previous: Optional[Dict[str, Any]], start: int,
+                    checkpoint: int, payload: Dict[str, Any]) -> None:
+    """Store `payload` (aggregates of rows [0, checkpoint)), extending the verified blocks of `previous`."""
+    blocks = (previous["blocks"] if start else []) + block_digests(columns, start, checkpoint)
+    state = {"version": STATE_VERSION, "rows": checkpoint, "blocks": blocks, **payload}
+    # Serialized now, so later mutation of the caller's aggregates cannot leak into the checkpoint
+    serialized = json.dumps(state, default=str)
+    if len(serialized) > ledger_states.memory_max_bytes and ledger_states.disk_dir is None:
+        metrics.increment("ledger_state_oversize_total", kind=key.split("-")[2])
+        print(f"⚠️ Ledger state {key} is {len(serialized) / 1024 / 1024:.1f}MB, over the "
+              f"{ledger_states.memory_max_bytes / 1024 / 1024:.0f}MB memory tier and no "
+              f"TREASURY_LEDGER_STATE_DIR is set; not checkpointed")
+        return
+    ledger_states.put(key, serialized)
@@ -0,0 +1,66 @@
+"""
+Vectorized single / daily / monthly limit evaluation for a whole list of payments.
+
+Payments are taken in priority order (urgent, high, normal, low; input order
+within a priority). A payment over the single-transaction limit, or with a
+non-positive amount, is blocked and takes no headroom. The others are approved
+while the cumulative sum of their amounts, on top of what the user already
+used today / this month, stays within the daily and monthly limits; from the
+first breach on, every later payment is blocked too, so a lower-priority
+payment never goes out ahead of a blocked higher-priority one.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .limit_ledger import AMOUNT_EPSILON
+
+
+PRIORITY_RANK = {"urgent": 0, "critical": 0, "high": 1, "normal": 2, "medium": 2, "low": 3}
+LIMIT_KINDS = ("single", "daily", "monthly")
+
+
+def priority_order(priorities: Iterable[Any]) -> np.ndarray:
+    """Indices of the payments in assessment order (unknown priorities rank as 'normal')."""
+    ranks = np.fromiter(
+        (PRIORITY_RANK.get(str(priority or "normal").strip().lower(), PRIORITY_RANK["normal"]) for priority in priorities),
+        dtype=np.int8,
+    )
+    return np.argsort(ranks, kind="stable")
+
+
+def evaluate_limits(amounts: np.ndarray, limits: Dict[str, float], daily_used: float = 0.0,
+                    monthly_used: float = 0.0, priorities: Optional[Iterable[Any]] = None) -> Dict[str, Any]:
+    """
+    Per-payment verdict masks (in input order) for `amounts` against limits {'single', 'daily', 'monthly'}.
+
+    Returns masks 'approved', 'invalid', 'single', 'daily', 'monthly', the
+    assessment 'order', the input index of the first payment breaching each
+    limit ('first_breach', None when none does) and the 'approved_amount'.
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    order = priority_order(priorities) if priorities is not None else np.arange(len(amounts))
+    ordered = amounts[order]
+
+    # NaN compares False, so unparseable amounts land here too
+    invalid = ~(ordered > 0)
+    single = ~invalid & (ordered > limits["single"] + AMOUNT_EPSILON)
+    eligible = ~invalid & ~single
+    running = np.cumsum(np.where(eligible, ordered, 0.0))
+    daily = eligible & (daily_used + running > limits["daily"] + AMOUNT_EPSILON)
+    monthly = eligible & (monthly_used + running > limits["monthly"] + AMOUNT_EPSILON)
+    approved = eligible & ~daily & ~monthly
+
+    masks = {"approved": approved, "invalid": invalid, "single": single, "daily": daily, "monthly": monthly}
+    result: Dict[str, Any] = {}
+    for name, mask in masks.items():
+        in_input_order = np.empty(len(mask), dtype=bool)
+        in_input_order[order] = mask
+        result[name] = in_input_order
+    result["order"] = order
+    result["first_breach"] = {
+        kind: int(order[np.argmax(masks[kind])]) if masks[kind].any() else None for kind in LIMIT_KINDS
+    }
+    result["approved_amount"] = float(ordered[approved].sum())
+    return result
@@ -0,0 +1,278 @@
+"""
+Shared, durable ledger of daily / monthly transaction-limit usage.
+
+TreasuryRiskTools is instantiated per request, so usage kept on the instance
+was reset on every request and invisible to concurrent ones. The ledger keeps
+it in SQLite (WAL journal, so readers never block the writer) shared by every
+tool instance, thread and process on the host:
+
+- limit_counters holds one row per (user, period): the period it covers plus
+  the committed and reserved amounts. Headroom is two primary-key lookups.
+- reservations holds each reserved amount until it is committed (the payment
+  went out) or released (it did not); unfinished reservations expire after
+  their TTL and are released the next time the user reserves. Settled
+  reservations are pruned after SETTLED_RETENTION_S.
+
+Every reserve / commit / release is one BEGIN IMMEDIATE transaction, so the
+check and the update are atomic across processes. SQLite serializes all
+writers: it locks the whole database, not rows, so writes for different users
+never run in parallel. Writes are short. The per-user lock below only queues
+same-user callers of this process in Python, so they do not also wait on the
+database lock with its busy timeout. It adds no parallelism.
+
+The database is TREASURY_LIMIT_LEDGER_PATH (default
+~/.treasury_agent/limit_ledger.sqlite3); when it cannot be opened the ledger
+falls back to a process-local in-memory database.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..metrics import metrics
+
+
+DEFAULT_LEDGER_PATH = Path.home() / ".treasury_agent" / "limit_ledger.sqlite3"
+MEMORY_URI = "file:treasury_limit_ledger?mode=memory&cache=shared"
+DEFAULT_RESERVATION_TTL_S = 15 * 60
+# Settled reservations are kept this long for auditing, then pruned
+SETTLED_RETENTION_S = 35 * 86400
+# Tolerance for float sums of amounts (e.g. 0.1 + 0.2 against a 0.3 limit)
+AMOUNT_EPSILON = 1e-9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS limit_counters (
+    user_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    period_start TEXT NOT NULL,
+    committed REAL NOT NULL DEFAULT 0,
+    reserved REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, period)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS reservations (
+    reservation_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    amount REAL NOT NULL,
+    day TEXT NOT NULL,
+    month TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reservations_open ON reservations (user_id, status, expires_at);
+"""
+
+
+def period_starts(now: Optional[datetime] = None) -> Dict[str, str]:
+    """Start of the current day and month, as stored in limit_counters.period_start."""
+    now = now or datetime.now()
+    return {"day": now.strftime("%Y-%m-%d"), "month": now.strftime("%Y-%m")}
+
+
+class LimitLedger:
+    """Atomic reserve / commit / release of amounts against single, daily and monthly limits."""
+
+    def __init__(self, path: Optional[str] = None, reservation_ttl_s: float = DEFAULT_RESERVATION_TTL_S):
+        self.reservation_ttl_s = reservation_ttl_s
+        self._local = threading.local()
+        self._user_locks: Dict[str, threading.Lock] = {}
+        self._user_locks_guard = threading.Lock()
+        self._uri = MEMORY_URI
+        self._memory_anchor = None
+        try:
+            path = Path(path or os.getenv("TREASURY_LIMIT_LEDGER_PATH") or DEFAULT_LEDGER_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._uri = path.resolve().as_uri()
+            self._connection().executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Limit ledger at {path} unavailable ({e}); using an in-memory ledger for this process")
+            self._uri = MEMORY_URI
+            self._local = threading.local()
+            # A shared in-memory database lives as long as one connection to it is open
+            self._memory_anchor = self._connection()
+            self._memory_anchor.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection (sqlite3 connections are not shared across threads)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self._uri, uri=True, timeout=30.0, isolation_level=None)
+            if self._uri != MEMORY_URI:
+                connection.execute("PRAGMA journal_mode=WAL")
+                # WAL + NORMAL: durable across process crashes, one fsync per checkpoint instead of per commit
+                connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _user_lock(self, user_id: str) -> threading.Lock:
+        """This process's lock for `user_id`, created on first use."""
+        with self._user_locks_guard:
+            return self._user_locks.setdefault(user_id, threading.Lock())
+
+    def _counters(self, connection: sqlite3.Connection, user_id: str, periods: Dict[str, str]) -> Dict[str, Dict[str, float]]:
+        """Committed / reserved usage of the user's current day and month (zero for a new period)."""
+        rows = connection.execute(
+            "SELECT period, period_start, committed, reserved FROM limit_counters WHERE user_id = ?", (user_id,)
+        ).fetchall()
+        usage = {period: {"committed": 0.0, "reserved": 0.0} for period in periods}
+        for period, period_start, committed, reserved in rows:
+            if period in periods and period_start == periods[period]:
+                usage[period] = {"committed": committed, "reserved": reserved}
+        return usage
+
+    def _add(self, connection: sqlite3.Connection, user_id: str, periods: Dict[str, str],
+             column: str, amount: float) -> None:
+        """Add `amount` to `column` of the user's counters, starting a fresh row when the period rolled over."""
+        for period, period_start in periods.items():
+            connection.execute(
+                f"""
+                INSERT INTO limit_counters (user_id, period, period_start, {column}) VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id, period) DO UPDATE SET
+                    committed = CASE WHEN period_start = excluded.period_start THEN committed ELSE 0 END,
+                    reserved = CASE WHEN period_start = excluded.period_start THEN reserved ELSE 0 END,
+                    period_start = excluded.period_start
+                """,
+                (user_id, period, period_start, 0.0),
+            )
+            connection.execute(
+                f"UPDATE limit_counters SET {column} = MAX({column} + ?, 0) WHERE user_id = ? AND period = ?",
+                (amount, user_id, period),
+            )
+
+    def _release_expired(self, connection: sqlite3.Connection, user_id: str, now: float) -> None:
+        expired = connection.execute(
+            "SELECT reservation_id, amount, day, month FROM reservations "
+            "WHERE user_id = ? AND status = 'reserved' AND expires_at < ?",
+            (user_id, now),
+        ).fetchall()
+        for reservation_id, amount, day, month in expired:
+            self._settle(connection, reservation_id, user_id, amount, {"day": day, "month": month}, "expired")
+        if expired:
+            metrics.increment("limit_ledger_expired_total", len(expired))
+        connection.execute(
+            "DELETE FROM reservations WHERE user_id = ? AND status != 'reserved' AND created_at < ?",
+            (user_id, now - SETTLED_RETENTION_S),
+        )
+
+    def _settle(self, connection: sqlite3.Connection, reservation_id: str, user_id: str, amount: float,
+                reserved_in: Dict[str, str], status: str) -> None:
+        """Finish a reservation: its amount leaves `reserved` and, for 'committed', joins `committed`."""
+        current = period_starts()
+        connection.execute("UPDATE reservations SET status = ? WHERE reservation_id = ?", (status, reservation_id))
+        # Only counters still covering the period the amount was reserved in hold it
+        periods = {period: start for period, start in reserved_in.items() if current[period] == start}
+        self._add(connection, user_id, periods, "reserved", -amount)
+        if status == "committed":
+            self._add(connection, user_id, periods, "committed", amount)
+
+    def reserve(self, user_id: str, amount: float, limits: Dict[str, float],
+                ttl_s: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Atomically check `amount` against limits {'single', 'daily', 'monthly'} and hold it.
+
+        Returns 'approved', the 'reservation_id' (None when blocked), the
+        'violations' and the day / month usage before this amount.
+        """
+        now = time.time()
+        periods = period_starts()
+        with self._user_lock(user_id):
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._release_expired(connection, user_id, now)
+                usage = self._counters(connection, user_id, periods)
+                violations = []
+                if amount > limits["single"] + AMOUNT_EPSILON:
+                    violations.append(("single", 0.0))
+                for period, limit_key in (("day", "daily"), ("month", "monthly")):
+                    used = usage[period]["committed"] + usage[period]["reserved"]
+                    if used + amount > limits[limit_key] + AMOUNT_EPSILON:
+                        violations.append((limit_key, used))
+                reservation_id = None
+                if not violations:
+                    reservation_id = str(uuid.uuid4())
+                    connection.execute(
+                        "INSERT INTO reservations VALUES (?, ?, ?, ?, ?, 'reserved', ?, ?)",
+                        (reservation_id, user_id, amount, periods["day"], periods["month"], now,
+                         now + (self.reservation_ttl_s if ttl_s is None else ttl_s)),
+                    )
+                    self._add(connection, user_id, periods, "reserved", amount)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        metrics.increment("limit_ledger_reservations_total", outcome="approved" if reservation_id else "blocked")
+        return {
+            "approved": reservation_id is not None,
+            "reservation_id": reservation_id,
+            "violations": violations,
+            "daily_used": usage["day"]["committed"] + usage["day"]["reserved"],
+            "monthly_used": usage["month"]["committed"] + usage["month"]["reserved"],
+        }
+
+    def _finish(self, reservation_id: str, status: str) -> bool:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT user_id FROM reservations WHERE reservation_id = ?", (reservation_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        with self._user_lock(row[0]):
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT user_id, amount, day, month FROM reservations "
+                    "WHERE reservation_id = ? AND status = 'reserved'",
+                    (reservation_id,),
+                ).fetchone()
+                if row is not None:
+                    user_id, amount, day, month = row
+                    self._settle(connection, reservation_id, user_id, amount, {"day": day, "month": month}, status)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        if row is not None:
+            metrics.increment("limit_ledger_settled_total", outcome=status)
+        return row is not None
+
+    def commit(self, reservation_id: str) -> bool:
+        """Count a reserved amount as spent; False if it is unknown or no longer reserved."""
+        return self._finish(reservation_id, "committed")
+
+    def release(self, reservation_id: str) -> bool:
+        """Return a reserved amount to the user's headroom; False if it is unknown or no longer reserved."""
+        return self._finish(reservation_id, "released")
+
+    def headroom(self, user_id: str, limits: Dict[str, float]) -> Dict[str, float]:
+        """Current day / month usage and what is left under the daily and monthly limits."""
+        usage = self._counters(self._connection(), user_id, period_starts())
+        daily_used = usage["day"]["committed"] + usage["day"]["reserved"]
+        monthly_used = usage["month"]["committed"] + usage["month"]["reserved"]
+        return {
+            "daily_used": daily_used,
+            "monthly_used": monthly_used,
+            "daily_reserved": usage["day"]["reserved"],
+            "monthly_reserved": usage["month"]["reserved"],
+            "daily_remaining": max(limits["daily"] - daily_used, 0.0),
+            "monthly_remaining": max(limits["monthly"] - monthly_used, 0.0),
+            "single_limit": limits["single"],
+        }
+
+
+_ledger: Optional[LimitLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def limit_ledger() -> LimitLedger:
+    """The process-wide ledger, opened on first use."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = LimitLedger()
+        return _ledger
@@ -0,0 +1,199 @@
+"""
+Persisted columnar copies of parsed workbooks.
+
+Parsing .xlsx dominates analysis time, and the same upload is read by the
+proposal parser and by every agent's ExcelAnalysisTool call. The first parse of
+a workbook is written as one uncompressed Arrow IPC (Feather v2) file per sheet
+under TREASURY_PARSED_CACHE_DIR, keyed by the SHA-256 of the workbook bytes;
+later reads, in this or any other process, memory-map those files. Numeric
+columns come back as zero-copy (read-only) views of the map; text and other
+object columns are rebuilt as Python objects.
+
+Only sheets whose columns round-trip exactly are cached: an object column that
+mixes types (e.g. numbers and text) makes the workbook fall back to parsing.
+The directory is bounded by TREASURY_PARSED_CACHE_DISK_MB (default 1024), least
+recently used workbooks evicted first. Requires pyarrow; disabled when
+TREASURY_PARSED_CACHE_DIR is unset.
+"""
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..metrics import metrics
+from ..task_output_store import submit_write
+from .excel_result_cache import excel_result_cache
+from .sheet_columns import SheetColumns
+from .tabular_formats import pyarrow_available
+
+
+CACHE_VERSION = "1"
+MANIFEST_NAME = "manifest.json"
+# infer_dtype kinds of object columns that Arrow stores and to_pylist() returns unchanged
+EXACT_OBJECT_KINDS = {"string", "boolean", "integer", "datetime", "date", "time", "empty"}
+HEAD_TYPES = (str, int, float, bool, type(None))
+
+
+class ParsedSheetCache:
+    """Directory of memory-mappable parsed workbooks, one subdirectory per content digest."""
+
+    def __init__(self, cache_dir: Optional[Path], max_bytes: int):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache_dir is not None and pyarrow_available()
+
+    def _entry_dir(self, file_path: str) -> Path:
+        return self.cache_dir / f"v{CACHE_VERSION}-{excel_result_cache.digest_for(file_path)}"
+
+    def load(self, file_path: str) -> Optional[Dict[str, SheetColumns]]:
+        """Sheets of `file_path` in workbook order, or None when not cached."""
+        if not self.enabled:
+            return None
+        entry = self._entry_dir(file_path)
+        try:
+            manifest = json.loads((entry / MANIFEST_NAME).read_text(encoding="utf-8"))
+            sheets = {
+                sheet["name"]: _read_sheet(entry / sheet["file"], sheet)
+                for sheet in manifest["sheets"]
+            }
+            # Touch so eviction treats the workbook as recently used
+            os.utime(entry / MANIFEST_NAME)
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            metrics.increment("parsed_cache_misses_total")
+            return None
+        metrics.increment("parsed_cache_hits_total")
+        return sheets
+
+    def store(self, file_path: str, sheets: Dict[str, SheetColumns]) -> bool:
+        """
+        Schedule writing the parsed sheets of `file_path` on the background writer.
+
+        Returns False when caching is off or a sheet cannot be stored exactly.
+        """
+        if not self.enabled or not all(_cacheable(columns) for columns in sheets.values()):
+            return False
+        entry = self._entry_dir(file_path)
+        if not entry.exists():
+            submit_write(self._write_entry, entry, dict(sheets))
+        return True
+
+    def _write_entry(self, entry: Path, sheets: Dict[str, SheetColumns]) -> None:
+        tmp_dir = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+            manifest = {"version": CACHE_VERSION, "sheets": []}
+            for index, (sheet_name, columns) in enumerate(sheets.items()):
+                sheet = {"name": sheet_name, "file": f"sheet_{index}.arrow", "head": columns.head,
+                         "n_rows": columns.n_rows, "object_columns": _object_columns(columns)}
+                _write_sheet(tmp_dir / sheet["file"], columns)
+                manifest["sheets"].append(sheet)
+            # The manifest is written last: an entry without one is incomplete and never read
+            (tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+            os.replace(tmp_dir, entry)
+        except (OSError, ValueError, TypeError) as e:
+            # Another process stored the same workbook first, the disk is full, or Arrow rejected a value
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not entry.exists():
+                print(f"⚠️ Could not cache parsed workbook {entry.name}: {e}")
+            return
+        metrics.increment("parsed_cache_writes_total")
+        self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used workbooks until the directory fits its size budget."""
+        with self._lock:
+            entries = []
+            for entry in self.cache_dir.glob("v*-*"):
+                manifest = entry / MANIFEST_NAME
+                try:
+                    size = sum(path.stat().st_size for path in entry.iterdir())
+                    entries.append((manifest.stat().st_mtime, size, entry))
+                except (FileNotFoundError, NotADirectoryError):
+                    continue
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                # Open memory maps stay valid after unlink
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+                metrics.increment("parsed_cache_evictions_total")
+
+
+def _object_columns(columns: SheetColumns) -> List[int]:
+    return [position for position, body in enumerate(columns.bodies) if body.dtype == object]
+
+
+def _cacheable(columns: SheetColumns) -> bool:
+    """True when the head row and every column round-trip through Arrow unchanged."""
+    if not all(isinstance(value, HEAD_TYPES) for value in columns.head):
+        return False
+    return all(
+        pd.api.types.infer_dtype(columns.bodies[position], skipna=True) in EXACT_OBJECT_KINDS
+        for position in _object_columns(columns)
+    )
+
+
+def _write_sheet(path: Path, columns: SheetColumns) -> None:
+    import pyarrow as pa
+    from pyarrow import feather
+
+    # Float NaN is stored as a value (not an Arrow null) so numeric columns map back without a copy
+    arrays = [
+        pa.array(body, from_pandas=body.dtype == object)
+        for body in columns.bodies
+    ]
+    table = pa.table(arrays, names=[str(position) for position in range(columns.n_cols)])
+    feather.write_feather(table, str(path), compression="uncompressed")
+
+
+def _read_sheet(path: Path, sheet: Dict[str, Any]) -> SheetColumns:
+    import pyarrow as pa
+
+    with pa.memory_map(str(path), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    head = sheet["head"]
+    object_columns = set(sheet["object_columns"])
+    n_rows = sheet["n_rows"]
+    body_rows = max(n_rows - 1, 0)
+    bodies = []
+    nulls = np.zeros((n_rows, table.num_columns), dtype=bool)
+    for position in range(table.num_columns):
+        column = table.column(position)
+        column = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        if position in object_columns:
+            body = np.empty(body_rows, dtype=object)
+            body[:] = column.to_pylist()
+            body_nulls = column.is_null().to_numpy(zero_copy_only=False)
+            # Blank cells are NaN in parsed sheets, as pandas returns them
+            body[body_nulls] = np.nan
+        else:
+            body = column.to_numpy(zero_copy_only=True)
+            body_nulls = np.isnan(body) if body.dtype.kind == "f" else np.zeros(body_rows, dtype=bool)
+        bodies.append(body)
+        if n_rows:
+            nulls[0, position] = pd.isna(head[position])
+            nulls[1:, position] = body_nulls
+    return SheetColumns(
+        head=head,
+        bodies=bodies,
+        null_bits=np.packbits(nulls, axis=0),
+        null_counts=nulls.sum(axis=0),
+        n_rows=n_rows,
+    )
+
+
+parsed_sheet_cache = ParsedSheetCache(
+    cache_dir=os.getenv("TREASURY_PARSED_CACHE_DIR") or None,
+    max_bytes=int(float(os.getenv("TREASURY_PARSED_CACHE_DISK_MB", "1024")) * 1024 * 1024),
+)
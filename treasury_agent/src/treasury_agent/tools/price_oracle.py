@@ -0,0 +1,218 @@
+"""
+Shared USD price oracle with an in-process TTL cache.
+
+Every USD conversion in the tools reads prices from `price_oracle()` instead of
+calling CoinGecko (or hardcoding a price) itself. Per symbol:
+
+- a price younger than TREASURY_PRICE_TTL_S (default 60s) is served from memory;
+- a price up to TREASURY_PRICE_MAX_STALE_S (default 600s) past its TTL is still
+  served, and a refresh is started on a background thread (stale-while-revalidate);
+- otherwise the caller fetches it. Concurrent fetches of one symbol are
+  single-flight: one caller hits the source, the others wait for its result.
+
+When the source fails, the last known price is served however old it is, or the
+built-in reference price when there is none; the source is not retried for that
+symbol for FAILURE_BACKOFF_S. USD and the USD stablecoins are pegged at 1.0 and
+never fetched.
+
+The source is TREASURY_PRICE_SOURCE: 'coingecko' (default) or 'static', a local
+stand-in that serves REFERENCE_PRICES without network access, for tests and
+offline runs.
+"""
+
+import atexit
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from ..metrics import metrics
+from ..run_context import current_run
+
+
+DEFAULT_TTL_S = 60.0
+DEFAULT_MAX_STALE_S = 600.0
+FAILURE_BACKOFF_S = 30.0
+FETCH_TIMEOUT_S = 10.0
+PEGGED_SYMBOLS = {"USD": 1.0, "USDT": 1.0, "USDC": 1.0}
+# Served by StaticPriceSource, and by every source when a price was never fetched successfully
+REFERENCE_PRICES = {"ETH": 3500.0, "BTC": 65000.0}
+
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="price-oracle-refresh")
+atexit.register(_refresh_executor.shutdown, wait=False)
+
+
+class PriceSource:
+    """Where the oracle gets prices from; `fetch` returns the USD price of a symbol or raises."""
+
+    name = "source"
+
+    def fetch(self, symbol: str) -> float:
+        raise NotImplementedError
+
+
+class StaticPriceSource(PriceSource):
+    """Fixed prices, no network access (tests and offline runs)."""
+
+    name = "static"
+
+    def __init__(self, prices: Optional[Dict[str, float]] = None):
+        self.prices = {**REFERENCE_PRICES, **{symbol.upper(): float(price) for symbol, price in (prices or {}).items()}}
+
+    def fetch(self, symbol: str) -> float:
+        if symbol not in self.prices:
+            raise LookupError(f"No static price for {symbol}")
+        return self.prices[symbol]
+
+
+class CoinGeckoSource(PriceSource):
+    """CoinGecko simple-price API, with the HTTP timeout clamped to the current run's deadline."""
+
+    name = "coingecko"
+    URL = "https://api.coingecko.com/api/v3/simple/price"
+    COIN_IDS = {"ETH": "ethereum", "BTC": "bitcoin"}
+
+    def fetch(self, symbol: str) -> float:
+        coin_id = self.COIN_IDS.get(symbol)
+        if coin_id is None:
+            raise LookupError(f"No CoinGecko id for {symbol}")
+        run = current_run()
+        response = requests.get(self.URL, params={"ids": coin_id, "vs_currencies": "usd"},
+                                timeout=run.time_budget(FETCH_TIMEOUT_S) if run else FETCH_TIMEOUT_S)
+        response.raise_for_status()
+        return float(response.json()[coin_id]["usd"])
+
+
+class PriceOracle:
+    """TTL-cached, single-flight, stale-while-revalidate USD prices from a PriceSource."""
+
+    def __init__(self, source: PriceSource, ttl_s: float = DEFAULT_TTL_S, max_stale_s: float = DEFAULT_MAX_STALE_S):
+        self.source = source
+        self.ttl_s = ttl_s
+        self.max_stale_s = max_stale_s
+        self._lock = threading.Lock()
+        # symbol -> (price, monotonic time it was fetched)
+        self._prices: Dict[str, Tuple[float, float]] = {}
+        self._failed_at: Dict[str, float] = {}
+        self._inflight: Dict[str, Future] = {}
+
+    def get_price(self, symbol: str) -> float:
+        """USD price of one unit of `symbol`."""
+        symbol = symbol.upper()
+        if symbol in PEGGED_SYMBOLS:
+            return PEGGED_SYMBOLS[symbol]
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._prices.get(symbol)
+            backing_off = now - self._failed_at.get(symbol, float("-inf")) < FAILURE_BACKOFF_S
+        if cached is not None:
+            price, fetched_at = cached
+            age = now - fetched_at
+            if age <= self.ttl_s:
+                metrics.increment("price_oracle_lookups_total", outcome="fresh")
+                return price
+            if age <= self.ttl_s + self.max_stale_s:
+                metrics.increment("price_oracle_lookups_total", outcome="stale")
+                if not backing_off:
+                    self._refresh_async(symbol)
+                return price
+        if backing_off:
+            metrics.increment("price_oracle_lookups_total", outcome="fallback")
+            return self._fallback_price(symbol, cached)
+
+        metrics.increment("price_oracle_lookups_total", outcome="miss")
+        future, owner = self._claim_fetch(symbol)
+        if owner:
+            self._fetch(symbol, future)
+        else:
+            metrics.increment("price_oracle_coalesced_total")
+        try:
+            run = current_run()
+            return future.result(timeout=run.time_budget(FETCH_TIMEOUT_S) if run else FETCH_TIMEOUT_S)
+        except Exception as e:
+            print(f"⚠️ {self.source.name} price for {symbol} unavailable ({e}); using fallback price")
+            return self._fallback_price(symbol, cached)
+
+    def usd_value(self, amount: float, symbol: str) -> float:
+        """USD value of `amount` units of `symbol`."""
+        return float(amount) * self.get_price(symbol)
+
+    def _claim_fetch(self, symbol: str) -> Tuple[Future, bool]:
+        """The in-flight fetch of `symbol`, and whether the caller just started it (and must run it)."""
+        with self._lock:
+            future = self._inflight.get(symbol)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._inflight[symbol] = future
+            return future, True
+
+    def _fetch(self, symbol: str, future: Future) -> None:
+        started = time.perf_counter()
+        try:
+            price = self.source.fetch(symbol)
+            if not price > 0:
+                raise ValueError(f"non-positive price {price!r}")
+        except Exception as e:
+            with self._lock:
+                self._failed_at[symbol] = time.monotonic()
+                self._inflight.pop(symbol, None)
+            metrics.increment("price_oracle_fetches_total", source=self.source.name, outcome="error")
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._prices[symbol] = (price, time.monotonic())
+            self._failed_at.pop(symbol, None)
+            self._inflight.pop(symbol, None)
+        metrics.increment("price_oracle_fetches_total", source=self.source.name, outcome="ok")
+        metrics.observe("price_oracle_fetch_seconds", time.perf_counter() - started, source=self.source.name)
+        future.set_result(price)
+
+    def _refresh_async(self, symbol: str) -> None:
+        future, owner = self._claim_fetch(symbol)
+        if owner:
+            _refresh_executor.submit(self._fetch, symbol, future)
+
+    def _fallback_price(self, symbol: str, cached: Optional[Tuple[float, float]]) -> float:
+        with self._lock:
+            cached = self._prices.get(symbol, cached)
+        if cached is not None:
+            return cached[0]
+        if symbol in REFERENCE_PRICES:
+            return REFERENCE_PRICES[symbol]
+        raise LookupError(f"No USD price available for {symbol}")
+
+
+def oracle_from_env() -> PriceOracle:
+    """Build an oracle configured by TREASURY_PRICE_SOURCE, TREASURY_PRICE_TTL_S and TREASURY_PRICE_MAX_STALE_S."""
+    source_name = os.getenv("TREASURY_PRICE_SOURCE", "coingecko").strip().lower()
+    source = StaticPriceSource() if source_name == "static" else CoinGeckoSource()
+    return PriceOracle(
+        source,
+        ttl_s=float(os.getenv("TREASURY_PRICE_TTL_S", DEFAULT_TTL_S)),
+        max_stale_s=float(os.getenv("TREASURY_PRICE_MAX_STALE_S", DEFAULT_MAX_STALE_S)),
+    )
+
+
+_oracle: Optional[PriceOracle] = None
+_oracle_lock = threading.Lock()
+
+
+def price_oracle() -> PriceOracle:
+    """The process-wide oracle, built from the environment on first use."""
+    global _oracle
+    with _oracle_lock:
+        if _oracle is None:
+            _oracle = oracle_from_env()
+        return _oracle
+
+
+def install_price_oracle(oracle: Optional[PriceOracle]) -> None:
+    """Replace the process-wide oracle (e.g. with a StaticPriceSource one in tests); None rebuilds it from the environment."""
+    global _oracle
+    with _oracle_lock:
+        _oracle = oracle
@@ -0,0 +1,296 @@
+"""
+Typed results of the TreasuryRiskTools checks.
+
+The checks return these objects, and decisions built on a check (the minimum
+balance check, risk assessment, in-process callers) read their fields. Text is
+only rendered by TreasuryRiskTools._run, for the agent.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+def _timestamp(at: datetime) -> str:
+    return at.strftime('%Y-%m-%d %H:%M:%S')
+
+
+@dataclass(slots=True)
+class BalanceCheck:
+    """Balance of one wallet in `currency` and its USD value."""
+    wallet_address: str
+    currency: str
+    balance: float
+    balance_usd: float
+    minimum_required_usd: float
+    simulated: bool
+    checked_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def available_usd(self) -> float:
+        return max(0.0, self.balance_usd - self.minimum_required_usd)
+
+    @property
+    def sufficient(self) -> bool:
+        return self.balance_usd >= self.minimum_required_usd
+
+    def render(self) -> str:
+        result = f"Balance Check Results{' (SIMULATION MODE)' if self.simulated else ''}:\n"
+        result += f"Wallet: {self.wallet_address}\n"
+        result += f"Currency: {self.currency}\n"
+        if self.currency.upper() == "USD":
+            result += f"Total Balance: ${self.balance_usd:,.2f}\n"
+            result += f"Minimum Required: ${self.minimum_required_usd:,.2f}\n"
+            result += f"Available Balance: ${self.available_usd:,.2f}\n"
+        else:
+            result += f"Balance: {self.balance:.6f} {self.currency}\n"
+            result += f"USD Value: ${self.balance_usd:,.2f}\n"
+            result += f"Minimum Required: ${self.minimum_required_usd:,.2f}\n"
+        result += f"Status: {'SUFFICIENT' if self.sufficient else 'INSUFFICIENT'}\n"
+        result += f"Timestamp: {_timestamp(self.checked_at)}"
+        if self.simulated:
+            source = "bank API" if self.currency.upper() == "USD" else "blockchain"
+            result += f"\n📝 Note: This is a simulation. Real balance would be checked via {source}."
+        return result
+
+
+@dataclass(slots=True)
+class MinimumBalanceCheck:
+    """Whether a balance meets the configured minimum."""
+    balance: BalanceCheck
+
+    @property
+    def meets_minimum(self) -> bool:
+        return self.balance.sufficient
+
+    @property
+    def shortfall_usd(self) -> float:
+        return max(0.0, self.balance.minimum_required_usd - self.balance.balance_usd)
+
+    def render(self) -> str:
+        result = f"Minimum Balance Check Results:\n"
+        result += f"Wallet: {self.balance.wallet_address}\n"
+        result += f"Currency: {self.balance.currency}\n"
+        result += f"Current Balance: ${self.balance.balance_usd:,.2f}\n"
+        result += f"Minimum Required: ${self.balance.minimum_required_usd:,.2f}\n"
+        result += f"Shortfall: ${self.shortfall_usd:,.2f}\n"
+        result += f"Status: {'MEETS_MINIMUM' if self.meets_minimum else 'BELOW_MINIMUM'}\n"
+        result += f"Recommendation: {'Ready for transactions' if self.meets_minimum else 'Add funds to meet minimum balance'}\n"
+        result += f"Timestamp: {_timestamp(self.balance.checked_at)}"
+        return result
+
+
+@dataclass(slots=True)
+class LimitCheck:
+    """Verdict of one amount against the single / daily / monthly limits."""
+    user_id: str
+    transaction_type: str
+    currency: str
+    amount_usd: float
+    approved: bool
+    daily_total: float
+    monthly_total: float
+    limits: Dict[str, float]
+    # (limit kind, usage before this amount) per breached limit
+    violations: List[Tuple[str, float]]
+    # Only set while the amount is held (reserve_limits)
+    reservation_id: Optional[str] = None
+    checked_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def status(self) -> str:
+        return "APPROVED" if self.approved else "BLOCKED"
+
+    def violation_messages(self) -> List[str]:
+        messages = []
+        for kind, used in self.violations:
+            if kind == "single":
+                messages.append(f"Exceeds single transaction limit of ${self.limits['single']:,.2f}")
+            else:
+                messages.append(f"Would exceed {kind} limit of ${self.limits[kind]:,.2f} (current: ${used:,.2f})")
+        return messages
+
+    def render(self) -> str:
+        result = f"Transaction Limit Validation Results:\n"
+        result += f"Status: {self.status}\n"
+        result += f"User ID: {self.user_id}\n"
+        result += f"Transaction Type: {self.transaction_type}\n"
+        result += f"Amount: ${self.amount_usd:,.2f} USD (paid in {self.currency})\n"
+        result += f"Daily Total: ${self.daily_total:,.2f}\n"
+        result += f"Monthly Total: ${self.monthly_total:,.2f}\n"
+        result += f"Daily Limit: ${self.limits['daily']:,.2f}\n"
+        result += f"Monthly Limit: ${self.limits['monthly']:,.2f}\n"
+        result += f"Single Transaction Limit: ${self.limits['single']:,.2f}\n"
+        if self.violations:
+            result += f"\nLimit Violations:\n"
+            for i, violation in enumerate(self.violation_messages(), 1):
+                result += f"{i}. {violation}\n"
+        else:
+            result += f"\n✅ All limits satisfied\n"
+        if self.reservation_id:
+            result += f"Reservation ID: {self.reservation_id}\n"
+        result += f"\nTimestamp: {_timestamp(self.checked_at)}"
+        return result
+
+
+@dataclass(slots=True)
+class RiskAssessment:
+    """Risk verdict for one transaction, derived from its limit check."""
+    amount: float
+    limit_check: LimitCheck
+
+    @property
+    def risk_status(self) -> str:
+        return "LOW_RISK" if self.limit_check.approved else "HIGH_RISK"
+
+    @property
+    def risk_score(self) -> float:
+        return 0.1 if self.limit_check.approved else 1.0
+
+    @property
+    def recommendation(self) -> str:
+        if self.limit_check.approved:
+            return "Transaction approved - all limits satisfied"
+        return "Transaction blocked - limit violations detected"
+
+    def render(self) -> str:
+        check = self.limit_check
+        result = f"Risk Assessment Results:\n"
+        result += f"Risk Status: {self.risk_status}\n"
+        result += f"Risk Score: {self.risk_score:.2f}/1.0\n"
+        result += f"Amount: {self.amount:,.2f} {check.currency} (${check.amount_usd:,.2f} USD)\n"
+        result += f"Transaction Type: {check.transaction_type}\n"
+        result += f"User ID: {check.user_id}\n"
+        result += f"Recommendation: {self.recommendation}\n"
+        result += f"Timestamp: {_timestamp(check.checked_at)}\n"
+        result += f"\nDetailed Limit Check:\n{check.render()}"
+        return result
+
+
+@dataclass(slots=True)
+class ReservationSettlement:
+    """Outcome of commit_reservation / release_reservation."""
+    reservation_id: str
+    committed: bool
+    settled: bool
+    settled_at: datetime = field(default_factory=datetime.now)
+
+    def render(self) -> str:
+        if not self.settled:
+            return f"Error: reservation {self.reservation_id} not found or already settled"
+        return (f"Reservation {'committed' if self.committed else 'released'}:\n"
+                f"Reservation ID: {self.reservation_id}\n"
+                f"Timestamp: {_timestamp(self.settled_at)}")
+
+
+@dataclass(slots=True)
+class LimitHeadroom:
+    """A user's daily / monthly usage and what is left under the limits."""
+    user_id: str
+    limits: Dict[str, float]
+    daily_used: float
+    monthly_used: float
+    daily_reserved: float
+    monthly_reserved: float
+    daily_remaining: float
+    monthly_remaining: float
+    checked_at: datetime = field(default_factory=datetime.now)
+
+    def render(self) -> str:
+        result = f"Limit Headroom:\n"
+        result += f"User ID: {self.user_id}\n"
+        result += f"Daily Used: ${self.daily_used:,.2f} (reserved: ${self.daily_reserved:,.2f})\n"
+        result += f"Daily Remaining: ${self.daily_remaining:,.2f} of ${self.limits['daily']:,.2f}\n"
+        result += f"Monthly Used: ${self.monthly_used:,.2f} (reserved: ${self.monthly_reserved:,.2f})\n"
+        result += f"Monthly Remaining: ${self.monthly_remaining:,.2f} of ${self.limits['monthly']:,.2f}\n"
+        result += f"Single Transaction Limit: ${self.limits['single']:,.2f}\n"
+        result += f"Timestamp: {_timestamp(self.checked_at)}"
+        return result
+
+
+@dataclass(slots=True)
+class PaymentVerdict:
+    """One payment of a batch assessment."""
+    payment_id: Any
+    # In the payment's currency; limits are checked against amount_usd
+    amount: float
+    amount_usd: float
+    priority: str
+    # APPROVED, BLOCKED, or RETRY when the batch lost every reservation attempt to concurrent requests
+    status: str
+    # 'invalid', 'single', 'daily' and / or 'monthly'
+    violations: List[str] = field(default_factory=list)
+
+    @property
+    def approved(self) -> bool:
+        return self.status == "APPROVED"
+
+
+@dataclass(slots=True)
+class BatchAssessment:
+    """Verdicts for a whole list of payments against the single / daily / monthly limits."""
+    user_id: str
+    # Currency of payments that do not name their own
+    currency: str
+    limits: Dict[str, float]
+    daily_used_before: float
+    monthly_used_before: float
+    approved_amount: float
+    # payment_id of the first payment breaching each limit (None when none does)
+    first_breach: Dict[str, Any]
+    payments: List[PaymentVerdict]
+    # Concurrent requests used the user's headroom during every attempt; nothing was approved or recorded
+    contended: bool = False
+    assessed_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def payment_count(self) -> int:
+        return len(self.payments)
+
+    @property
+    def approved_count(self) -> int:
+        return sum(payment.approved for payment in self.payments)
+
+    @property
+    def blocked(self) -> List[PaymentVerdict]:
+        return [payment for payment in self.payments if payment.status == "BLOCKED"]
+
+    @property
+    def blocked_count(self) -> int:
+        return len(self.blocked)
+
+    @property
+    def risk_status(self) -> str:
+        if self.contended:
+            return "RETRY"
+        return "HIGH_RISK" if self.blocked else "LOW_RISK"
+
+    def render(self, max_listed: int = 20) -> str:
+        blocked = self.blocked
+        result = f"Batch Risk Assessment Results:\n"
+        result += f"Risk Status: {self.risk_status}\n"
+        result += f"User ID: {self.user_id}\n"
+        result += f"Payments: {self.payment_count} ({self.approved_count} approved, {self.blocked_count} blocked)\n"
+        result += f"Approved Amount: ${self.approved_amount:,.2f} USD\n"
+        result += f"Daily Total Before: ${self.daily_used_before:,.2f} (limit ${self.limits['daily']:,.2f})\n"
+        result += f"Monthly Total Before: ${self.monthly_used_before:,.2f} (limit ${self.limits['monthly']:,.2f})\n"
+        result += f"Single Transaction Limit: ${self.limits['single']:,.2f}\n"
+        if self.contended:
+            result += (f"\n⚠️ Concurrent requests for this user changed its limit usage during every attempt; "
+                       f"no payment was approved or recorded. Retry the batch.\n")
+        else:
+            result += f"\nFirst Breach:\n"
+            for kind, payment_id in self.first_breach.items():
+                result += f"- {kind}: {payment_id if payment_id is not None else 'none'}\n"
+        if blocked:
+            result += f"\nBlocked Payments:\n"
+            for payment in blocked[:max_listed]:
+                result += f"- {payment.payment_id}: ${payment.amount_usd:,.2f} USD ({', '.join(payment.violations)})\n"
+            if len(blocked) > max_listed:
+                result += f"... and {len(blocked) - max_listed} more\n"
+        result += f"\nTimestamp: {_timestamp(self.assessed_at)}"
+        return result
+
+
+RiskResult = Union[BalanceCheck, MinimumBalanceCheck, LimitCheck, RiskAssessment, ReservationSettlement, LimitHeadroom,
+                   BatchAssessment]
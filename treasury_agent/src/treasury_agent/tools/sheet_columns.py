@@ -0,0 +1,148 @@
+"""
+Compact column-oriented representation of a parsed sheet.
+
+Sheets are read with header=None, so row 0 (the header row) makes every pandas
+column `object` and boxes every cell as a Python object. SheetColumns keeps row
+0 as-is and stores rows 1.. per column as a typed NumPy array where that is
+lossless (float64, or int64 for integer columns without gaps), falling back to
+an object array otherwise. Nulls live in one bit-packed bitmap shared by all
+columns. Row-oriented records are only built at the output boundary, for the
+rows actually emitted.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _typed_body(column: pd.Series, has_nulls: bool) -> np.ndarray:
+    """Convert rows 1.. of a column to the tightest array that round-trips its values."""
+    if pd.api.types.is_bool_dtype(column):
+        return column.to_numpy(dtype=object)
+    if pd.api.types.is_integer_dtype(column) and not has_nulls:
+        return column.to_numpy(dtype=np.int64)
+    if pd.api.types.is_float_dtype(column):
+        return column.to_numpy(dtype=np.float64)
+    if column.dtype == object:
+        inferred = pd.api.types.infer_dtype(column, skipna=True)
+        # Integers mixed with gaps (or with floats) stay objects so 100 is not emitted as 100.0
+        if inferred == "floating":
+            return column.to_numpy(dtype=np.float64, na_value=np.nan)
+        if inferred == "integer" and not has_nulls:
+            return column.to_numpy(dtype=np.int64)
+    return column.to_numpy(dtype=object)
+
+
+class SheetColumns:
+    """Typed per-column arrays plus a packed null bitmap for one sheet."""
+
+    def __init__(self, head: List[Any], bodies: List[np.ndarray], null_bits: np.ndarray,
+                 null_counts: np.ndarray, n_rows: int):
+        self.head = head
+        self.bodies = bodies
+        self.null_bits = null_bits
+        self.null_counts = null_counts
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, header_row: bool = False) -> "SheetColumns":
+        """
+        Build from a sheet read with header=None (row 0 is the header row).
+
+        With header_row=True, df is a typed frame read with its header as column
+        names (CSV, Parquet); the names become row 0, matching the Excel layout,
+        without boxing the body into object columns first.
+        """
+        nulls = df.isna().to_numpy()
+        n_cols = nulls.shape[1]
+        if header_row:
+            nulls = np.vstack([np.zeros((1, n_cols), dtype=bool), nulls])
+            head = list(df.columns)
+            body = df
+        else:
+            head = [df.iat[0, position] for position in range(n_cols)] if len(df) else [None] * n_cols
+            body = df.iloc[1:]
+        n_rows = nulls.shape[0]
+        head = [value.item() if isinstance(value, np.generic) else value for value in head]
+        body_nulls = nulls[1:].any(axis=0) if n_rows > 1 else np.zeros(n_cols, dtype=bool)
+        bodies = [_typed_body(body.iloc[:, position], bool(body_nulls[position])) for position in range(n_cols)]
+        return cls(
+            head=head,
+            bodies=bodies,
+            null_bits=np.packbits(nulls, axis=0),
+            null_counts=nulls.sum(axis=0),
+            n_rows=n_rows,
+        )
+
+    @property
+    def n_cols(self) -> int:
+        return len(self.bodies)
+
+    def is_null(self, position: int) -> np.ndarray:
+        """Boolean null mask of one column (all rows)."""
+        return np.unpackbits(self.null_bits[:, position], count=self.n_rows).astype(bool)
+
+    def notna(self) -> np.ndarray:
+        """rows x columns mask of non-null cells."""
+        return ~np.unpackbits(self.null_bits, axis=0, count=self.n_rows).astype(bool)
+
+    def series(self, position: int) -> pd.Series:
+        """One column (all rows) as an object Series, for vectorized string operations."""
+        values = np.empty(self.n_rows, dtype=object)
+        if self.n_rows:
+            values[0] = self.head[position]
+            values[1:] = self.bodies[position]
+        return pd.Series(values, dtype=object)
+
+    def value(self, row: int, position: int) -> Any:
+        """A single cell as a Python object."""
+        if row == 0:
+            return self.head[position]
+        value = self.bodies[position][row - 1]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def values_at(self, position: int, rows: Iterable[int]) -> List[Any]:
+        """Cells of one column at `rows` (ascending), as Python objects."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return []
+        leading = [self.head[position]] if rows[0] == 0 else []
+        body_rows = rows[1:] - 1 if leading else rows - 1
+        return leading + self.bodies[position][body_rows].tolist()
+
+    def records(self, rows: Optional[Iterable[int]] = None) -> List[Dict[int, Any]]:
+        """Row-oriented records ({column position: value}, like DataFrame.to_dict('records'))."""
+        rows = np.arange(self.n_rows) if rows is None else np.asarray(rows, dtype=np.int64)
+        columns = [self.values_at(position, rows) for position in range(self.n_cols)]
+        return [dict(enumerate(values)) for values in zip(*columns)] if columns else [{} for _ in rows]
+
+    def slice_rows(self, start: int, stop: int) -> "SheetColumns":
+        """Rows [start, stop) as their own SheetColumns; row `start` becomes the head row."""
+        nulls = np.unpackbits(self.null_bits, axis=0, count=self.n_rows)[start:stop].astype(bool)
+        n_rows = nulls.shape[0]
+        head = [self.value(start, position) for position in range(self.n_cols)] if n_rows else [None] * self.n_cols
+        return SheetColumns(
+            head=head,
+            # Body index r - 1 holds row r, so rows start+1 .. stop-1 are bodies[start:stop - 1]
+            bodies=[body[start:max(stop - 1, start)] for body in self.bodies],
+            null_bits=np.packbits(nulls, axis=0),
+            null_counts=nulls.sum(axis=0),
+            n_rows=n_rows,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Rows 1.. as a DataFrame named by row 0, like read_excel(header=0) would return it."""
+        names = []
+        seen: Dict[str, int] = {}
+        for position, value in enumerate(self.head):
+            name = f"Unnamed: {position}" if pd.isna(value) else value
+            # Repeated names are suffixed '.1', '.2', ... as pandas does
+            count = seen.get(str(name), 0)
+            seen[str(name)] = count + 1
+            names.append(f"{name}.{count}" if count else name)
+        return pd.DataFrame({position: body for position, body in enumerate(self.bodies)}).set_axis(names, axis=1)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays (object cells counted as pointers)."""
+        return int(sum(body.nbytes for body in self.bodies) + self.null_bits.nbytes)
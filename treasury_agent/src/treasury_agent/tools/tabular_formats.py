@@ -0,0 +1,154 @@
+"""
+Format detection and fast readers for tabular uploads (Excel, CSV, Parquet).
+
+The format is taken from the file's magic bytes, so an upload saved under the
+wrong suffix is still read correctly; the extension only decides between the
+text formats, which have no signature. A file with no known suffix is taken as
+CSV only if its first records are comma-separated with a consistent field count.
+
+CSV is read with pyarrow's multithreaded reader when pyarrow is installed
+(pandas' C parser otherwise). Parquet is memory-mapped and only the requested
+columns are decoded.
+"""
+
+import csv
+import importlib.util
+import io
+import os
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from .sheet_columns import SheetColumns
+
+
+XLSX_MAGIC = b"PK\x03\x04"                        # zip container (.xlsx, .xlsm)
+XLS_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"   # OLE2 compound document (.xls)
+PARQUET_MAGIC = b"PAR1"
+
+EXCEL_FORMATS = ("xlsx", "xls")
+TABULAR_FORMATS = ("csv", "parquet")
+TEXT_EXTENSIONS = {".csv": "csv", ".tsv": "csv", ".txt": "csv"}
+# Files without a known suffix are sniffed as CSV from this many leading bytes / records
+CSV_SNIFF_BYTES = 64 * 1024
+CSV_SNIFF_RECORDS = 20
+
+
+@lru_cache(maxsize=None)
+def pyarrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def detect_format(file_path: str) -> Optional[str]:
+    """Return 'xlsx', 'xls', 'parquet' or 'csv' for a file, or None if unsupported."""
+    with open(file_path, "rb") as f:
+        head = f.read(8)
+    if head.startswith(XLSX_MAGIC):
+        return "xlsx"
+    if head.startswith(XLS_MAGIC):
+        return "xls"
+    if head.startswith(PARQUET_MAGIC):
+        return "parquet"
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in TEXT_EXTENSIONS:
+        return TEXT_EXTENSIONS[extension]
+    # Unknown suffix (e.g. a temp file): accept only text that parses as comma-separated records
+    if _looks_like_csv(file_path):
+        return "csv"
+    return None
+
+
+def _looks_like_csv(file_path: str) -> bool:
+    """True when the file starts with at least two UTF-8 records of the same number (>= 2) of comma-separated fields."""
+    with open(file_path, "rb") as f:
+        sample = f.read(CSV_SNIFF_BYTES)
+    if not sample or b"\x00" in sample:
+        return False
+    if len(sample) == CSV_SNIFF_BYTES:
+        # Drop the last line, which the sample may have cut (possibly mid-character)
+        sample = sample[:sample.rfind(b"\n") + 1]
+    try:
+        text = sample.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return False
+    try:
+        records = [record for record in islice(csv.reader(io.StringIO(text)), CSV_SNIFF_RECORDS) if record]
+    except csv.Error:
+        return False
+    field_counts = {len(record) for record in records}
+    return len(records) >= 2 and len(field_counts) == 1 and field_counts.pop() >= 2
+
+
+def _csv_delimiter(file_path: str) -> str:
+    return "\t" if os.path.splitext(file_path)[1].lower() == ".tsv" else ","
+
+
+def read_csv(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a CSV file with a header row into a typed DataFrame."""
+    delimiter = _csv_delimiter(file_path)
+    if pyarrow_available():
+        from pyarrow import csv as pa_csv
+
+        # No timestamp parsers: dates stay text, exactly as pandas.read_csv returns them
+        convert_options = pa_csv.ConvertOptions(include_columns=columns or [], timestamp_parsers=[])
+        table = pa_csv.read_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+            convert_options=convert_options,
+        )
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    return pd.read_csv(file_path, sep=delimiter, usecols=columns, engine="c", low_memory=False)
+
+
+def read_parquet(file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a Parquet file, decoding only `columns` (all when None) from a memory map."""
+    if pyarrow_available():
+        from pyarrow import parquet as pa_parquet
+
+        table = pa_parquet.read_table(file_path, columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    return pd.read_parquet(file_path, columns=columns)
+
+
+def read_excel_sheets(file_path: str) -> Dict[str, SheetColumns]:
+    """Every sheet of a workbook (header row as row 0), parsed from one open handle."""
+    from .excel_analysis_tool import excel_engine
+
+    with pd.ExcelFile(file_path, engine=excel_engine()) as excel_file:
+        return {
+            sheet_name: SheetColumns.from_frame(excel_file.parse(sheet_name, header=None))
+            for sheet_name in excel_file.sheet_names
+        }
+
+
+def read_table(file_path: str, file_format: Optional[str] = None,
+               columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read the first sheet / the whole file with its header row as column names.
+
+    Used where callers want one typed DataFrame regardless of upload format.
+    """
+    file_format = file_format or detect_format(file_path)
+    if file_format == "csv":
+        return read_csv(file_path, columns)
+    if file_format == "parquet":
+        return read_parquet(file_path, columns)
+    if file_format in EXCEL_FORMATS:
+        from .excel_analysis_tool import excel_engine
+        from .parsed_sheet_cache import parsed_sheet_cache
+
+        if not parsed_sheet_cache.enabled:
+            return pd.read_excel(file_path, usecols=columns, engine=excel_engine())
+        # Parse every sheet once, as ExcelAnalysisTool does, so its later read of the upload is a cache hit
+        sheets = parsed_sheet_cache.load(file_path)
+        if sheets is None:
+            sheets = read_excel_sheets(file_path)
+            parsed_sheet_cache.store(file_path, sheets)
+        # Cached columns keep what header=None parsing produced (e.g. booleans and integers with gaps as objects);
+        # infer_objects gives them the dtypes read_excel(header=0) infers, so both branches return the same frame
+        frame = next(iter(sheets.values())).to_frame().infer_objects()
+        return frame.loc[:, columns] if columns else frame
+    raise ValueError(f"Unsupported file format: {os.path.basename(file_path)}")
@@ -0,0 +1,143 @@
+"""
+Hooks applied around tool `_run` methods.
+
+CrewAI invokes `BaseTool._run` directly (via the structured tool wrapper), so the
+instrumentation wraps `_run` itself. Outside a crew run the wrapper is a no-op.
+Within a run it enforces the run's deadline, records diagnostics and, for
+actions declared read-only, serves repeated calls with identical arguments from
+the run's ToolCallCache. When the run is being recorded, executed calls and
+their results are added to the trace; when it is a replay, recorded results are
+returned and the tool itself is never executed (a call without a recorded
+result is a divergence and gets an error string).
+"""
+
+import functools
+import inspect
+import json
+import time
+from typing import Collection, Union
+
+from ..run_context import current_run
+
+
+# Returned instead of running the tool when a replayed call has no recorded result
+REPLAY_DIVERGENCE_RESULT = "Error: no recorded result (replay divergence)"
+# Stands in for secret arguments in trace keys
+REDACTED = "<redacted>"
+
+
+def _args_size(args, kwargs) -> int:
+    """Approximate the serialized size of the tool arguments in bytes."""
+    try:
+        return len(json.dumps({"args": list(args), "kwargs": kwargs}, default=str))
+    except Exception:
+        return 0
+
+
+def _canonical_key(tool_name: str, signature: inspect.Signature, tool, args, kwargs,
+                   redact: Collection[str] = ()) -> str:
+    """
+    Key a call by tool name and its arguments with defaults filled in, order-independent.
+
+    Non-empty values of the `redact` arguments are replaced by REDACTED, so keys
+    written to a trace never contain them.
+    """
+    bound = signature.bind(tool, *args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    arguments.pop("self", None)
+    for name in redact:
+        if arguments.get(name):
+            arguments[name] = REDACTED
+    return tool_name + ":" + json.dumps(arguments, sort_keys=True, default=str)
+
+
+def _is_error_result(result) -> bool:
+    """Tools report failures as strings; never memoize those."""
+    if not isinstance(result, str):
+        return False
+    return result.startswith("Error") or '"status": "error"' in result[:200]
+
+
+def instrumented_tool_run(action_arg: str = "action", memoize: Union[bool, Collection[str]] = (),
+                          secret_args: Collection[str] = (), unrecorded: Collection[str] = ()):
+    """
+    Record duration and argument size of every tool call in the current run's diagnostics.
+
+    `action_arg` names the keyword argument that identifies the tool action
+    (e.g. `action` for the payment and risk tools, `analysis_type` for Excel).
+    `memoize` lists the read-only actions whose results may be reused within a run
+    (True memoizes every action); state-changing actions must never be listed.
+    `secret_args` (e.g. private keys) are redacted from the call keys written to
+    and looked up in traces. `unrecorded` actions are never written to a trace,
+    and a replay answers them with REPLAY_DIVERGENCE_RESULT.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            run = current_run()
+            if run is None:
+                return func(self, *args, **kwargs)
+
+            action = kwargs.get(action_arg)
+            started_at = time.time()
+            started = time.perf_counter()
+
+            memoizable = memoize is True or (memoize and action in memoize)
+            traced = (run.recorder is not None or run.replayer is not None) and action not in unrecorded
+            # The memo key stays in memory for this run; only the redacted trace key is written anywhere
+            memo_key = trace_key = None
+            try:
+                if memoizable:
+                    memo_key = _canonical_key(self.name, signature, self, args, kwargs)
+                if traced:
+                    trace_key = _canonical_key(self.name, signature, self, args, kwargs, redact=secret_args)
+            except TypeError:
+                pass
+
+            error = None
+            cached = False
+            try:
+                # A cancelled or expired run must not do any more tool work, memoized calls included
+                run.check_deadline()
+                if memo_key is not None:
+                    cached, result = run.tool_cache.get(memo_key)
+                    if cached:
+                        return result
+                if run.replayer is not None:
+                    # A replay never touches the outside world: without a recorded result the tool is not run
+                    if trace_key is not None:
+                        replayed, result = run.replayer.tool_result(self.name, trace_key)
+                    elif action in unrecorded:
+                        replayed, result = run.replayer.tool_miss(self.name, f"{action} is never replayed")
+                    else:
+                        replayed, result = run.replayer.tool_miss(self.name, "arguments could not be keyed")
+                    if not replayed:
+                        return REPLAY_DIVERGENCE_RESULT
+                else:
+                    result = func(self, *args, **kwargs)
+                    if run.recorder is not None and trace_key is not None:
+                        run.recorder.record_tool(self.name, trace_key, result, time.perf_counter() - started)
+                if memo_key is not None and not _is_error_result(result):
+                    run.tool_cache.put(memo_key, result)
+                return result
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                run.diagnostics.record_tool_call(
+                    tool_name=self.name,
+                    action=action,
+                    args_size=_args_size(args, kwargs),
+                    started_at=started_at,
+                    duration=time.perf_counter() - started,
+                    error=error,
+                    cached=cached,
+                )
+
+        return wrapper
+
+    return decorator
@@ -1,17 +1,33 @@
 from crewai.tools import BaseTool
-from typing import Type, Optional, Dict, Any
+from typing import Type, Optional, Dict, Any, List, Union
 from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
 import json
 import random
 import os
+import numpy as np
 from web3 import Web3
-import requests
+
+from ..metrics import metrics
+from .tool_hooks import instrumented_tool_run
+from .limit_ledger import limit_ledger
+from .limit_batch import LIMIT_KINDS, evaluate_limits
+from .price_oracle import price_oracle
+from .risk_results import (
+    BalanceCheck, BatchAssessment, LimitCheck, LimitHeadroom, MinimumBalanceCheck, PaymentVerdict, ReservationSettlement,
+    RiskAssessment, RiskResult,
+)
+# Attempts to take a batch's approved total from the ledger before reporting contention
+BATCH_RESERVE_ATTEMPTS = 3
+
+
+# Minimum balance and single / daily / monthly limits (USD) when the request's risk_config does not set them
+DEFAULT_RISK_LIMITS = {"minimum_balance": 1000.0, "single": 25000.0, "daily": 50000.0, "monthly": 200000.0}
 
 
 class RiskToolsInput(BaseModel):
     """Input schema for TreasuryRiskTools."""
-    action: str = Field(..., description="Action to perform: 'check_balance', 'validate_transaction_limits', 'check_minimum_balance', 'assess_risk'")
+    action: str = Field(..., description="Action to perform: 'check_balance', 'validate_transaction_limits', 'check_minimum_balance', 'assess_risk', 'batch_assess', 'reserve_limits', 'commit_reservation', 'release_reservation', 'limit_headroom'")
     wallet_address: str = Field(default="", description="Wallet address to check balance (required for balance checks)")
     amount: float = Field(default=0.0, description="Transaction amount to validate (required for limit/risk assessments)")
     currency: str = Field(default="USD", description="Currency for the transaction")
@@ -19,6 +35,8 @@ class RiskToolsInput(BaseModel):
     transaction_type: str = Field(default="payment", description="Type of transaction: 'payment', 'investment'")
     risk_config: Optional[Dict[str, Any]] = Field(default=None, description="Risk configuration dictionary from user JSON input")
     treasury_request: Optional[str] = Field(default=None, description="Full treasury request string (alternative way to pass configuration)")
+    reservation_id: str = Field(default="", description="Reservation returned by reserve_limits (required for commit_reservation / release_reservation)")
+    payments: Optional[List[Dict[str, Any]]] = Field(default=None, description="Payments (each with amount and optional payment_id, priority) for batch_assess")
 
 
 class TreasuryRiskTools(BaseTool):
@@ -36,14 +54,10 @@ class TreasuryRiskTools(BaseTool):
         self._w3 = None
         self._infura_url = os.getenv('INFURA_API_KEY')
         
-        # Risk configuration (as instance variables, not Pydantic fields)
-        self._minimum_balance_usd = 1000.0  # Minimum balance requirement
-        self._daily_limit_usd = 50000.0     # Daily transaction limit
-        self._monthly_limit_usd = 200000.0  # Monthly transaction limit
-        self._max_single_transaction_usd = 25000.0  # Maximum single transaction
-        
-        # Transaction tracking (in real implementation, this would be in a database)
-        self._transaction_history = {}
+        # Daily/monthly usage lives in the shared limit ledger, so it survives new instances and is
+        # seen by concurrent requests. Crew clones share tool instances, so each call resolves its
+        # limits from its own risk_config (_resolve_limits) and keeps no per-request state here.
+        self._ledger = limit_ledger()
         
         # Initialize Web3 if API key is available
         if self._infura_url:
@@ -134,31 +148,51 @@ class TreasuryRiskTools(BaseTool):
             print(f"Warning: Could not convert {param_name} '{value}' to float. Using default {default}. Error: {e}")
             return default
 
+    # check_balance is read-only and memoized per run; limit validation and risk assessment consume
+    # daily/monthly headroom and must run every time
+    @instrumented_tool_run(memoize=("check_balance",))
     def _run(self, action: str, wallet_address: str = "", amount: float = 0.0, 
              currency: str = "USD", user_id: str = "default", transaction_type: str = "payment", 
-             risk_config: Optional[Dict[str, Any]] = None, treasury_request: Optional[str] = None) -> str:
+             risk_config: Optional[Dict[str, Any]] = None, treasury_request: Optional[str] = None,
+             reservation_id: str = "", payments: Optional[List[Dict[str, Any]]] = None) -> str:
+        result = self._execute_action(action, wallet_address, amount, currency, user_id,
+                                      transaction_type, risk_config, treasury_request, reservation_id, payments)
+        # Results are typed up to here; the agent gets them as text
+        return result if isinstance(result, str) else result.render()
+
+    def _resolve_limits(self, risk_config: Optional[Dict[str, Any]],
+                        treasury_request: Optional[str] = None) -> Dict[str, float]:
+        """Minimum balance and single / daily / monthly limits from the request's risk configuration (defaults otherwise)."""
+        # Try to extract risk configuration from treasury_request if risk_config is not provided
+        if not risk_config and treasury_request:
+            risk_config = self._extract_risk_config_from_request(treasury_request)
+            if risk_config:
+                print(f"Extracted risk config from treasury request: {risk_config}")
         
+        # Safely extract risk configuration with fallbacks
+        limits = {"minimum_balance": self._get_risk_param(risk_config, 'min_balance_usd',
+                                                          DEFAULT_RISK_LIMITS["minimum_balance"])}
+        for kind in LIMIT_KINDS:
+            limits[kind] = self._get_limit_param(risk_config, kind, DEFAULT_RISK_LIMITS[kind])
+        return limits
+
+    def _execute_action(self, action: str, wallet_address: str, amount: float, currency: str,
+                        user_id: str, transaction_type: str, risk_config: Optional[Dict[str, Any]],
+                        treasury_request: Optional[str], reservation_id: str = "",
+                        payments: Optional[List[Dict[str, Any]]] = None) -> Union[str, RiskResult]:
+        """Apply the request's risk configuration and route to the requested action (errors come back as text)."""
         try:
             # CRITICAL FIX: Convert amount parameter to float to handle string inputs from JSON/web
             amount = self._safe_float_conversion(amount, "amount", 0.0)
             
-            # Try to extract risk configuration from treasury_request if risk_config is not provided
-            if not risk_config and treasury_request:
-                risk_config = self._extract_risk_config_from_request(treasury_request)
-                if risk_config:
-                    print(f"Extracted risk config from treasury request: {risk_config}")
-            
-            # Safely extract risk configuration with fallbacks
-            self._minimum_balance_usd = self._get_risk_param(risk_config, 'min_balance_usd', 1000.0)
-            self._daily_limit_usd = self._get_limit_param(risk_config, 'daily', 50000.0)
-            self._monthly_limit_usd = self._get_limit_param(risk_config, 'monthly', 200000.0)
-            self._max_single_transaction_usd = self._get_limit_param(risk_config, 'single', 25000.0)
+            limits = self._resolve_limits(risk_config, treasury_request)
 
             # Validate action parameter and ensure it's a string
             if not action or not isinstance(action, str):
                 return "Error: action parameter is required and must be a string"
             
-            valid_actions = ["check_balance", "validate_transaction_limits", "check_minimum_balance", "assess_risk"]
+            valid_actions = ["check_balance", "validate_transaction_limits", "check_minimum_balance", "assess_risk",
+                             "batch_assess", "reserve_limits", "commit_reservation", "release_reservation", "limit_headroom"]
             if action not in valid_actions:
                 return f"Error: Invalid action '{action}'. Supported actions: {', '.join(valid_actions)}"
 
@@ -172,297 +206,248 @@ class TreasuryRiskTools(BaseTool):
             if action == "check_balance":
                 if not wallet_address.strip():
                     return "Error: wallet_address is required for check_balance action"
-                return self._check_balance(wallet_address, currency)
+                return self._check_balance(wallet_address, currency, limits)
             elif action == "validate_transaction_limits":
                 if amount <= 0:
                     return "Error: amount must be greater than 0 for validate_transaction_limits action"
-                return self._validate_transaction_limits(amount, currency, user_id, transaction_type)
+                return self._validate_transaction_limits(amount, currency, user_id, transaction_type, limits)
             elif action == "check_minimum_balance":
                 if not wallet_address.strip():
                     return "Error: wallet_address is required for check_minimum_balance action"
-                return self._check_minimum_balance(wallet_address, currency)
+                return self._check_minimum_balance(wallet_address, currency, limits)
             elif action == "assess_risk":
                 if amount <= 0:
                     return "Error: amount must be greater than 0 for assess_risk action"
-                return self._assess_risk(amount, currency, user_id, transaction_type)
+                return self._assess_risk(amount, currency, user_id, transaction_type, limits)
+            elif action == "batch_assess":
+                if not payments:
+                    return "Error: payments list is required for batch_assess action"
+                return self._batch_assess(payments, user_id, currency, limits)
+            elif action == "reserve_limits":
+                if amount <= 0:
+                    return "Error: amount must be greater than 0 for reserve_limits action"
+                return self._validate_transaction_limits(amount, currency, user_id, transaction_type, limits, hold=True)
+            elif action in ("commit_reservation", "release_reservation"):
+                reservation_id = str(reservation_id or "").strip()
+                if not reservation_id:
+                    return f"Error: reservation_id is required for {action} action"
+                return self._settle_reservation(reservation_id, commit=action == "commit_reservation")
+            elif action == "limit_headroom":
+                return self._limit_headroom(user_id, limits)
                 
+        except (ValueError, LookupError, NotImplementedError) as e:
+            return f"Error: {str(e)}"
         except Exception as e:
             import traceback
             error_details = traceback.format_exc()
             print(f"Error in TreasuryRiskTools._run: {str(e)}\n{error_details}")
             return f"Error in risk tool execution: {str(e)}"
 
-    def _check_balance(self, wallet_address: str, currency: str = "USD") -> str:
+    def _check_balance(self, wallet_address: str, currency: str = "USD",
+                       limits: Optional[Dict[str, float]] = None) -> BalanceCheck:
         """Check real balance for a wallet address."""
-        try:
-            if not wallet_address:
-                return "Error: Wallet address is required for balance check"
-            
-            if currency.upper() == "USD":
-                # For USD, we'll simulate balance checking (in real implementation, this would connect to bank APIs)
-                if not self._w3:
-                    # Simulation mode for USD balance
-                    balance_usd = random.uniform(5000.0, 50000.0)
-                    available_balance = max(0, balance_usd - self._minimum_balance_usd)
-                    
-                    result = f"Balance Check Results (SIMULATION MODE):\n"
-                    result += f"Wallet: {wallet_address}\n"
-                    result += f"Currency: {currency}\n"
-                    result += f"Total Balance: ${balance_usd:,.2f}\n"
-                    result += f"Minimum Required: ${self._minimum_balance_usd:,.2f}\n"
-                    result += f"Available Balance: ${available_balance:,.2f}\n"
-                    result += f"Status: {'SUFFICIENT' if available_balance > 0 else 'INSUFFICIENT'}\n"
-                    result += f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                    result += f"📝 Note: This is a simulation. Real balance would be checked via bank API."
-                    
-                    return result
-                else:
-                    # Real implementation would connect to bank APIs here
-                    return "Real USD balance checking not implemented yet"
-            
-            elif currency.upper() in ["ETH", "USDT", "USDC"]:
-                # For crypto, use Web3 if available
-                if not self._w3:
-                    # Simulation mode for crypto
-                    if currency.upper() == "ETH":
-                        balance = random.uniform(0.1, 2.0)
-                        usd_value = balance * 3500  # Mock ETH price
-                    elif currency.upper() in ["USDT", "USDC"]:
-                        balance = random.uniform(100.0, 10000.0)
-                        usd_value = balance  # Stablecoins ≈ USD
-                    else:
-                        balance = 0.0
-                        usd_value = 0.0
-                    
-                    result = f"Balance Check Results (SIMULATION MODE):\n"
-                    result += f"Wallet: {wallet_address}\n"
-                    result += f"Currency: {currency}\n"
-                    result += f"Balance: {balance:.6f} {currency}\n"
-                    result += f"USD Value: ${usd_value:,.2f}\n"
-                    result += f"Minimum Required: ${self._minimum_balance_usd:,.2f}\n"
-                    result += f"Status: {'SUFFICIENT' if usd_value >= self._minimum_balance_usd else 'INSUFFICIENT'}\n"
-                    result += f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                    result += f"📝 Note: This is a simulation. Real balance would be checked via blockchain."
-                    
-                    return result
+        if not wallet_address:
+            raise ValueError("Wallet address is required for balance check")
+        currency_code = currency.upper()
+        
+        if currency_code == "USD":
+            # For USD, we'll simulate balance checking (in real implementation, this would connect to bank APIs)
+            if self._w3:
+                raise NotImplementedError("Real USD balance checking not implemented yet")
+            balance = random.uniform(5000.0, 50000.0)
+            balance_usd = balance
+        
+        elif currency_code in ["ETH", "USDT", "USDC"]:
+            if not self._w3:
+                # Simulation mode for crypto
+                if currency_code == "ETH":
+                    balance = random.uniform(0.1, 2.0)
                 else:
-                    # Real Web3 implementation
-                    try:
-                        address = Web3.to_checksum_address(wallet_address)
-                        
-                        if currency.upper() == "ETH":
-                            balance_wei = self._w3.eth.get_balance(address)
-                            balance = self._w3.from_wei(balance_wei, 'ether')
-                            
-                            # Get real ETH price
-                            response = requests.get('https://api.coingecko.com/api/v3/simple/price?ids=ethereum&vs_currencies=usd', timeout=10)
-                            if response.status_code == 200:
-                                data = response.json()
-                                eth_price = data['ethereum']['usd']
-                                usd_value = float(balance) * eth_price
-                            else:
-                                usd_value = float(balance) * 3500  # Fallback price
-                        
-                        elif currency.upper() in ["USDT", "USDC"]:
-                            # For stablecoins, we'd need contract addresses and ABI
-                            # This is simplified for now
-                            balance = 0.0
-                            usd_value = 0.0
-                        
-                        result = f"Balance Check Results:\n"
-                        result += f"Wallet: {wallet_address}\n"
-                        result += f"Currency: {currency}\n"
-                        result += f"Balance: {balance:.6f} {currency}\n"
-                        result += f"USD Value: ${usd_value:,.2f}\n"
-                        result += f"Minimum Required: ${self._minimum_balance_usd:,.2f}\n"
-                        result += f"Status: {'SUFFICIENT' if usd_value >= self._minimum_balance_usd else 'INSUFFICIENT'}\n"
-                        result += f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-                        
-                        return result
-                        
-                    except Exception as e:
-                        return f"Error checking crypto balance: {str(e)}"
-            
+                    balance = random.uniform(100.0, 10000.0)
             else:
-                return f"Unsupported currency: {currency}. Supported: USD, ETH, USDT, USDC"
-                
-        except Exception as e:
-            return f"Error in balance check: {str(e)}"
+                # Real Web3 implementation
+                address = Web3.to_checksum_address(wallet_address)
+                if currency_code == "ETH":
+                    balance = float(self._w3.from_wei(self._w3.eth.get_balance(address), 'ether'))
+                else:
+                    # For stablecoins, we'd need contract addresses and ABI
+                    # This is simplified for now
+                    balance = 0.0
+            balance_usd = price_oracle().usd_value(balance, currency_code)
+        
+        else:
+            raise ValueError(f"Unsupported currency: {currency}. Supported: USD, ETH, USDT, USDC")
+        
+        return BalanceCheck(
+            wallet_address=wallet_address,
+            currency=currency,
+            balance=balance,
+            balance_usd=balance_usd,
+            minimum_required_usd=(limits or DEFAULT_RISK_LIMITS)["minimum_balance"],
+            simulated=not self._w3,
+        )
+
+    def _limits(self, limits: Dict[str, float]) -> Dict[str, float]:
+        """The single / daily / monthly limits of a _resolve_limits result."""
+        return {kind: limits[kind] for kind in LIMIT_KINDS}
 
-    def _validate_transaction_limits(self, amount: float, currency: str, user_id: str, transaction_type: str) -> str:
+    def _validate_transaction_limits(self, amount: float, currency: str, user_id: str, transaction_type: str,
+                                     limits: Dict[str, float], hold: bool = False) -> LimitCheck:
         """Validate transaction against configured limits."""
-        try:
-            if amount <= 0:
-                return "Error: Transaction amount must be greater than 0"
-            
-            # Convert to USD for limit checking (simplified)
-            amount_usd = amount
-            if currency.upper() != "USD":
-                # In real implementation, this would use real exchange rates
-                amount_usd = amount  # Simplified for now
-            
-            # Initialize user transaction history if not exists
-            if user_id not in self._transaction_history:
-                self._transaction_history[user_id] = {
-                    'daily_total': 0.0,
-                    'monthly_total': 0.0,
-                    'last_daily_reset': datetime.now().date(),
-                    'last_monthly_reset': datetime.now().replace(day=1).date()
-                }
-            
-            user_history = self._transaction_history[user_id]
-            today = datetime.now().date()
-            current_month = datetime.now().replace(day=1).date()
-            
-            # Reset daily total if it's a new day
-            if user_history['last_daily_reset'] < today:
-                user_history['daily_total'] = 0.0
-                user_history['last_daily_reset'] = today
-            
-            # Reset monthly total if it's a new month
-            if user_history['last_monthly_reset'] < current_month:
-                user_history['monthly_total'] = 0.0
-                user_history['last_monthly_reset'] = current_month
-            
-            # Check limits
-            violations = []
-            status = "APPROVED"
-            
-            # Single transaction limit
-            if amount_usd > self._max_single_transaction_usd:
-                violations.append(f"Exceeds single transaction limit of ${self._max_single_transaction_usd:,.2f}")
-                status = "BLOCKED"
-            
-            # Daily limit check
-            daily_total_after = user_history['daily_total'] + amount_usd
-            if daily_total_after > self._daily_limit_usd:
-                violations.append(f"Would exceed daily limit of ${self._daily_limit_usd:,.2f} (current: ${user_history['daily_total']:,.2f})")
-                status = "BLOCKED"
-            
-            # Monthly limit check
-            monthly_total_after = user_history['monthly_total'] + amount_usd
-            if monthly_total_after > self._monthly_limit_usd:
-                violations.append(f"Would exceed monthly limit of ${self._monthly_limit_usd:,.2f} (current: ${user_history['monthly_total']:,.2f})")
-                status = "BLOCKED"
-            
-            # Format response
-            result = f"Transaction Limit Validation Results:\n"
-            result += f"Status: {status}\n"
-            result += f"User ID: {user_id}\n"
-            result += f"Transaction Type: {transaction_type}\n"
-            result += f"Amount: ${amount_usd:,.2f} {currency}\n"
-            result += f"Daily Total: ${user_history['daily_total']:,.2f}\n"
-            result += f"Monthly Total: ${user_history['monthly_total']:,.2f}\n"
-            result += f"Daily Limit: ${self._daily_limit_usd:,.2f}\n"
-            result += f"Monthly Limit: ${self._monthly_limit_usd:,.2f}\n"
-            result += f"Single Transaction Limit: ${self._max_single_transaction_usd:,.2f}\n"
-            
-            if violations:
-                result += f"\nLimit Violations:\n"
-                for i, violation in enumerate(violations, 1):
-                    result += f"{i}. {violation}\n"
-            else:
-                result += f"\n✅ All limits satisfied\n"
-            
-            result += f"\nTimestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            
-            # Update transaction history if approved
-            if status == "APPROVED":
-                user_history['daily_total'] += amount_usd
-                user_history['monthly_total'] += amount_usd
-            
-            return result
-            
-        except Exception as e:
-            return f"Error in transaction limit validation: {str(e)}"
+        if amount <= 0:
+            raise ValueError("Transaction amount must be greater than 0")
+        
+        # Limits are in USD
+        amount_usd = price_oracle().usd_value(amount, currency)
+        
+        # Check and hold the amount against the shared ledger in one atomic step
+        reservation = self._ledger.reserve(user_id, amount_usd, self._limits(limits))
+        
+        # Validation counts an approved amount as spent; reserve_limits leaves it held until
+        # commit_reservation / release_reservation (or its expiry)
+        if reservation["approved"] and not hold:
+            self._ledger.commit(reservation["reservation_id"])
+        
+        return LimitCheck(
+            user_id=user_id,
+            transaction_type=transaction_type,
+            currency=currency,
+            amount_usd=amount_usd,
+            approved=reservation["approved"],
+            daily_total=reservation["daily_used"],
+            monthly_total=reservation["monthly_used"],
+            limits=self._limits(limits),
+            violations=reservation["violations"],
+            reservation_id=reservation["reservation_id"] if hold else None,
+        )
+
+    def assess_risk(self, amount: float, currency: str = "USD", user_id: str = "default",
+                    transaction_type: str = "payment", risk_config: Optional[Dict[str, Any]] = None) -> RiskAssessment:
+        """Assess one transaction in-process; an approved amount counts as spent, as with the assess_risk action."""
+        return self._assess_risk(self._safe_float_conversion(amount, "amount", 0.0), currency, user_id,
+                                 transaction_type, self._resolve_limits(risk_config))
+
+    def batch_assess(self, payments: List[Dict[str, Any]], user_id: str = "default",
+                     risk_config: Optional[Dict[str, Any]] = None, currency: str = "USD") -> BatchAssessment:
+        """
+        Assess a whole proposal's payments against the limits in one call.
 
-    def _check_minimum_balance(self, wallet_address: str, currency: str = "USD") -> str:
+        Returns per-payment verdicts, the first payment breaching each limit and
+        totals; approved amounts count as spent, as with assess_risk.
+        """
+        return self._batch_assess(payments, user_id, currency, self._resolve_limits(risk_config))
+
+    def _batch_assess(self, payments: List[Dict[str, Any]], user_id: str, currency: str,
+                      limits: Dict[str, float]) -> BatchAssessment:
+        amounts = np.fromiter(
+            (self._safe_float_conversion(payment.get('amount'), "amount", 0.0) for payment in payments),
+            dtype=float, count=len(payments),
+        )
+        # Limits are in USD; a payment without its own currency is in the batch currency
+        currencies = [str(payment.get('currency') or currency).upper() for payment in payments]
+        prices = {symbol: price_oracle().get_price(symbol) for symbol in set(currencies)}
+        amounts_usd = amounts * np.fromiter((prices[symbol] for symbol in currencies), dtype=float, count=len(payments))
+        priorities = [payment.get('priority') for payment in payments]
+        limits = self._limits(limits)
+        # Evaluate against current usage, then take the approved total in one atomic reservation;
+        # if a concurrent request used headroom in between, re-evaluate against the new usage
+        for _ in range(BATCH_RESERVE_ATTEMPTS):
+            headroom = self._ledger.headroom(user_id, limits)
+            verdicts = evaluate_limits(amounts_usd, limits, headroom["daily_used"], headroom["monthly_used"], priorities)
+            if verdicts["approved_amount"] <= 0:
+                break
+            reservation = self._ledger.reserve(user_id, verdicts["approved_amount"], {**limits, "single": float("inf")})
+            if reservation["approved"]:
+                self._ledger.commit(reservation["reservation_id"])
+                break
+        else:
+            return self._contended_batch(payments, amounts, amounts_usd, user_id, currency, limits)
+
+        def payment_id(index: int) -> Any:
+            return payments[index].get('payment_id', index)
+
+        return BatchAssessment(
+            user_id=user_id,
+            currency=currency,
+            limits=limits,
+            daily_used_before=headroom["daily_used"],
+            monthly_used_before=headroom["monthly_used"],
+            approved_amount=verdicts["approved_amount"],
+            first_breach={
+                kind: None if index is None else payment_id(index) for kind, index in verdicts["first_breach"].items()
+            },
+            payments=[
+                PaymentVerdict(
+                    payment_id=payment_id(index),
+                    amount=float(amounts[index]),
+                    amount_usd=float(amounts_usd[index]),
+                    priority=payments[index].get('priority') or "normal",
+                    status="APPROVED" if verdicts["approved"][index] else "BLOCKED",
+                    violations=[kind for kind in ("invalid",) + LIMIT_KINDS if verdicts[kind][index]],
+                )
+                for index in range(len(payments))
+            ],
+        )
+
+    def _contended_batch(self, payments: List[Dict[str, Any]], amounts: np.ndarray, amounts_usd: np.ndarray,
+                         user_id: str, currency: str, limits: Dict[str, float]) -> BatchAssessment:
+        """Every reservation attempt lost to concurrent requests: report the current usage and nothing approved."""
+        metrics.increment("risk_batch_contended_total")
+        headroom = self._ledger.headroom(user_id, limits)
+        return BatchAssessment(
+            user_id=user_id,
+            currency=currency,
+            limits=limits,
+            daily_used_before=headroom["daily_used"],
+            monthly_used_before=headroom["monthly_used"],
+            approved_amount=0.0,
+            first_breach={kind: None for kind in LIMIT_KINDS},
+            payments=[
+                PaymentVerdict(
+                    payment_id=payment.get('payment_id', index),
+                    amount=float(amounts[index]),
+                    amount_usd=float(amounts_usd[index]),
+                    priority=payment.get('priority') or "normal",
+                    status="RETRY",
+                )
+                for index, payment in enumerate(payments)
+            ],
+            contended=True,
+        )
+
+    def _settle_reservation(self, reservation_id: str, commit: bool) -> ReservationSettlement:
+        """Commit (spend) or release a reservation made by reserve_limits."""
+        settled = self._ledger.commit(reservation_id) if commit else self._ledger.release(reservation_id)
+        return ReservationSettlement(reservation_id=reservation_id, committed=commit, settled=settled)
+
+    def _limit_headroom(self, user_id: str, limits: Dict[str, float]) -> LimitHeadroom:
+        """Remaining daily and monthly headroom for a user."""
+        limits = self._limits(limits)
+        headroom = self._ledger.headroom(user_id, limits)
+        return LimitHeadroom(
+            user_id=user_id,
+            limits=limits,
+            daily_used=headroom["daily_used"],
+            monthly_used=headroom["monthly_used"],
+            daily_reserved=headroom["daily_reserved"],
+            monthly_reserved=headroom["monthly_reserved"],
+            daily_remaining=headroom["daily_remaining"],
+            monthly_remaining=headroom["monthly_remaining"],
+        )
+
+    def _check_minimum_balance(self, wallet_address: str, currency: str,
+                               limits: Dict[str, float]) -> MinimumBalanceCheck:
         """Check if wallet meets minimum balance requirements."""
-        try:
-            if not wallet_address:
-                return "Error: Wallet address is required for minimum balance check"
-            
-            # Get current balance
-            balance_result = self._check_balance(wallet_address, currency)
-            
-            # Extract balance information (simplified parsing)
-            if "SIMULATION MODE" in balance_result:
-                # For simulation, we'll parse the simulated balance
-                if currency.upper() == "USD":
-                    # Extract USD balance from simulation
-                    balance_usd = random.uniform(5000.0, 50000.0)
-                else:
-                    # Extract crypto balance from simulation
-                    if currency.upper() == "ETH":
-                        balance = random.uniform(0.1, 2.0)
-                        balance_usd = balance * 3500
-                    else:
-                        balance = random.uniform(100.0, 10000.0)
-                        balance_usd = balance
-            else:
-                # For real implementation, parse the actual balance
-                balance_usd = 0.0  # Would parse from real balance result
-            
-            # Check minimum balance requirement
-            meets_minimum = balance_usd >= self._minimum_balance_usd
-            shortfall = max(0, self._minimum_balance_usd - balance_usd)
-            
-            result = f"Minimum Balance Check Results:\n"
-            result += f"Wallet: {wallet_address}\n"
-            result += f"Currency: {currency}\n"
-            result += f"Current Balance: ${balance_usd:,.2f}\n"
-            result += f"Minimum Required: ${self._minimum_balance_usd:,.2f}\n"
-            result += f"Shortfall: ${shortfall:,.2f}\n"
-            result += f"Status: {'MEETS_MINIMUM' if meets_minimum else 'BELOW_MINIMUM'}\n"
-            result += f"Recommendation: {'Ready for transactions' if meets_minimum else 'Add funds to meet minimum balance'}\n"
-            result += f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            
-            return result
-            
-        except Exception as e:
-            return f"Error in minimum balance check: {str(e)}"
+        if not wallet_address:
+            raise ValueError("Wallet address is required for minimum balance check")
+        return MinimumBalanceCheck(balance=self._check_balance(wallet_address, currency, limits))
 
-    def _assess_risk(self, amount: float, currency: str, user_id: str, transaction_type: str) -> str:
+    def _assess_risk(self, amount: float, currency: str, user_id: str, transaction_type: str,
+                     limits: Dict[str, float]) -> RiskAssessment:
         """Comprehensive risk assessment combining balance and limit checks."""
-        try:
-            if amount <= 0:
-                return "Error: Transaction amount must be greater than 0"
-            
-            # Perform all checks
-            limit_result = self._validate_transaction_limits(amount, currency, user_id, transaction_type)
-            
-            # Extract status from limit check
-            if "Status: APPROVED" in limit_result:
-                risk_status = "LOW_RISK"
-                recommendation = "Transaction approved - all limits satisfied"
-            elif "Status: BLOCKED" in limit_result:
-                risk_status = "HIGH_RISK"
-                recommendation = "Transaction blocked - limit violations detected"
-            else:
-                risk_status = "MEDIUM_RISK"
-                recommendation = "Transaction requires review"
-            
-            # Calculate risk score (simplified)
-            risk_score = 0.0
-            if "BLOCKED" in limit_result:
-                risk_score = 1.0
-            elif "APPROVED" in limit_result:
-                risk_score = 0.1
-            
-            result = f"Risk Assessment Results:\n"
-            result += f"Risk Status: {risk_status}\n"
-            result += f"Risk Score: {risk_score:.2f}/1.0\n"
-            result += f"Amount: ${amount:,.2f} {currency}\n"
-            result += f"Transaction Type: {transaction_type}\n"
-            result += f"User ID: {user_id}\n"
-            result += f"Recommendation: {recommendation}\n"
-            result += f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-            result += f"\nDetailed Limit Check:\n{limit_result}"
-            
-            return result
-            
-        except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            print(f"Error in risk assessment: {str(e)}\n{error_details}")
-            return f"Error in risk assessment: {str(e)}" 
\ No newline at end of file
+        if amount <= 0:
+            raise ValueError("Transaction amount must be greater than 0")
+        return RiskAssessment(
+            amount=amount,
+            limit_check=self._validate_transaction_limits(amount, currency, user_id, transaction_type, limits),
+        )
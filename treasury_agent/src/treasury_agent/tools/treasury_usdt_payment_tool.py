@@ -12,6 +12,9 @@ from web3.exceptions import (
     InvalidTransaction, BlockNotFound, InvalidAddress, ValidationError
 )
 
+from .tool_hooks import instrumented_tool_run
+from .price_oracle import price_oracle
+
 
 class USDTPaymentInput(BaseModel):
     """Input schema for TreasuryUSDTPaymentTool."""
@@ -94,6 +97,10 @@ class TreasuryUSDTPaymentTool(BaseTool):
         except Exception as e:
             print(f"Warning: Could not load USDT contract: {str(e)}")
 
+    # Gas estimates and address validation are read-only and memoized per run; execute_payment never is
+    # Payments are never written to or served from a trace; private keys never appear in trace keys
+    @instrumented_tool_run(memoize=("estimate_gas", "validate_address"), secret_args=("private_key",),
+                           unrecorded=("execute_payment",))
     def _run(self, action: str, wallet_address: str = "", recipient_address: str = "", 
              amount_usdt: float = 0.0, private_key: str = "", transaction_id: str = "") -> str:
         
@@ -119,7 +126,7 @@ class TreasuryUSDTPaymentTool(BaseTool):
             # Simulation mode
             eth_balance = random.uniform(0.001, 0.1)
             usdt_balance = random.uniform(10.0, 1000.0)
-            eth_usd_value = eth_balance * 3500  # Mock ETH price
+            eth_usd_value = price_oracle().usd_value(eth_balance, "ETH")
         else:
             try:
                 address = Web3.to_checksum_address(wallet_address)
@@ -132,8 +139,7 @@ class TreasuryUSDTPaymentTool(BaseTool):
                 balance_wei = self._usdt_contract.functions.balanceOf(address).call()
                 usdt_balance = float(balance_wei) / 10**6
                 
-                # Get ETH price (simplified)
-                eth_usd_value = float(eth_balance) * 3500  # Mock price
+                eth_usd_value = price_oracle().usd_value(eth_balance, "ETH")
                 
             except Exception as e:
                 return f"Error checking balance: {str(e)}"
@@ -173,7 +179,8 @@ class TreasuryUSDTPaymentTool(BaseTool):
         result += f"Adjusted Gas Price: {adjusted_gas_price:.2f} Gwei (35% buffer)\n"
         result += f"Gas Limit: {gas_limit:,} units\n"
         result += f"Estimated Cost: {gas_cost_eth:.6f} ETH\n"
-        result += f"Estimated Cost USD: ${gas_cost_eth * 3500:.2f} (at $3500/ETH)\n"
+        eth_price = price_oracle().get_price("ETH")
+        result += f"Estimated Cost USD: ${float(gas_cost_eth) * eth_price:.2f} (at ${eth_price:,.2f}/ETH)\n"
         result += f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
         
         return result
@@ -0,0 +1,116 @@
+"""
+Precompiled currency / date / numeric classification of cell values.
+
+`is_currency`, `is_date` and `is_numeric` classify one value and define the
+rules; the column functions apply the same rules to a whole column at once with
+pandas string methods. `column_numeric_profile` returns a column's numeric mask
+and float values, computed once per column and reused by type inference and the
+payment and balance aggregates.
+"""
+
+import re
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .sheet_columns import SheetColumns
+
+
+CURRENCY_PATTERN = r'^(?:\$[\d,]+\.?\d*|€[\d,]+\.?\d*|£[\d,]+\.?\d*|[\d,]+\.?\d*\s*(?:USD|EUR|GBP|JPY))$'
+DATE_PATTERN = r'^(?:\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}-\d{2}-\d{4})$'
+NUMERIC_STRIP_PATTERN = r'[$,€£¥,\s]'
+CURRENCY_RE = re.compile(CURRENCY_PATTERN)
+DATE_RE = re.compile(DATE_PATTERN)
+NUMERIC_STRIP_RE = re.compile(NUMERIC_STRIP_PATTERN)
+# float() accepts these, pd.to_numeric does not
+NAN_TOKENS = ("nan", "+nan", "-nan")
+
+# Per column: (mask of cells is_numeric accepts, float(cell) or NaN where float() fails)
+NumericProfile = Tuple[np.ndarray, np.ndarray]
+
+
+def is_currency(value: Any) -> bool:
+    """Check if a value looks like currency ('$1,200', '1200 USD')."""
+    return CURRENCY_RE.match(str(value)) is not None
+
+
+def is_date(value: Any) -> bool:
+    """Check if a value looks like a date (YYYY-MM-DD, DD/MM/YYYY, DD-MM-YYYY)."""
+    return DATE_RE.match(str(value)) is not None
+
+
+def is_numeric(value: Any) -> bool:
+    """Check if a value is numeric once currency symbols, commas and whitespace are removed."""
+    try:
+        float(NUMERIC_STRIP_RE.sub("", str(value)))
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def value_kind(value: Any) -> str:
+    """'currency', 'date', 'numeric' or 'text', checked in that order."""
+    text = str(value)
+    if is_currency(text):
+        return "currency"
+    if is_date(text):
+        return "date"
+    if is_numeric(text):
+        return "numeric"
+    return "text"
+
+
+def pattern_masks(text: pd.Series) -> Dict[str, np.ndarray]:
+    """is_currency / is_date of every value of a string Series."""
+    return {
+        "currency": text.str.match(CURRENCY_RE).to_numpy(dtype=bool),
+        "date": text.str.match(DATE_RE).to_numpy(dtype=bool),
+    }
+
+
+def series_numeric_profile(column: pd.Series) -> NumericProfile:
+    """column_numeric_profile of an object column, using vectorized string cleaning."""
+    notna = column.notna().to_numpy()
+    text = column.astype(str)
+    cleaned = text.str.replace(NUMERIC_STRIP_RE, "", regex=True)
+    parsed = pd.to_numeric(cleaned, errors="coerce").to_numpy(dtype=float)
+    is_nan_token = cleaned.str.lower().isin(NAN_TOKENS).to_numpy()
+    # bool cells render as 'True'/'False' and are never numeric
+    mask = notna & (~np.isnan(parsed) | is_nan_token)
+
+    values = pd.to_numeric(text.str.strip(), errors="coerce").to_numpy(dtype=float)
+    values[~notna] = np.nan
+    return mask, values
+
+
+def column_numeric_profile(columns: SheetColumns, position: int) -> NumericProfile:
+    """
+    Vectorized `is_numeric(str(value))` and `float(value)` over a column.
+
+    Returns the mask of non-null cells that are numeric once currency symbols,
+    commas and whitespace are stripped, and the float value of each cell where
+    `float(value)` itself succeeds (NaN elsewhere, e.g. for '$1,200').
+    """
+    body = columns.bodies[position]
+    if columns.n_rows == 0:
+        return np.zeros(0, dtype=bool), np.zeros(0)
+    if body.dtype.kind not in "if":
+        return series_numeric_profile(columns.series(position))
+
+    # Typed body: every non-null cell below the header row is a number
+    is_null = columns.is_null(position)
+    mask = ~is_null
+    values = np.empty(columns.n_rows)
+    values[1:] = body
+    head = columns.head[position]
+    if is_null[0]:
+        values[0] = np.nan
+    else:
+        mask[0] = is_numeric(head)
+        try:
+            values[0] = float(head)
+        except (ValueError, TypeError):
+            values[0] = np.nan
+    values[is_null] = np.nan
+    return mask, values
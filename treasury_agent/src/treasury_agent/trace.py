@@ -0,0 +1,240 @@
+"""
+Crew run recording and replay.
+
+RunRecorder captures one crew run (inputs, every LLM turn, every tool call with
+its result, task outputs and timings) into a compact gzip JSON-lines trace.
+TraceReplayer feeds a trace back into a real crew run: RunAwareLLM returns the
+recorded LLM responses in order and the tool hook returns recorded tool results,
+so the orchestration itself (CrewAI, parsing, callbacks, our hooks) executes for
+real while the model and tools are replaced. Recorded durations are slept at
+`speed`x (0 replays as fast as possible).
+
+Recording is enabled for server runs by setting TREASURY_RECORD_DIR; replay with
+`replay_trace <trace file> [speed]`.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .metrics import metrics
+from .task_output_store import submit_write
+
+
+TRACE_VERSION = 1
+
+
+def _messages_digest(messages: Any) -> str:
+    payload = json.dumps(messages, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+class RunRecorder:
+    """Collects the events of one crew run for serialization."""
+
+    def __init__(self, run_id: str, inputs: Dict[str, Any]):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.header = {
+            "kind": "header",
+            "version": TRACE_VERSION,
+            "run_id": run_id,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "inputs": inputs,
+        }
+        self.events: List[Dict[str, Any]] = []
+
+    def _offset(self) -> float:
+        return round(time.perf_counter() - self._started, 6)
+
+    def record_llm(self, model: str, messages: Any, response: Any, duration: float) -> None:
+        with self._lock:
+            self.events.append({
+                "kind": "llm",
+                "t": self._offset(),
+                "model": model,
+                "messages": _messages_digest(messages),
+                "response": response if isinstance(response, str) else str(response),
+                "duration": round(duration, 6),
+            })
+
+    def record_tool(self, tool_name: str, call_key: str, result: Any, duration: float) -> None:
+        with self._lock:
+            self.events.append({
+                "kind": "tool",
+                "t": self._offset(),
+                "tool": tool_name,
+                "key": call_key,
+                "result": result if isinstance(result, str) else json.dumps(result, default=str),
+                "duration": round(duration, 6),
+            })
+
+    def save(self, path: Path, task_outputs: Dict[str, Any], output: Optional[str], error: Optional[str]) -> Path:
+        """Write header, events and a result footer as gzip JSON lines."""
+        footer = {
+            "kind": "result",
+            "duration": self._offset(),
+            "task_outputs": task_outputs,
+            "output": output,
+            "error": error,
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            lines = [self.header, *self.events, footer]
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, separators=(",", ":"), default=str) + "\n")
+        metrics.increment("crew_traces_recorded_total")
+        return path
+
+
+def trace_dir() -> Optional[Path]:
+    """Return the directory runs are recorded to, or None when recording is disabled."""
+    directory = os.getenv("TREASURY_RECORD_DIR")
+    return Path(directory) if directory else None
+
+
+def start_recording(run_id: str, inputs: Dict[str, Any]) -> Optional[RunRecorder]:
+    """Create a recorder for a run when TREASURY_RECORD_DIR is set."""
+    return RunRecorder(run_id, inputs) if trace_dir() else None
+
+
+def save_trace_async(recorder: RunRecorder, task_outputs: Dict[str, Any], output: Optional[str],
+                     error: Optional[str]) -> Optional[Future]:
+    """Write <TREASURY_RECORD_DIR>/<run_id>.trace.jsonl.gz on the background writer."""
+    directory = trace_dir()
+    if directory is None:
+        return None
+    path = directory / f"{recorder.header['run_id']}.trace.jsonl.gz"
+    return submit_write(recorder.save, path, dict(task_outputs), output, error)
+
+
+def load_trace(path: Path) -> Dict[str, Any]:
+    """Read a trace file into {'header', 'events', 'result'}."""
+    trace = {"header": None, "events": [], "result": None}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry["kind"] == "header":
+                trace["header"] = entry
+            elif entry["kind"] == "result":
+                trace["result"] = entry
+            else:
+                trace["events"].append(entry)
+    if not trace["header"] or trace["header"].get("version") != TRACE_VERSION:
+        raise ValueError(f"Unsupported or missing trace header in {path}")
+    return trace
+
+
+class TraceReplayer:
+    """Serves recorded LLM responses and tool results to a replayed crew run."""
+
+    def __init__(self, trace: Dict[str, Any], speed: float = 0.0):
+        self._lock = threading.Lock()
+        self.speed = speed
+        self._llm_events = [e for e in trace["events"] if e["kind"] == "llm"]
+        self._llm_index = 0
+        self._tool_results: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        for event in trace["events"]:
+            if event["kind"] == "tool":
+                self._tool_results[(event["tool"], event["key"])].append(event)
+        self.llm_replayed = 0
+        self.tool_replayed = 0
+        self.divergences: List[str] = []
+        self.simulated_wait = 0.0
+
+    def _wait(self, duration: float) -> None:
+        if self.speed and self.speed > 0 and duration > 0:
+            delay = duration / self.speed
+            self.simulated_wait += delay
+            time.sleep(delay)
+
+    def next_llm_response(self, messages: Any) -> str:
+        with self._lock:
+            if self._llm_index >= len(self._llm_events):
+                self.divergences.append("llm: trace exhausted")
+                return "Thought: I now know the final answer\nFinal Answer: Replay trace exhausted."
+            event = self._llm_events[self._llm_index]
+            self._llm_index += 1
+            self.llm_replayed += 1
+            if event["messages"] != _messages_digest(messages):
+                self.divergences.append(f"llm #{self._llm_index}: prompt differs from recording")
+        self._wait(event["duration"])
+        return event["response"]
+
+    def tool_result(self, tool_name: str, call_key: str) -> Tuple[bool, Any]:
+        """(True, recorded result) for a recorded call; (False, None) and a divergence otherwise."""
+        with self._lock:
+            queue = self._tool_results.get((tool_name, call_key))
+            if not queue:
+                self.divergences.append(f"tool {tool_name}: no recorded result for {call_key[:120]}")
+                return False, None
+            event = queue.popleft() if len(queue) > 1 else queue[0]
+            self.tool_replayed += 1
+        self._wait(event["duration"])
+        return True, event["result"]
+
+    def tool_miss(self, tool_name: str, reason: str) -> Tuple[bool, Any]:
+        """Record a tool call that cannot be served from the trace."""
+        with self._lock:
+            self.divergences.append(f"tool {tool_name}: {reason}")
+        return False, None
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "llm_replayed": self.llm_replayed,
+                "llm_recorded": len(self._llm_events),
+                "tool_replayed": self.tool_replayed,
+                "simulated_wait_ms": round(self.simulated_wait * 1000, 2),
+                "divergences": list(self.divergences),
+            }
+
+
+def replay_trace(path: Path, speed: float = 0.0) -> Dict[str, Any]:
+    """
+    Re-execute the crew orchestration of a recorded run and report timings.
+
+    `orchestration_overhead_ms` is the replay wall time minus the simulated
+    LLM/tool waits, i.e. the cost of everything except the model and the tools.
+    """
+    from .crew import run_treasury_crew
+    from .run_context import RunContext
+
+    trace = load_trace(Path(path))
+    run = RunContext(run_id=f"replay-{trace['header']['run_id']}")
+    run.replayer = TraceReplayer(trace, speed=speed)
+
+    started = time.perf_counter()
+    error = None
+    try:
+        run_treasury_crew(trace["header"]["inputs"], run=run)
+    except Exception as e:
+        error = str(e)
+    wall = time.perf_counter() - started
+
+    replay = run.replayer.report()
+    recorded = trace["result"] or {}
+    report = {
+        "trace": str(path),
+        "speed": speed,
+        "recorded_duration_ms": round(recorded.get("duration", 0.0) * 1000, 2),
+        "replay_wall_ms": round(wall * 1000, 2),
+        "orchestration_overhead_ms": round(wall * 1000 - replay["simulated_wait_ms"], 2),
+        "task_outputs_match": run.completed_task_outputs() == recorded.get("task_outputs"),
+        "error": error,
+        **replay,
+    }
+    metrics.observe("crew_replay_overhead_ms", report["orchestration_overhead_ms"])
+    return report